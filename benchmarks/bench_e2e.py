@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Offline end-to-end benchmark for the album pipeline.
+
+Runs process_album, export_and_push and the Spotify enrichment script against
+the in-process fakes in tests/fakes.py, with configurable upstream latency,
+error injection and quotas. No network or credentials are needed.
+
+Usage:
+    python benchmarks/bench_e2e.py [--rows 330] [--albums 5] [--concurrency 1]
+                                   [--sheets-latency 0.15] [--spotify-latency 0.08]
+                                   [--odesli-latency 0.3] [--github-latency 0.25]
+                                   [--error-rate 0.0] [--sheets-quota 60]
+                                   [--json results.json]
+
+Each scenario reports wall time, per-run latency percentiles, the number of
+requests each backend received and the peak number of concurrent in-flight
+requests per backend.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'tests'))
+
+from fakes import (  # noqa: E402
+    FakeGitHub, FakeOdesli, FakeSpotify, make_album_sheet, offline_backends, synthetic_album_id,
+)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Offline end-to-end pipeline benchmark')
+    parser.add_argument('--rows', type=int, default=330, help='synthetic sheet size')
+    parser.add_argument('--albums', type=int, default=5, help='albums added per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='concurrent process_album calls')
+    parser.add_argument('--sheets-latency', type=float, default=0.15)
+    parser.add_argument('--spotify-latency', type=float, default=0.08)
+    parser.add_argument('--odesli-latency', type=float, default=0.3)
+    parser.add_argument('--github-latency', type=float, default=0.25)
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency per call')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='random failure rate for every backend')
+    parser.add_argument('--sheets-quota', type=int, default=None, help='Sheets calls allowed per minute')
+    parser.add_argument('--enrich-albums', type=int, default=25, help='albums processed by the enrichment scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', dest='json_path', help='write results to this file')
+    return parser.parse_args()
+
+
+def make_backends(args):
+    common = {'jitter': args.jitter, 'error_rate': args.error_rate, 'seed': args.seed}
+    return {
+        'sheet': make_album_sheet(args.rows, latency=args.sheets_latency, quota=args.sheets_quota, **common),
+        'spotify': FakeSpotify(latency=args.spotify_latency, **common),
+        'odesli': FakeOdesli(latency=args.odesli_latency, **common),
+        'github': FakeGitHub(latency=args.github_latency, **common),
+    }
+
+
+def summarize(name, durations, wall, env, extra=None):
+    durations = sorted(durations)
+    result = {
+        'scenario': name,
+        'runs': len(durations),
+        'wall_s': round(wall, 4),
+        'mean_s': round(statistics.mean(durations), 4) if durations else None,
+        'p50_s': round(durations[len(durations) // 2], 4) if durations else None,
+        'p95_s': round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 4) if durations else None,
+        'requests': env.request_counts(),
+        'max_in_flight': {b.name: b.max_in_flight for b in env.backends},
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+def bench_process_album(args):
+    from pipeline import process_album
+
+    urls = [
+        f'https://open.spotify.com/album/{synthetic_album_id(args.rows + i)}'
+        for i in range(args.albums)
+    ]
+
+    async def timed(url):
+        start = time.perf_counter()
+        result = await process_album(url, picker='DG')
+        return time.perf_counter() - start, result
+
+    async def run_all():
+        durations, outcomes = [], []
+        for i in range(0, len(urls), args.concurrency):
+            batch = urls[i:i + args.concurrency]
+            for duration, result in await asyncio.gather(*(timed(u) for u in batch)):
+                durations.append(duration)
+                outcomes.append(result)
+        return durations, outcomes
+
+    with offline_backends(**make_backends(args)) as env:
+        start = time.perf_counter()
+        durations, outcomes = asyncio.run(run_all())
+        wall = time.perf_counter() - start
+    return summarize('process_album', durations, wall, env, {
+        'succeeded': sum(1 for r in outcomes if r['success']),
+        'partial_failures': sum(1 for r in outcomes if r.get('partial_failure')),
+    })
+
+
+def bench_export_and_push(args):
+    from github_push import export_and_push
+
+    durations, successes = [], 0
+    with offline_backends(**make_backends(args)) as env:
+        start = time.perf_counter()
+        for _ in range(args.albums):
+            t0 = time.perf_counter()
+            ok, _ = export_and_push()
+            durations.append(time.perf_counter() - t0)
+            successes += ok
+        wall = time.perf_counter() - start
+    return summarize('export_and_push', durations, wall, env, {'succeeded': successes})
+
+
+def _load_script(name):
+    path = os.path.join(REPO_ROOT, 'scripts', f'{name}.py')
+    spec = importlib.util.spec_from_file_location(f'bench_{name}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_enrich_spotify_metadata(args):
+    script = _load_script('enrich_spotify_metadata')
+    script.RATE_LIMIT_DELAY = 0  # measure the script's own work, not its politeness delay
+    script._copy_to_website = lambda path: None
+
+    n = min(args.enrich_albums, args.rows)
+    albums = [
+        {'spotify_album_id': synthetic_album_id(i), 'artist': f'Artist {i}', 'album': f'Album {i}',
+         'spotify_url': f'https://open.spotify.com/album/{synthetic_album_id(i)}'}
+        for i in range(n)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'data.json')
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(albums, f)
+        argv = sys.argv
+        sys.argv = [argv[0], data_path]
+        try:
+            with offline_backends(**make_backends(args), extra_modules=[script]) as env:
+                start = time.perf_counter()
+                script.main()
+                wall = time.perf_counter() - start
+        finally:
+            sys.argv = argv
+    return summarize('enrich_spotify_metadata', [wall], wall, env, {'albums': n})
+
+
+def main():
+    args = get_args()
+    results = {
+        'config': vars(args),
+        'scenarios': [
+            bench_process_album(args),
+            bench_export_and_push(args),
+            bench_enrich_spotify_metadata(args),
+        ],
+    }
+
+    for scenario in results['scenarios']:
+        total_requests = {name: sum(ops.values()) for name, ops in scenario['requests'].items()}
+        print(f"{scenario['scenario']:<26} wall={scenario['wall_s']:.3f}s "
+              f"p50={scenario['p50_s']}s p95={scenario['p95_s']}s requests={total_requests} "
+              f"max_in_flight={scenario['max_in_flight']}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {args.json_path}')
+
+
+if __name__ == '__main__':
+    main()
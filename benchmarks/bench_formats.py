@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""Export formats compared: bytes on the wire and time to load.
+
+For each size, the album list exported from a fake sheet is encoded as:
+    rows        data.json as published (indent=2, one object per album)
+    rows_min    data.json without whitespace
+    columnar    data.columnar.json (export_formats.encode_columnar, compact)
+    msgpack     data.msgpack (skipped when msgpack is not installed)
+    ndjson      data.ndjson
+
+and reported with raw and gzip sizes (Netlify serves gzip), parse time
+(bytes → Python objects) and load time (parse + decode back to the album
+list — what a consumer that wants row objects pays).
+
+Usage:
+    python benchmarks/bench_formats.py                        # 327 and 10k albums
+    python benchmarks/bench_formats.py --sizes 327 100000 --json formats.json
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'tests'))
+
+from fakes import make_album_sheet, offline_backends  # noqa: E402
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='data.json vs columnar/msgpack/ndjson: bytes and load time')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[327, 10_000])
+    parser.add_argument('--repeat', type=int, default=7, help='timed repetitions per case')
+    parser.add_argument('--json', dest='json_path', help='write results to this file')
+    return parser.parse_args()
+
+
+def time_it(fn, repeat):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def encodings(albums, msgpack=None):
+    """name → (encoded bytes, parse(bytes), decode(parsed) → album list)."""
+    from export_formats import decode_columnar, encode_columnar
+
+    columnar = encode_columnar(albums)
+    cases = {
+        'rows': (json.dumps(albums, indent=2, ensure_ascii=False).encode(), json.loads, None),
+        'rows_min': (json.dumps(albums, ensure_ascii=False, separators=(',', ':')).encode(), json.loads, None),
+        'columnar': (json.dumps(columnar, ensure_ascii=False, separators=(',', ':')).encode(), json.loads,
+                     decode_columnar),
+        'ndjson': (''.join(json.dumps(a, ensure_ascii=False, separators=(',', ':')) + '\n' for a in albums).encode(),
+                   lambda data: [json.loads(line) for line in data.splitlines()], None),
+    }
+    if msgpack is not None:
+        cases['msgpack'] = (msgpack.packb(columnar, use_bin_type=True),
+                            lambda data: msgpack.unpackb(data, raw=False), decode_columnar)
+    return cases
+
+
+def main():
+    args = get_args()
+    from export_json import export_sheet_to_json
+    from logging_config import setup_logging
+    setup_logging().setLevel(logging.WARNING)
+
+    try:
+        import msgpack
+    except ImportError:
+        msgpack = None
+        print('msgpack not installed; skipping the msgpack format')
+
+    results = {}
+    for size in args.sizes:
+        with offline_backends(sheet=make_album_sheet(size)):
+            albums = export_sheet_to_json(output_path=os.path.join(tempfile.mkdtemp(), 'data.json'), formats=())
+        base = None
+        for name, (data, parse, decode) in encodings(albums, msgpack).items():
+            parse_s = time_it(lambda: parse(data), args.repeat)
+            load_s = time_it(lambda: decode(parse(data)), args.repeat) if decode else parse_s
+            if decode:
+                assert decode(parse(data)) == albums
+            row = {
+                'bytes': len(data),
+                'gzip_bytes': len(gzip.compress(data, 6)),
+                'parse_ms': round(parse_s * 1000, 3),
+                'load_ms': round(load_s * 1000, 3),
+            }
+            base = base or row
+            results[f'{name}[{size}]'] = row
+            print(f'{name + f"[{size}]":<18} {row["bytes"]:>11,} B ({row["bytes"] / base["bytes"]:4.0%})  '
+                  f'gzip {row["gzip_bytes"]:>9,} B ({row["gzip_bytes"] / base["gzip_bytes"]:4.0%})  '
+                  f'parse {row["parse_ms"]:8.2f} ms  load {row["load_ms"]:8.2f} ms')
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {args.json_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
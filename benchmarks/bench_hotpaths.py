@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the CPU hot paths, with a baseline for regression checks.
+
+Covered:
+    normalize_album_rows      export_json row normalization
+    export_sheet_to_json      normalization + sort + data.json write (fake sheet)
+    build_row_from_header     one sheet row per album
+    parse_sheet_date          mixed M/D/YYYY, ISO and junk values
+    spotify_url_validation    is_valid_spotify_album_url + extract_spotify_album_id
+    get_existing_album_ids    dedup map build over a fake sheet (no latency)
+    trigger_pattern           telegram_bot._TRIGGER_PATTERN over group messages
+
+Each benchmark runs at every --sizes value (synthetic sheet rows / items).
+
+Usage:
+    python benchmarks/bench_hotpaths.py                       # 1k, 10k, 100k
+    python benchmarks/bench_hotpaths.py --sizes 1000 1000000  # up to 1M rows
+    python benchmarks/bench_hotpaths.py --json out.json       # machine-readable results
+    python benchmarks/bench_hotpaths.py --compare             # flag regressions vs baseline
+    python benchmarks/bench_hotpaths.py --update-baseline     # record a new baseline
+
+Results are compared per item (ns/row) so baselines recorded at one size
+still apply at another. Exit status is 1 when --compare finds a regression
+larger than --tolerance.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'tests'))
+
+from fakes import make_album_sheet, offline_backends, synthetic_album_id  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline_hotpaths.json')
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='CPU hot-path micro-benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=5, help='timed repetitions per benchmark')
+    parser.add_argument('--only', nargs='+', help='run only these benchmarks')
+    parser.add_argument('--json', dest='json_path', help='write results to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--compare', action='store_true', help='compare against the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown vs baseline before flagging (0.25 = 25%%)')
+    parser.add_argument('--update-baseline', action='store_true')
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks: each takes a size and returns a zero-arg callable to time
+# ---------------------------------------------------------------------------
+
+def bench_normalize_album_rows(n):
+    from add_album import get_header_row_and_map
+    from export_json import normalize_album_rows
+    sheet = make_album_sheet(n)
+    header_row, header_map = get_header_row_and_map(sheet)
+    data_rows = sheet.get_all_values()[header_row:]
+    return lambda: normalize_album_rows(data_rows, header_map)
+
+
+def bench_export_sheet_to_json(n):
+    from export_json import export_sheet_to_json
+    sheet = make_album_sheet(n)
+    out = os.path.join(tempfile.mkdtemp(), 'data.json')
+
+    def run():
+        with offline_backends(sheet=sheet):
+            export_sheet_to_json(output_path=out)
+    return run
+
+
+def bench_build_row_from_header(n):
+    from add_album import build_row_from_header
+    sheet = make_album_sheet(0)
+    header_map = {name.lower(): i for i, name in enumerate(sheet.rows[0])}
+    infos = [
+        {'spotify_album_id': synthetic_album_id(i), 'Artist': f'Artist {i}', 'Album': f'Album {i}',
+         'Year': 1990 + i % 30, 'spotify_album_url': f'https://open.spotify.com/album/{synthetic_album_id(i)}',
+         'artwork_url': 'https://i.scdn.co/image/x', 'Label': 'Label', 'Total Tracks': 10,
+         'Genres': 'rock', 'apple_music_url': '', 'picker': 'DG'}
+        for i in range(n)
+    ]
+    when = datetime.date(2025, 1, 5)
+    return lambda: [build_row_from_header(header_map, '', when, info, 1) for info in infos]
+
+
+def bench_parse_sheet_date(n):
+    from add_album import parse_sheet_date
+    samples = ['1/5/2025', '12/28/2024', '2025-01-05', '2024-12-28T00:00:00', '', 'TBD']
+    values = [samples[i % len(samples)] for i in range(n)]
+    return lambda: [parse_sheet_date(v) for v in values]
+
+
+def bench_spotify_url_validation(n):
+    from validation import extract_spotify_album_id, is_valid_spotify_album_url
+    urls = []
+    for i in range(n):
+        album_id = synthetic_album_id(i)
+        if i % 4 == 0:
+            urls.append(f'https://open.spotify.com/album/{album_id}?si=abcdef123')
+        elif i % 4 == 1:
+            urls.append(f'https://open.spotify.com/track/{album_id}')
+        else:
+            urls.append(f'https://open.spotify.com/album/{album_id}')
+    return lambda: [(is_valid_spotify_album_url(u), extract_spotify_album_id(u)) for u in urls]
+
+
+def bench_get_existing_album_ids(n):
+    from add_album import get_existing_album_ids
+    sheet = make_album_sheet(n)
+    return lambda: get_existing_album_ids(sheet)
+
+
+def bench_trigger_pattern(n):
+    from telegram_bot import _TRIGGER_PATTERN
+    messages = []
+    for i in range(n):
+        if i % 10 == 0:
+            messages.append(
+                f'@aotw https://open.spotify.com/album/{synthetic_album_id(i)} '
+                f'https://music.apple.com/us/album/x/{i} DG'
+            )
+        else:
+            messages.append(f'message {i}: has anyone heard the new record? ' * 3)
+    return lambda: [_TRIGGER_PATTERN.search(m) for m in messages]
+
+
+BENCHMARKS = {
+    'normalize_album_rows': bench_normalize_album_rows,
+    'export_sheet_to_json': bench_export_sheet_to_json,
+    'build_row_from_header': bench_build_row_from_header,
+    'parse_sheet_date': bench_parse_sheet_date,
+    'spotify_url_validation': bench_spotify_url_validation,
+    'get_existing_album_ids': bench_get_existing_album_ids,
+    'trigger_pattern': bench_trigger_pattern,
+}
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def time_it(fn, repeat):
+    fn()  # warm-up (imports, regex compilation, caches)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(args):
+    names = args.only or list(BENCHMARKS)
+    results = {}
+    for name in names:
+        for size in args.sizes:
+            fn = BENCHMARKS[name](size)
+            timings = time_it(fn, args.repeat)
+            median = statistics.median(timings)
+            key = f'{name}[{size}]'
+            results[key] = {
+                'benchmark': name,
+                'size': size,
+                'min_s': round(min(timings), 6),
+                'median_s': round(median, 6),
+                'ns_per_item': round(median / size * 1e9, 1),
+            }
+            print(f'{key:<40} median={median * 1000:9.2f}ms  {results[key]["ns_per_item"]:>10.1f} ns/item')
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of (key, current ns/item, baseline ns/item) regressions."""
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            # Fall back to the same benchmark at any recorded size
+            same = [v for v in baseline.values() if v['benchmark'] == current['benchmark']]
+            reference = min(same, key=lambda v: abs(v['size'] - current['size'])) if same else None
+        if reference is None:
+            continue
+        if current['ns_per_item'] > reference['ns_per_item'] * (1 + tolerance):
+            regressions.append((key, current['ns_per_item'], reference['ns_per_item']))
+    return regressions
+
+
+def main():
+    args = get_args()
+    from logging_config import setup_logging
+    setup_logging().setLevel(logging.WARNING)  # keep per-export INFO lines out of the timings
+
+    results = run(args)
+    payload = {
+        'meta': {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        print(f'Results written to {args.json_path}')
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        print(f'Baseline updated: {args.baseline}')
+
+    if args.compare:
+        if not os.path.isfile(args.baseline):
+            print(f'No baseline at {args.baseline}; run with --update-baseline first.')
+            return 1
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for key, current, reference in regressions:
+            print(f'REGRESSION {key}: {current:.1f} ns/item vs baseline {reference:.1f} '
+                  f'(+{(current / reference - 1) * 100:.0f}%)')
+        if regressions:
+            return 1
+        print(f'No regressions beyond {args.tolerance:.0%} of baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
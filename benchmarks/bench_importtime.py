@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Import-time benchmark for each entry point, with a regression budget.
+
+run.sh spawns a fresh interpreter per album and Railway restarts cold, so
+module import cost is paid on every CLI run and every deploy. Each entry
+point is imported in a new `python -X importtime` process and its
+cumulative import time is read from the report.
+
+Budgets live in importtime_budget.json:
+    budget_ms        max median cumulative import time per entry point
+    forbidden        modules that must not be loaded by importing it
+                     (heavy clients that should only load on first use)
+
+Usage:
+    python benchmarks/bench_importtime.py                 # report + check budget
+    python benchmarks/bench_importtime.py --repeat 10
+    python benchmarks/bench_importtime.py --json out.json
+    python benchmarks/bench_importtime.py --top 15        # slowest imports per entry point
+
+Entry points whose dependencies are not installed (e.g. PyQt5 for the GUI)
+are reported as skipped. Exit status is 1 when any budget is exceeded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SRC_DIR = os.path.join(REPO_ROOT, 'src')
+DEFAULT_BUDGET = os.path.join(os.path.dirname(__file__), 'importtime_budget.json')
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Entry-point import-time benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per entry point')
+    parser.add_argument('--only', nargs='+', help='measure only these entry points')
+    parser.add_argument('--budget', default=DEFAULT_BUDGET)
+    parser.add_argument('--json', dest='json_path', help='write results to this file')
+    parser.add_argument('--top', type=int, default=0, help='show the N slowest imports per entry point')
+    return parser.parse_args()
+
+
+def parse_importtime(stderr: str):
+    """Parse -X importtime output into [(module, self_us, cumulative_us)] in load order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        head, cumulative, name = line.split('|')
+        rows.append((name.strip(), int(head.split(':', 1)[1]), int(cumulative)))
+    return rows
+
+
+def measure_once(module: str):
+    """Import `module` in a fresh interpreter; returns (cumulative_ms, rows) or None if it fails."""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return None
+    rows = parse_importtime(proc.stderr)
+    total = next(cum for name, _, cum in reversed(rows) if name == module)
+    return total / 1000, rows
+
+
+def loaded_modules(module: str):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    proc = subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print("\\n".join(sys.modules))'],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return set(proc.stdout.split())
+
+
+def run(args, budget):
+    entry_points = args.only or list(budget['entry_points'])
+    results = {}
+    for module in entry_points:
+        runs = [measure_once(module) for _ in range(args.repeat)]
+        if any(r is None for r in runs):
+            print(f'{module:<16} skipped (import failed — dependencies missing?)')
+            results[module] = {'skipped': True}
+            continue
+        times = [r[0] for r in runs]
+        spec = budget['entry_points'].get(module, {})
+        loaded = loaded_modules(module)
+        forbidden = sorted(m for m in spec.get('forbidden', []) if m in loaded)
+        median = statistics.median(times)
+        limit = spec.get('budget_ms')
+        over = limit is not None and median > limit
+        results[module] = {
+            'median_ms': round(median, 1),
+            'min_ms': round(min(times), 1),
+            'budget_ms': limit,
+            'over_budget': over,
+            'forbidden_loaded': forbidden,
+        }
+        status = 'OVER BUDGET' if over else 'ok'
+        if forbidden:
+            status = f'loads {", ".join(forbidden)}'
+        print(f'{module:<16} median {median:8.1f} ms  min {min(times):8.1f} ms  '
+              f'budget {limit if limit is not None else "-":>6} ms  {status}')
+        if args.top:
+            rows = sorted(runs[0][1], key=lambda r: r[1], reverse=True)[:args.top]
+            for name, self_us, _ in rows:
+                print(f'    {self_us / 1000:8.1f} ms  {name}')
+    return results
+
+
+def main():
+    args = get_args()
+    with open(args.budget, 'r', encoding='utf-8') as f:
+        budget = json.load(f)
+
+    results = run(args, budget)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'results': results}, f, indent=2)
+
+    failed = [m for m, r in results.items() if r.get('over_budget') or r.get('forbidden_loaded')]
+    if failed:
+        print(f'\nImport-time budget exceeded: {", ".join(failed)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""AlbumRecord vs the dict path it replaced: memory and speed at 100k records.
+
+Compares, per record:
+    memory        100k data.json dicts vs 100k AlbumRecords (tracemalloc)
+    from_sheet    sheet row → album (old normalize_album_rows body vs AlbumRecord.sheet_reader)
+    to_json       album → data.json entry (the dict itself vs AlbumRecord.to_json)
+    to_sheet_row  album → sheet row (old build_row_from_header vs AlbumRecord.to_sheet_row)
+
+The dict-path functions below are the pre-AlbumRecord implementations, kept
+here only as the comparison baseline.
+
+Usage:
+    python benchmarks/bench_records.py                  # 100k records
+    python benchmarks/bench_records.py --size 1000000 --json records.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'tests'))
+
+from add_album import get_header_row_and_map  # noqa: E402
+from album_record import AlbumRecord, format_sheet_date  # noqa: E402
+from fakes import make_album_sheet  # noqa: E402
+from validation import extract_spotify_album_id  # noqa: E402
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='AlbumRecord vs dict memory and speed')
+    parser.add_argument('--size', type=int, default=100_000, help='records')
+    parser.add_argument('--repeat', type=int, default=3, help='timed repetitions per case')
+    parser.add_argument('--json', dest='json_path', help='write results to this file')
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# The dict path, as it was before AlbumRecord
+# ---------------------------------------------------------------------------
+
+def _parse_sheet_date_strptime(value):
+    if not value:
+        return None
+    value = str(value).strip()
+    for fmt in ('%m/%d/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    try:
+        return datetime.datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def dict_from_sheet_row(row, header_map):
+    row_dict = {}
+    for col_name, col_idx in header_map.items():
+        row_dict[col_name] = row[col_idx].strip() if col_idx < len(row) else ''
+    spotify_url = row_dict.get('spotify_album_url', '')
+    album_id = extract_spotify_album_id(spotify_url)
+    if not album_id:
+        spotify_url = ''
+    try:
+        pick_number = int(float(row_dict.get('pick', '') or 0))
+    except (ValueError, TypeError):
+        pick_number = 0
+    parsed_date = _parse_sheet_date_strptime(row_dict.get('date', ''))
+    return {
+        'spotify_album_id': album_id,
+        'pick_number':      pick_number,
+        'picked_at':        parsed_date.isoformat() if parsed_date else '',
+        'artist':           row_dict.get('artist', ''),
+        'album':            row_dict.get('album', ''),
+        'year':             row_dict.get('year', ''),
+        'label':            row_dict.get('label', ''),
+        'genres':           row_dict.get('genres', ''),
+        'total_tracks':     row_dict.get('total_tracks', ''),
+        'artwork_url':      row_dict.get('artwork_url', ''),
+        'spotify_url':      spotify_url,
+        'apple_music_url':  row_dict.get('apple_music_url', ''),
+        'alt_url':          row_dict.get('alt_url', ''),
+        'picker':           row_dict.get('picker', ''),
+    }
+
+
+def dict_to_sheet_row(header_map, pick_value, date_value, album_info, header_row=None):
+    header_len = max(header_map.values()) + 1 if header_map else 0
+    row = [''] * header_len
+
+    def set_if_present(header_name, value):
+        idx = header_map.get(header_name)
+        if idx is not None:
+            row[idx] = value
+
+    set_if_present('pick', f'=ROW()-{header_row}' if header_row is not None else str(pick_value))
+    set_if_present('date', format_sheet_date(date_value))
+    set_if_present('artist', album_info.get('Artist', ''))
+    set_if_present('album', album_info.get('Album', ''))
+    set_if_present('year', str(album_info.get('Year', '')))
+    set_if_present('spotify_album_id', album_info.get('spotify_album_id', ''))
+    set_if_present('spotify_album_url', album_info.get('spotify_album_url', ''))
+    set_if_present('artwork_url', album_info.get('artwork_url', ''))
+    set_if_present('label', album_info.get('Label', ''))
+    set_if_present('total_tracks', str(album_info.get('Total Tracks', '')))
+    set_if_present('genres', album_info.get('Genres', ''))
+    set_if_present('apple_music_url', album_info.get('apple_music_url', ''))
+    set_if_present('picker', album_info.get('picker', ''))
+    return row
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def time_it(fn, repeat):
+    fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current
+
+
+def main():
+    args = get_args()
+    n = args.size
+    sheet = make_album_sheet(n)
+    header_row, header_map = get_header_row_and_map(sheet)
+    rows = sheet.get_all_values()[header_row:]
+    read = AlbumRecord.sheet_reader(header_map)
+
+    dicts = [dict_from_sheet_row(row, header_map) for row in rows]
+    records = [read(row) for row in rows]
+    infos = [r.to_album_info() for r in records]
+    when = datetime.date(2025, 1, 5)
+
+    cases = {
+        'from_sheet': (lambda: [dict_from_sheet_row(row, header_map) for row in rows],
+                       lambda: [read(row) for row in rows]),
+        'to_json': (lambda: [dict(d) for d in dicts],
+                    lambda: [r.to_json() for r in records]),
+        'to_sheet_row': (lambda: [dict_to_sheet_row(header_map, '', when, info, 1) for info in infos],
+                         lambda: [r.to_sheet_row(header_map, 1) for r in records]),
+    }
+
+    results = {'size': n}
+    dict_bytes = measure_memory(lambda: [dict_from_sheet_row(row, header_map) for row in rows])
+    record_bytes = measure_memory(lambda: [read(row) for row in rows])
+    results['memory'] = {'dict_bytes_per_record': round(dict_bytes / n, 1),
+                         'record_bytes_per_record': round(record_bytes / n, 1)}
+    print(f'{"memory":<14} dict {dict_bytes / n:8.1f} B/record   record {record_bytes / n:8.1f} B/record '
+          f'({record_bytes / dict_bytes:.0%})')
+
+    for name, (dict_path, record_path) in cases.items():
+        dict_s, record_s = time_it(dict_path, args.repeat), time_it(record_path, args.repeat)
+        results[name] = {'dict_ns_per_record': round(dict_s / n * 1e9, 1),
+                         'record_ns_per_record': round(record_s / n * 1e9, 1)}
+        print(f'{name:<14} dict {dict_s / n * 1e9:8.1f} ns/record  record {record_s / n * 1e9:8.1f} ns/record '
+              f'({dict_s / record_s:.2f}x)')
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {args.json_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
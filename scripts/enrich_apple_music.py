@@ -2,9 +2,10 @@
 One-time script to enrich data.json and Google Sheet with Apple Music URLs via the Odesli API.
 
 Usage:
-    mamba run -n spotify-env python scripts/enrich_apple_music.py [path/to/data.json]
+    mamba run -n spotify-env python scripts/enrich_apple_music.py [path/to/data.json] [--profile]
 
 Defaults to website/public/data.json if no path given.
+--profile (or AOTW_PROFILE=1) writes cProfile/tracemalloc reports (see src/profiling.py).
 - Saves progress to data.json every 25 albums
 - Writes all Apple Music URLs to the Google Sheet in a single batch update at the end
 - Albums already enriched are skipped for fetching but still queued for the sheet update
@@ -20,6 +21,8 @@ import requests
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 from add_album import get_google_sheet, get_header_row_and_map
+from profiling import profile_from_argv, profiled
+from sheet_cache import get_sheet_replica
 
 ODESLI_API = 'https://api.song.link/v1-alpha.1/links'
 RATE_LIMIT_DELAY = 0.5  # seconds between requests — safe for free tier
@@ -40,6 +43,7 @@ def fetch_apple_music_url(spotify_url: str) -> str | None:
         return None
 
 
+@profiled('enrich_apple_music')
 def main():
     path = sys.argv[1] if len(sys.argv) > 1 else 'website/public/data.json'
 
@@ -59,12 +63,17 @@ def main():
     url_col_idx = header_map.get('spotify_album_url')
 
     # Build map: spotify_url → 1-based sheet row number
-    all_values = worksheet.get_all_values()
-    url_to_sheet_row = {}
-    for i, row in enumerate(all_values[header_row:]):
-        sheet_row = header_row + 1 + i
-        if url_col_idx < len(row) and row[url_col_idx].strip():
-            url_to_sheet_row[row[url_col_idx].strip()] = sheet_row
+    replica = get_sheet_replica(worksheet)
+    if replica is not None:
+        replica.sync(worksheet)
+        url_to_sheet_row = replica.row_numbers_by_url()
+    else:
+        all_values = worksheet.get_all_values()
+        url_to_sheet_row = {}
+        for i, row in enumerate(all_values[header_row:]):
+            sheet_row = header_row + 1 + i
+            if url_col_idx < len(row) and row[url_col_idx].strip():
+                url_to_sheet_row[row[url_col_idx].strip()] = sheet_row
 
     total = len(albums)
     already_done = sum(1 for a in albums if 'apple_music_url' in a)
@@ -123,6 +132,8 @@ def main():
             for row, url in sheet_updates
         ]
         worksheet.batch_update(batch)
+        if replica is not None:
+            replica.invalidate()
         print('Sheet updated ✓')
     else:
         print('No sheet updates needed.')
@@ -148,4 +159,5 @@ def _copy_to_website(src: str) -> None:
 
 
 if __name__ == '__main__':
+    profile_from_argv(sys.argv)
     main()
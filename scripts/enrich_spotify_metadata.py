@@ -3,9 +3,10 @@ One-time script to enrich data.json and Google Sheet with additional Spotify met
   label, genres (album → artist fallback), total_tracks
 
 Usage:
-    mamba run -n spotify-env python scripts/enrich_spotify_metadata.py [path/to/data.json]
+    mamba run -n spotify-env python scripts/enrich_spotify_metadata.py [path/to/data.json] [--profile]
 
 Defaults to website/public/data.json if no path given.
+--profile (or AOTW_PROFILE=1) writes cProfile/tracemalloc reports (see src/profiling.py).
 - Saves progress to data.json every 25 albums
 - Writes all new fields to the Google Sheet in a single batch update at the end
 - Albums already enriched (all three fields present) are skipped
@@ -20,6 +21,8 @@ import gspread.utils
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 from add_album import get_google_sheet, get_header_row_and_map, get_spotify_api
+from profiling import profile_from_argv, profiled
+from sheet_cache import get_sheet_replica
 
 RATE_LIMIT_DELAY = 0.2  # Spotify rate limits are generous; 0.2s is safe
 
@@ -51,6 +54,7 @@ def fetch_metadata(sp, spotify_album_id: str) -> dict:
         return {}
 
 
+@profiled('enrich_spotify_metadata')
 def main():
     path = sys.argv[1] if len(sys.argv) > 1 else 'website/public/data.json'
 
@@ -73,12 +77,17 @@ def main():
     url_col_idx = header_map.get('spotify_album_url')
 
     # Build map: spotify_url → 1-based sheet row number
-    all_values = worksheet.get_all_values()
-    url_to_sheet_row = {}
-    for i, row in enumerate(all_values[header_row:]):
-        sheet_row = header_row + 1 + i
-        if url_col_idx < len(row) and row[url_col_idx].strip():
-            url_to_sheet_row[row[url_col_idx].strip()] = sheet_row
+    replica = get_sheet_replica(worksheet)
+    if replica is not None:
+        replica.sync(worksheet)
+        url_to_sheet_row = replica.row_numbers_by_url()
+    else:
+        all_values = worksheet.get_all_values()
+        url_to_sheet_row = {}
+        for i, row in enumerate(all_values[header_row:]):
+            sheet_row = header_row + 1 + i
+            if url_col_idx < len(row) and row[url_col_idx].strip():
+                url_to_sheet_row[row[url_col_idx].strip()] = sheet_row
 
     ENRICHED_FIELDS = ('label', 'genres', 'total_tracks')
     total = len(albums)
@@ -144,6 +153,8 @@ def main():
             for row, col, val in sheet_updates
         ]
         worksheet.batch_update(batch)
+        if replica is not None:
+            replica.invalidate()
         print('Sheet updated ✓')
     else:
         print('No sheet updates needed.')
@@ -169,4 +180,5 @@ def _copy_to_website(src: str) -> None:
 
 
 if __name__ == '__main__':
+    profile_from_argv(sys.argv)
     main()
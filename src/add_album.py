@@ -1,25 +1,101 @@
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from spotipy.exceptions import SpotifyException
 import json
 import argparse
-from datetime import datetime, timedelta
+import dataclasses
+import hashlib
+from datetime import timedelta
 from typing import Optional
 import os
 import re
-import gspread
-from gspread.exceptions import GSpreadException
+import time
+import weakref
+from album_record import AlbumRecord, parse_sheet_date
+from append_lease import LeaseTimeout, append_lease, ensure_held
+from lazy_imports import lazy_globals
 from validation import extract_spotify_album_id
 from logging_config import setup_logging
+from metrics import CACHE_HITS, CACHE_MISSES, stage_timer
+from profiling import add_profile_args, apply_profile_args, profile_run
 
 logger = setup_logging()
-try:
-    from gspread.exceptions import CellNotFound
-except ImportError:  # older gspread
+
+
+def _load_cell_not_found():
     try:
-        from gspread import CellNotFound
-    except ImportError:
-        CellNotFound = Exception
+        from gspread.exceptions import CellNotFound
+    except ImportError:  # older gspread
+        try:
+            from gspread import CellNotFound
+        except ImportError:
+            CellNotFound = Exception
+    return CellNotFound
+
+
+# spotipy and gspread (plus their HTTP/auth stacks) load on first use, not at import
+_lazy, __getattr__ = lazy_globals(globals(), {
+    'spotipy': ('spotipy', None),
+    'SpotifyClientCredentials': ('spotipy.oauth2', 'SpotifyClientCredentials'),
+    'SpotifyException': ('spotipy.exceptions', 'SpotifyException'),
+    'gspread': ('gspread', None),
+    'GSpreadException': ('gspread.exceptions', 'GSpreadException'),
+    'CellNotFound': _load_cell_not_found,
+    'Cell': ('gspread.cell', 'Cell'),
+    'rowcol_to_a1': ('gspread.utils', 'rowcol_to_a1'),
+})
+
+
+# Long-running processes (the Telegram bot) reuse authenticated clients and the
+# sheet's header layout between messages; see warmup.py. Off by default so every
+# CLI run and test starts from fresh state.
+_client_cache = {'enabled': False, 'header_ttl': 300.0}
+_clients = {}
+_header_cache = weakref.WeakKeyDictionary()  # worksheet → (expires_at, pick_cell, date_cell, header_row, header_map)
+# worksheet → {'row', 'pick', 'date', 'tail'}: last data row, last pick/date and the
+# (pick, date) cells of that row as last read (None until confirmed by a read)
+_tail_cache = weakref.WeakKeyDictionary()
+TAIL_WINDOW = 20  # rows read at and below the cached tail to validate it
+
+
+def enable_client_cache(header_ttl: float = 300.0):
+    """Keep Spotify/Sheets clients and header lookups for the life of the process."""
+    _client_cache['enabled'] = True
+    _client_cache['header_ttl'] = header_ttl
+
+
+def clear_client_cache():
+    _clients.clear()
+    _header_cache.clear()
+    _tail_cache.clear()
+
+
+def _cached_header(worksheet):
+    if not _client_cache['enabled']:
+        return None
+    entry = _header_cache.get(worksheet)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry
+
+
+def header_layouts():
+    """Yield (worksheet, layout) for every live header-cache entry (see cache_snapshot.py)."""
+    for worksheet, (expires_at, pick_cell, date_cell, header_row, header_map) in list(_header_cache.items()):
+        yield worksheet, {
+            'header_row': header_row,
+            'header_map': dict(header_map),
+            'pick': [pick_cell.row, pick_cell.col],
+            'date': [date_cell.row, date_cell.col],
+        }
+
+
+def prime_header_cache(worksheet, layout):
+    """Seed the header cache from a header_layouts() entry that the caller has validated."""
+    if not _client_cache['enabled']:
+        return
+    Cell = _lazy('Cell')
+    pick_cell = Cell(layout['pick'][0], layout['pick'][1], 'Pick')
+    date_cell = Cell(layout['date'][0], layout['date'][1], 'Date')
+    expires_at = time.monotonic() + _client_cache['header_ttl']
+    _header_cache[worksheet] = (expires_at, pick_cell, date_cell, layout['header_row'], dict(layout['header_map']))
 
 
 def get_user_args():
@@ -43,6 +119,7 @@ def get_user_args():
                         type=str,
                         help='Service account JSON file (or set GOOGLE_SERVICE_ACCOUNT_FILE)',
                         required=False)
+    add_profile_args(parser)
     return parser.parse_args()
 
 # use spotify api to extract album info from given url
@@ -50,57 +127,95 @@ def get_album_info(url = '', spot_api = None):
     
     try:
 
-        raw_info = spot_api.album(url)
+        with stage_timer('spotify_album'):
+            raw_info = spot_api.album(url)
 
-    except SpotifyException as e:
+    except _lazy('SpotifyException') as e:
 
         if e.http_status == 400:
             logger.error('Spotify API error fetching album', extra={'url': url, 'http_status': e.http_status})
             return None
 
-
-    album_id = raw_info.get('id', '')
-    artist = raw_info['artists'][0]['name']
-    album = raw_info['name']
-    release_date = raw_info['release_date']
-    release_date_precision = raw_info['release_date_precision']
-
-    if release_date_precision == 'day':
-
-        year = datetime.strptime(release_date, '%Y-%m-%d').year
-    else:
-
-        year = release_date
-    artwork_url = raw_info['images'][1]['url']
-
-    label = raw_info.get('label', '')
-    total_tracks = raw_info.get('total_tracks', '')
-
     # Try album genres first; fall back to artist genres (more reliably populated)
-    genres = raw_info.get('genres', [])
-    if not genres:
+    artist_genres = []
+    if not raw_info.get('genres', []):
         try:
             artist_id = raw_info['artists'][0].get('id', '')
             if artist_id:
-                artist_info = spot_api.artist(artist_id)
-                genres = artist_info.get('genres', [])
+                with stage_timer('spotify_artist'):
+                    artist_info = spot_api.artist(artist_id)
+                artist_genres = artist_info.get('genres', [])
         except Exception:
-            genres = []
-    genres_str = ', '.join(genres)
+            artist_genres = []
+
+    return parse_album_info(raw_info, url, artist_genres)
+
+def parse_album_info(raw_info, url, artist_genres = ()):
+    """Map a Spotify album object to the sheet's album_info dict."""
+    return AlbumRecord.from_spotify(raw_info, url, artist_genres).to_album_info()
+
+SPOTIFY_ALBUMS_BATCH = 20   # GET /albums accepts at most 20 IDs
+SPOTIFY_ARTISTS_BATCH = 50  # GET /artists accepts at most 50 IDs
+
+def get_albums_info(album_ids, spot_api = None, urls = None, max_workers = 4, cache = None):
+    """Bulk get_album_info: album_id → album_info for every ID Spotify knows.
 
-    to_return = {"spotify_album_id": album_id,
-                 "Artist": artist,
-                 "Album": album,
-                 "Year": year,
-                 "spotify_album_url": url,
-                 "artwork_url": artwork_url,
-                 "Label": label,
-                 "Total Tracks": total_tracks,
-                 "Genres": genres_str}
+    Uses the several-albums and several-artists endpoints (20 and 50 IDs per
+    request) instead of one or two requests per album, running at most
+    max_workers requests at once. urls maps album_id → the URL to record
+    (default: the canonical open.spotify.com URL). Unknown IDs are omitted.
 
-    return to_return
+    cache, a spotify_cache.SpotifyCache, answers IDs it holds and stores the
+    raw objects fetched for the rest.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    album_ids = list(dict.fromkeys(album_ids))
+    urls = urls or {}
+
+    def chunks(ids, size):
+        return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+    def fetch_albums(ids):
+        with stage_timer('spotify_album'):
+            return spot_api.albums(ids)['albums']
+
+    def fetch_artists(ids):
+        with stage_timer('spotify_artist'):
+            return spot_api.artists(ids)['artists']
+
+    def lookup(kind, ids, fetch, batch):
+        found = cache.get_many(kind, ids) if cache is not None else {}
+        missing = [i for i in ids if i not in found]
+        fetched = [obj for page in pool.map(fetch, chunks(missing, batch)) for obj in page if obj]
+        if cache is not None:
+            cache.put_many(kind, fetched)
+        found.update((obj['id'], obj) for obj in fetched)
+        return found
+
+    with ThreadPoolExecutor(max_workers = max(1, max_workers)) as pool:
+        raw_by_id = lookup('album', album_ids, fetch_albums, SPOTIFY_ALBUMS_BATCH)
+        raw_albums = [raw_by_id[album_id] for album_id in album_ids if album_id in raw_by_id]
+        # Artist genres only for albums without their own (as get_album_info does)
+        artist_ids = list(dict.fromkeys(
+            raw['artists'][0]['id'] for raw in raw_albums
+            if not raw.get('genres') and raw.get('artists') and raw['artists'][0].get('id')
+        ))
+        artists = lookup('artist', artist_ids, fetch_artists, SPOTIFY_ARTISTS_BATCH)
+
+    infos = {}
+    for raw in raw_albums:
+        album_id = raw.get('id', '')
+        artist_id = raw['artists'][0].get('id', '') if raw.get('artists') else ''
+        url = urls.get(album_id) or f'https://open.spotify.com/album/{album_id}'
+        genres = artists[artist_id].get('genres', []) if artist_id in artists else ()
+        infos[album_id] = parse_album_info(raw, url, genres)
+    return infos
 
 def get_spotify_api():
+    if _client_cache['enabled'] and 'spotify' in _clients:
+        return _clients['spotify']
+
     # Prefer env vars (used on Railway); fall back to local credentials file for dev
     CLIENT_ID = os.getenv('SPOTIFY_CLIENT_ID')
     CLIENT_SECRET = os.getenv('SPOTIFY_CLIENT_SECRET')
@@ -114,8 +229,11 @@ def get_spotify_api():
         CLIENT_ID = creds.get('CLIENT_ID')
         CLIENT_SECRET = creds.get('CLIENT_SECRET')
 
-    auth_manager = SpotifyClientCredentials(client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
-    return spotipy.Spotify(auth_manager=auth_manager)
+    auth_manager = _lazy('SpotifyClientCredentials')(client_id=CLIENT_ID, client_secret=CLIENT_SECRET)
+    sp = _lazy('spotipy').Spotify(auth_manager=auth_manager)
+    if _client_cache['enabled']:
+        _clients['spotify'] = sp
+    return sp
 
 def get_default_creds_path():
     repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -123,140 +241,196 @@ def get_default_creds_path():
     candidate = os.path.join(repo_root, default_name)
     return candidate if os.path.isfile(candidate) else None
 
-def get_google_sheet(sheet_id=None, sheet_tab=None, creds_path=None):
+def _authorize_gspread(creds_path=None):
+    """gspread client for one service account; pooled across sheets when the client cache is on."""
     import tempfile
 
-    sheet_id  = sheet_id  or os.getenv('GOOGLE_SHEET_ID') or '1h1uDCZPqJovFfUKPzfPgUwUOHjFdCXHWVhUE6VvFA_s'
-    sheet_tab = sheet_tab or os.getenv('GOOGLE_SHEET_TAB', 'Sheet1')
-
-    if not sheet_id:
-        raise ValueError('Missing Google Sheet ID. Set GOOGLE_SHEET_ID or pass --sheet-id.')
-
-    # GOOGLE_SERVICE_ACCOUNT_JSON can be either:
+    # Credentials can be either:
     #   - JSON content as a string (Railway stores large secrets this way)
     #   - A file path (local dev or CI)
-    # GOOGLE_SERVICE_ACCOUNT_FILE is kept for backward compatibility.
-    service_account_json = os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')
+    # An explicit creds_path (CLI flag, tenant config) wins over
+    # GOOGLE_SERVICE_ACCOUNT_JSON; GOOGLE_SERVICE_ACCOUNT_FILE is kept for
+    # backward compatibility.
+    source = (
+        creds_path
+        or os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')
+        or os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
+        or get_default_creds_path()
+    )
+    if not source:
+        raise ValueError(
+            'Missing service account credentials. '
+            'Set GOOGLE_SERVICE_ACCOUNT_JSON or GOOGLE_SERVICE_ACCOUNT_FILE.'
+        )
 
-    if service_account_json and service_account_json.strip().startswith('{'):
+    cache_key = ('gspread', hashlib.sha256(source.encode('utf-8')).hexdigest())
+    if _client_cache['enabled'] and cache_key in _clients:
+        return _clients[cache_key]
+
+    if source.strip().startswith('{'):
         # It's raw JSON — write to a temp file so gspread can read it
         with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False, encoding='utf-8') as f:
-            f.write(service_account_json)
+            f.write(source)
             tmp_path = f.name
         try:
-            gc = gspread.service_account(filename=tmp_path)
+            gc = _lazy('gspread').service_account(filename=tmp_path)
         finally:
             os.unlink(tmp_path)  # Always clean up, even if gspread raises
     else:
-        # File path: prefer explicit arg, then env vars, then default on-disk file
-        resolved_path = (
-            creds_path
-            or service_account_json
-            or os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
-            or get_default_creds_path()
-        )
-        if not resolved_path:
-            raise ValueError(
-                'Missing service account credentials. '
-                'Set GOOGLE_SERVICE_ACCOUNT_JSON or GOOGLE_SERVICE_ACCOUNT_FILE.'
-            )
-        gc = gspread.service_account(filename=resolved_path)
+        gc = _lazy('gspread').service_account(filename=source)
+
+    if _client_cache['enabled']:
+        _clients[cache_key] = gc
+    return gc
+
+def get_google_sheet(sheet_id=None, sheet_tab=None, creds_path=None):
+    sheet_id  = sheet_id  or os.getenv('GOOGLE_SHEET_ID') or '1h1uDCZPqJovFfUKPzfPgUwUOHjFdCXHWVhUE6VvFA_s'
+    sheet_tab = sheet_tab or os.getenv('GOOGLE_SHEET_TAB', 'Sheet1')
+
+    if not sheet_id:
+        raise ValueError('Missing Google Sheet ID. Set GOOGLE_SHEET_ID or pass --sheet-id.')
 
+    cache_key = ('sheet', sheet_id, sheet_tab)
+    if _client_cache['enabled'] and cache_key in _clients:
+        return _clients[cache_key]
+
+    gc = _authorize_gspread(creds_path)
     sheet = gc.open_by_key(sheet_id)
     worksheet = sheet.worksheet(sheet_tab)
+    if _client_cache['enabled']:
+        _clients[cache_key] = worksheet
     return worksheet
 
-def parse_sheet_date(value):
-    if not value:
-        return None
-    value = str(value).strip()
-    for fmt in ('%m/%d/%Y', '%Y-%m-%d'):
-        try:
-            return datetime.strptime(value, fmt).date()
-        except ValueError:
-            continue
-    try:
-        return datetime.fromisoformat(value).date()
-    except ValueError:
-        return None
-
-def format_sheet_date(value):
-    if not value:
-        return ''
-    try:
-        return value.strftime('%-m/%-d/%Y')
-    except ValueError:
-        return value.strftime('%m/%d/%Y')
-
 def find_header_cells(worksheet):
+    cached = _cached_header(worksheet)
+    if cached is not None:
+        return cached[1], cached[2]
     try:
         pick_cell = worksheet.find(re.compile(r'^Pick$', re.I))
         date_cell = worksheet.find(re.compile(r'^Date$', re.I))
-    except CellNotFound:
+    except _lazy('CellNotFound'):
         raise ValueError('Missing required columns: Pick, Date.')
     return pick_cell, date_cell
 
 def get_header_row_and_map(worksheet):
+    cached = _cached_header(worksheet)
+    if cached is not None:
+        return cached[3], dict(cached[4])
     pick_cell, date_cell = find_header_cells(worksheet)
     header_row = max(pick_cell.row, date_cell.row)
     header_values = worksheet.row_values(header_row)
     header_map = {str(name).strip().lower(): idx for idx, name in enumerate(header_values)}
+    if _client_cache['enabled']:
+        expires_at = time.monotonic() + _client_cache['header_ttl']
+        _header_cache[worksheet] = (expires_at, pick_cell, date_cell, header_row, dict(header_map))
     return header_row, header_map
 
-def get_next_pick_number_and_date(worksheet, header_row, pick_col, date_col):
-    pick_values = worksheet.col_values(pick_col)
-    date_values = worksheet.col_values(date_col)
-
-    last_pick = None
-    last_date = None
+def _column_letter(col):
+    return _lazy('rowcol_to_a1')(1, col)[:-1]
 
-    for value in pick_values[header_row:]:
-        if str(value).strip():
+def _scan_tail(values, first_row, tail):
+    """Fold (pick, date) cell rows starting at sheet row first_row into a tail pointer."""
+    for offset, (pick_cells, date_cells) in enumerate(values):
+        pick_value = pick_cells[0] if pick_cells else ''
+        date_value = date_cells[0] if date_cells else ''
+        if not (str(pick_value).strip() or str(date_value).strip()):
+            continue
+        tail['row'] = first_row + offset
+        tail['tail'] = (str(pick_value), str(date_value))
+        if str(pick_value).strip():
             try:
-                last_pick = int(float(value))
+                tail['pick'] = int(float(pick_value))
             except ValueError:
                 pass
-
-    for value in date_values[header_row:]:
-        if str(value).strip():
-            parsed = parse_sheet_date(value)
-            if parsed:
-                last_date = parsed
+        parsed = parse_sheet_date(date_value) if str(date_value).strip() else None
+        if parsed:
+            tail['date'] = parsed
+    return tail
+
+def _read_columns(worksheet, pick_col, date_col, first_row, last_row=None):
+    """One batch_get of the Pick and Date columns from first_row (to last_row); rows of (pick, date) cells."""
+    pick, date = _column_letter(pick_col), _column_letter(date_col)
+    end = last_row if last_row is not None else ''
+    pick_values, date_values = worksheet.batch_get([
+        f'{pick}{first_row}:{pick}{end}',
+        f'{date}{first_row}:{date}{end}',
+    ])
+    length = max(len(pick_values), len(date_values))
+    pick_values = list(pick_values) + [[]] * (length - len(pick_values))
+    date_values = list(date_values) + [[]] * (length - len(date_values))
+    return list(zip(pick_values, date_values))
+
+def _tail_pointer(worksheet, header_row, pick_col, date_col):
+    """Last pick/date of the sheet, via the cached tail pointer when it is still valid.
+
+    A cached pointer is checked with one small read of TAIL_WINDOW rows at
+    the tail: the tail row must be unchanged, and rows added below it (by
+    someone else) are folded in. Otherwise both columns are read once.
+    """
+    tail = _tail_cache.get(worksheet) if _client_cache['enabled'] else None
+    if tail is not None and tail['row'] > header_row:
+        window = _read_columns(worksheet, pick_col, date_col, tail['row'], tail['row'] + TAIL_WINDOW)
+        first = window[0] if window else ([], [])
+        first_cells = (first[0][0] if first[0] else '', first[1][0] if first[1] else '')
+        tail_ok = any(str(v).strip() for v in first_cells) and tail['tail'] in (None, first_cells)
+        if tail_ok and len(window) <= TAIL_WINDOW:
+            CACHE_HITS.inc(cache='sheet_tail')
+            return _scan_tail(window, tail['row'], dict(tail))
+        # tail row edited/removed, or more new rows than the window holds
+    CACHE_MISSES.inc(cache='sheet_tail')
+    values = _read_columns(worksheet, pick_col, date_col, header_row + 1)
+    return _scan_tail(values, header_row + 1, {'row': header_row, 'pick': None, 'date': None, 'tail': None})
+
+def record_tail_append(worksheet, header_row, date_values, response):
+    """Advance the cached tail pointer past rows just appended (pick =ROW()-header_row)."""
+    if not _client_cache['enabled'] or worksheet not in _tail_cache:
+        return
+    from sheet_cache import _row_from_append_response  # local import: sheet_cache imports this module
+    first_row = _row_from_append_response(response)
+    if first_row is None:
+        _tail_cache.pop(worksheet, None)
+        return
+    tail = _tail_cache[worksheet]
+    last_row = first_row + len(date_values) - 1
+    dates = [d for d in date_values if d]
+    tail.update(row=last_row, pick=last_row - header_row, tail=None)  # cells confirmed on next read
+    if dates:
+        tail['date'] = dates[-1]
+
+def get_next_pick_number_and_date(worksheet, header_row, pick_col, date_col, replica=None):
+    if replica is not None:
+        # Answered from the local SQLite mirror (see sheet_cache.py)
+        replica.sync(worksheet)
+        last_pick, last_date = replica.last_pick_and_date()
+        next_pick = (last_pick + 1) if last_pick is not None else 1
+        next_date = (last_date + timedelta(days = 7)) if last_date else None
+        return next_pick, next_date
+
+    with stage_timer('next_slot'):
+        tail = _tail_pointer(worksheet, header_row, pick_col, date_col)
+    if _client_cache['enabled']:
+        _tail_cache[worksheet] = tail
+    last_pick, last_date = tail['pick'], tail['date']
 
     next_pick = (last_pick + 1) if last_pick is not None else 1
     next_date = (last_date + timedelta(days = 7)) if last_date else None
     return next_pick, next_date
 
 def build_row_from_header(header_map, pick_value, date_value, album_info, header_row=None):
-    header_len = max(header_map.values()) + 1 if header_map else 0
-    row = [''] * header_len
-
-    def set_if_present(header_name, value):
-        idx = header_map.get(header_name)
-        if idx is not None:
-            row[idx] = value
-
     # Use a live formula so the pick number is always correct regardless of row position,
-    # matching the =ROW()-N pattern used in existing rows.
-    pick_formula = f'=ROW()-{header_row}' if header_row is not None else str(pick_value)
-    set_if_present('pick', pick_formula)
-    set_if_present('date', format_sheet_date(date_value))
-    set_if_present('artist', album_info.get('Artist', ''))
-    set_if_present('album', album_info.get('Album', ''))
-    set_if_present('year', str(album_info.get('Year', '')))
-    set_if_present('spotify_album_id', album_info.get('spotify_album_id', ''))
-    set_if_present('spotify_album_url', album_info.get('spotify_album_url', ''))
-    set_if_present('artwork_url', album_info.get('artwork_url', ''))
-    set_if_present('label', album_info.get('Label', ''))
-    set_if_present('total_tracks', str(album_info.get('Total Tracks', '')))
-    set_if_present('genres', album_info.get('Genres', ''))
-    set_if_present('apple_music_url', album_info.get('apple_music_url', ''))
-    set_if_present('picker', album_info.get('picker', ''))
-
-    return row
-
-def get_existing_album_ids(worksheet) -> dict:
+    # matching the =ROW()-N pattern used in existing rows (see AlbumRecord.to_sheet_row).
+    if isinstance(album_info, AlbumRecord):
+        record = dataclasses.replace(album_info, pick_number = pick_value, picked_at = date_value)
+    else:
+        record = AlbumRecord.from_album_info(album_info, pick_value, date_value)
+    return record.to_sheet_row(header_map, header_row)
+
+def get_existing_album_ids(worksheet, replica=None) -> dict:
     """Return dict mapping album_id -> (pick, date) for all rows in the sheet."""
+    if replica is not None:
+        replica.sync(worksheet)
+        return replica.existing_album_ids()
+
     header_row, header_map = get_header_row_and_map(worksheet)
     url_col_idx = header_map.get('spotify_album_url')
     if url_col_idx is None:
@@ -279,15 +453,26 @@ def get_existing_album_ids(worksheet) -> dict:
     return existing
 
 
-def check_duplicate(url: str, worksheet) -> tuple:
+def check_duplicate(url: str, worksheet, replica=None) -> tuple:
     """Check if album already exists in the sheet.
 
+    If a SheetReplica is given the lookup is an indexed local query instead of
+    three full-column reads.
+
     Returns (is_duplicate, message).
     """
     album_id = extract_spotify_album_id(url)
     if not album_id:
         return False, None
 
+    if replica is not None:
+        replica.sync(worksheet)
+        hit = replica.lookup_album(album_id)
+        if hit is not None:
+            pick, date = hit
+            return True, f"Already added — Pick #{pick} on {date}"
+        return False, None
+
     existing = get_existing_album_ids(worksheet)
     if album_id in existing:
         pick, date = existing[album_id]
@@ -299,11 +484,14 @@ def add_album(url = '', sheet_id = None, sheet_tab = None, creds_path = None):
 
     try:
         worksheet = get_google_sheet(sheet_id = sheet_id, sheet_tab = sheet_tab, creds_path = creds_path)
-    except (GSpreadException, ValueError) as exc:
+    except (_lazy('GSpreadException'), ValueError) as exc:
         logger.error('Failed to connect to Google Sheet: %s', exc)
         return False
 
-    is_dup, dup_msg = check_duplicate(url, worksheet)
+    from sheet_cache import get_sheet_replica  # local import: sheet_cache imports this module
+    replica = get_sheet_replica(worksheet)
+
+    is_dup, dup_msg = check_duplicate(url, worksheet, replica=replica)
     if is_dup:
         logger.info(dup_msg)
         return False
@@ -316,31 +504,159 @@ def add_album(url = '', sheet_id = None, sheet_tab = None, creds_path = None):
     if next_album_info is None:
         return False
     try:
-        header_row, header_map = get_header_row_and_map(worksheet)
-        pick_cell, date_cell = find_header_cells(worksheet)
-        next_pick, next_date = get_next_pick_number_and_date(
-            worksheet,
-            header_row,
-            pick_cell.col,
-            date_cell.col
-        )
-        row = build_row_from_header(header_map, next_pick, next_date, next_album_info, header_row)
-        worksheet.append_row(row, value_input_option = 'USER_ENTERED')
-    except (GSpreadException, ValueError) as exc:
+        with append_lease(worksheet) as lease:
+            if lease is not None and lease.foreign:
+                # the bot or another back-fill appended since: dedup again under the lease
+                if replica is not None:
+                    replica.expire()
+                is_dup, dup_msg = check_duplicate(url, worksheet, replica=replica)
+                if is_dup:
+                    logger.info(dup_msg)
+                    return False
+            if replica is not None:
+                header_row, header_map = replica.header()
+                next_pick, next_date = get_next_pick_number_and_date(
+                    worksheet, header_row, None, None, replica=replica
+                )
+            else:
+                header_row, header_map = get_header_row_and_map(worksheet)
+                pick_cell, date_cell = find_header_cells(worksheet)
+                next_pick, next_date = get_next_pick_number_and_date(
+                    worksheet,
+                    header_row,
+                    pick_cell.col,
+                    date_cell.col
+                )
+            row = build_row_from_header(header_map, next_pick, next_date, next_album_info, header_row)
+            ensure_held(lease)
+            response = worksheet.append_row(row, value_input_option = 'USER_ENTERED')
+            if replica is not None:
+                replica.record_append(row, response)
+            else:
+                record_tail_append(worksheet, header_row, [next_date], response)
+    except (_lazy('GSpreadException'), ValueError, LeaseTimeout) as exc:
         logger.error('Failed to append row to Google Sheet: %s', exc)
         return False
 
     logger.info('Successfully added "%s" by %s to the sheet', next_album_info.get('Album'), next_album_info.get('Artist'))
     return True
 
+def add_albums(urls, sheet_id = None, sheet_tab = None, creds_path = None, progress = None):
+    """Add several albums with one sheet handle, one Spotify client and one append_rows call.
+
+    progress(index, message), if given, is called as each URL moves through
+    the steps (the GUI uses it for per-URL status). Albums that are invalid
+    or already in the sheet are skipped; the rest are appended in order at
+    consecutive weekly dates.
+
+    Returns one {'url', 'success', 'message', 'seconds'} dict per URL.
+    """
+    results = [{'url': url, 'success': False, 'message': '', 'seconds': 0.0} for url in urls]
+
+    def report(i, message, started):
+        results[i]['message'] = message
+        results[i]['seconds'] += time.perf_counter() - started
+        if progress is not None:
+            progress(i, message)
+
+    started = time.perf_counter()
+    try:
+        worksheet = get_google_sheet(sheet_id = sheet_id, sheet_tab = sheet_tab, creds_path = creds_path)
+        from sheet_cache import get_sheet_replica  # local import: sheet_cache imports this module
+        replica = get_sheet_replica(worksheet)
+        existing = get_existing_album_ids(worksheet, replica=replica)
+    except (_lazy('GSpreadException'), ValueError) as exc:
+        logger.error('Failed to connect to Google Sheet: %s', exc)
+        for i in range(len(urls)):
+            report(i, 'Failed to connect to Google Sheet', started)
+        return results
+
+    sp = None
+    found = []  # (index, album_info) in paste order
+    seen = set()
+    for i, url in enumerate(urls):
+        started = time.perf_counter()
+        album_id = extract_spotify_album_id(url)
+        if not album_id:
+            report(i, 'Invalid album url', started)
+            continue
+        if album_id in existing:
+            pick, date = existing[album_id]
+            report(i, f'Already added — Pick #{pick} on {date}', started)
+            continue
+        if album_id in seen:
+            report(i, 'Listed twice', started)
+            continue
+        seen.add(album_id)
+        try:
+            sp = sp or get_spotify_api()
+            album_info = get_album_info(url = url, spot_api = sp)
+        except Exception as exc:
+            logger.error('Spotify lookup failed for %s: %s', url, exc)
+            album_info = None
+        if album_info is None:
+            report(i, 'Invalid album url', started)
+            continue
+        found.append((i, album_info))
+        report(i, f'Found "{album_info.get("Album")}" by {album_info.get("Artist")}', started)
+
+    if not found:
+        return results
+
+    started = time.perf_counter()
+    try:
+        with append_lease(worksheet) as lease:
+            if lease is not None and lease.foreign:
+                # the bot or another back-fill appended since the snapshot: drop new duplicates
+                if replica is not None:
+                    replica.expire()
+                existing = get_existing_album_ids(worksheet, replica=replica)
+                for i, album_info in list(found):
+                    album_id = extract_spotify_album_id(urls[i])
+                    if album_id in existing:
+                        pick, date = existing[album_id]
+                        report(i, f'Already added — Pick #{pick} on {date}', started)
+                        found.remove((i, album_info))
+                if not found:
+                    return results
+            if replica is not None:
+                header_row, header_map = replica.header()
+                _, next_date = get_next_pick_number_and_date(worksheet, header_row, None, None, replica=replica)
+            else:
+                header_row, header_map = get_header_row_and_map(worksheet)
+                pick_cell, date_cell = find_header_cells(worksheet)
+                _, next_date = get_next_pick_number_and_date(worksheet, header_row, pick_cell.col, date_cell.col)
+            dates = [next_date + timedelta(days = 7 * offset) if next_date else None for offset in range(len(found))]
+            rows = [build_row_from_header(header_map, '', date_value, album_info, header_row)
+                    for date_value, (_, album_info) in zip(dates, found)]
+            ensure_held(lease)
+            response = worksheet.append_rows(rows, value_input_option = 'USER_ENTERED')
+            if replica is not None:
+                replica.record_appends(rows, response)
+            else:
+                record_tail_append(worksheet, header_row, dates, response)
+    except (_lazy('GSpreadException'), ValueError, LeaseTimeout) as exc:
+        logger.error('Failed to append rows to Google Sheet: %s', exc)
+        for i, _ in found:
+            report(i, 'Failed to add to sheet', started)
+        return results
+
+    for i, album_info in found:
+        results[i]['success'] = True
+        report(i, f'Added "{album_info.get("Album")}" by {album_info.get("Artist")}', started)
+    logger.info('Successfully added %d of %d albums to the sheet', len(found), len(urls))
+    return results
+
 def main():
 
     args = get_user_args()
+    apply_profile_args(args)
     url = args.url
-    add_album(url = url,
-              sheet_id = args.sheet_id,
-              sheet_tab = args.sheet_tab,
-              creds_path = args.service_account_file)
+    with profile_run('add_album'):
+        add_album(url = url,
+                  sheet_id = args.sheet_id,
+                  sheet_tab = args.sheet_tab,
+                  creds_path = args.service_account_file)
 
 if __name__ == "__main__":
     main()
@@ -1,10 +1,45 @@
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel,
-    QLineEdit, QPushButton
+    QPlainTextEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal, pyqtSlot
 import sys
-from add_album import add_album
+import time
+
+PROMPT = "Paste one or more album URLs (one per line):"
+
+
+class WorkerSignals(QObject):
+    """Signals from AddAlbumsWorker; delivered on the UI thread via queued connections."""
+    progress = pyqtSignal(int, str, float)  # row, status, seconds since the batch started
+    finished = pyqtSignal(list)             # add_albums() results
+    failed = pyqtSignal(str)
+
+
+class AddAlbumsWorker(QRunnable):
+    """Runs add_albums() for a pasted batch on a pool thread, off the Qt event loop."""
+
+    def __init__(self, urls):
+        super().__init__()
+        self.urls = urls
+        self.signals = WorkerSignals()
+
+    @pyqtSlot()
+    def run(self):
+        started = time.perf_counter()
+        try:
+            # deferred so the window opens before the Sheets/Spotify stack loads
+            from add_album import add_albums, enable_client_cache
+            enable_client_cache()  # share authenticated clients across batches
+            results = add_albums(
+                self.urls,
+                progress=lambda i, status: self.signals.progress.emit(i, status, time.perf_counter() - started),
+            )
+        except Exception as exc:
+            self.signals.failed.emit(str(exc))
+            return
+        self.signals.finished.emit(results)
+
 
 class AlbumWindow(QWidget):
 
@@ -12,42 +47,76 @@ class AlbumWindow(QWidget):
 
         super().__init__()
         self.setWindowTitle("Add Album URL")
-        self.setGeometry(100, 100, 400, 150)
+        self.setGeometry(100, 100, 600, 400)
+        # One worker at a time so batches append in the order they were submitted
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
         self.setup_ui()
 
     def setup_ui(self):
 
         layout = QVBoxLayout()
-        self.label = QLabel("Enter your album URL here:")
+        self.label = QLabel(PROMPT)
         layout.addWidget(self.label)
 
-        self.url_input = QLineEdit()
+        self.url_input = QPlainTextEdit()
         layout.addWidget(self.url_input)
 
-        self.add_button = QPushButton("Add Album")
+        self.add_button = QPushButton("Add Albums")
         self.add_button.clicked.connect(self.handle_add_album)
         layout.addWidget(self.add_button)
+
+        self.status_table = QTableWidget(0, 3)
+        self.status_table.setHorizontalHeaderLabels(["URL", "Status", "Time"])
+        self.status_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.status_table)
         self.setLayout(layout)
 
     def handle_add_album(self):
-        
-        album_url = self.url_input.text()
-        
-        if album_url:
-            album_added = add_album(url = album_url)
-
-            if album_added:
-                self.label.setText("Album added successfully!")
-
-            else:
-                self.label.setText("Invalid album url")
-            QTimer.singleShot(3000, lambda: self.label.setText("Enter your album URL here:"))
-            QTimer.singleShot(3000, lambda: self.url_input.clear())
-        else:
+
+        urls = self.url_input.toPlainText().split()
+
+        if not urls:
             self.label.setText("No album entered. Please enter a URL.")
+            return
+
+        self.status_table.setRowCount(len(urls))
+        for row, url in enumerate(urls):
+            self.status_table.setItem(row, 0, QTableWidgetItem(url))
+            self.status_table.setItem(row, 1, QTableWidgetItem("Queued"))
+            self.status_table.setItem(row, 2, QTableWidgetItem(""))
+
+        self.add_button.setEnabled(False)
+        self.label.setText(f"Adding {len(urls)} album(s)…")
+
+        worker = AddAlbumsWorker(urls)
+        worker.signals.progress.connect(self.on_progress)
+        worker.signals.finished.connect(self.on_finished)
+        worker.signals.failed.connect(self.on_failed)
+        self.pool.start(worker)
+
+    def on_progress(self, row, status, seconds):
+        self.status_table.setItem(row, 1, QTableWidgetItem(status))
+        self.status_table.setItem(row, 2, QTableWidgetItem(f"{seconds:.1f}s"))
+
+    def on_finished(self, results):
+        added = sum(1 for r in results if r['success'])
+        for row, result in enumerate(results):
+            self.status_table.setItem(row, 2, QTableWidgetItem(f"{result['seconds']:.1f}s"))
+        if added:
+            self.label.setText(f"Added {added} of {len(results)} album(s).")
+            self.url_input.clear()
+        else:
+            self.label.setText("No albums added — see the status list.")
+        self.add_button.setEnabled(True)
+        QTimer.singleShot(3000, lambda: self.label.setText(PROMPT))
+
+    def on_failed(self, message):
+        self.label.setText(f"Something went wrong: {message}")
+        self.add_button.setEnabled(True)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = AlbumWindow()
     window.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -0,0 +1,223 @@
+"""AlbumRecord: the one schema for an album as it moves Spotify → sheet → data.json.
+
+Album data used to change shape at every hop: get_album_info returned
+'Artist' / 'Total Tracks' keys, build_row_from_header mapped those onto
+lowercase sheet headers, and export_json rebuilt 'artist' / 'pick_number'
+dicts from raw cells. AlbumRecord is a slotted dataclass whose field names
+and order are the data.json schema:
+
+    from_spotify(raw, url, artist_genres)   Spotify album object
+    sheet_reader(header_map)(row)           sheet row (columns resolved once)
+    from_json(entry)                        data.json entry
+    from_album_info(info)                   legacy get_album_info dict
+
+    to_sheet_row(header_map, header_row)    row for append_row(s)
+    to_json()                               data.json entry
+    to_album_info()                         legacy dict (pipeline results, bot replies)
+
+Text fields are stripped strings ('' when unknown) because that is what the
+sheet holds; pick_number is an int (0 when missing) and picked_at a date.
+
+The sheet date helpers live here too (add_album re-exports them) so this
+module has no dependency on the Sheets/Spotify code.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from operator import attrgetter
+from typing import Dict, List, Optional
+
+from validation import extract_spotify_album_id
+
+
+def parse_sheet_date(value):
+    if not value:
+        return None
+    value = str(value).strip()
+    # Fast path for the sheet's own M/D/YYYY and ISO dates; strptime is ~10x slower
+    parts = value.split('/') if '/' in value else value.split('-')
+    if len(parts) == 3 and all(p.isdigit() for p in parts):
+        if '/' in value and len(parts[2]) == 4 and len(parts[0]) <= 2 and len(parts[1]) <= 2:
+            year, month, day = parts[2], parts[0], parts[1]
+        elif '-' in value and len(parts[0]) == 4 and len(parts[1]) <= 2 and len(parts[2]) <= 2:
+            year, month, day = parts
+        else:
+            year = None
+        if year is not None:
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                return None
+    for fmt in ('%m/%d/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def format_sheet_date(value):
+    if not value:
+        return ''
+    try:
+        return value.strftime('%-m/%-d/%Y')
+    except ValueError:
+        return value.strftime('%m/%d/%Y')
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+@dataclass(slots=True)
+class AlbumRecord:
+    spotify_album_id: Optional[str] = None
+    pick_number: int = 0
+    picked_at: Optional[date] = None
+    artist: str = ''
+    album: str = ''
+    year: str = ''
+    label: str = ''
+    genres: str = ''
+    total_tracks: str = ''
+    artwork_url: str = ''
+    spotify_url: str = ''
+    apple_music_url: str = ''
+    alt_url: str = ''
+    picker: str = ''
+
+    # -- constructors ---------------------------------------------------
+
+    @classmethod
+    def from_spotify(cls, raw: dict, url: str = '', artist_genres=()) -> 'AlbumRecord':
+        """From a Spotify album object; genres fall back to the artist's (artist_genres)."""
+        release_date = raw['release_date']
+        if raw['release_date_precision'] == 'day':
+            year = str(datetime.strptime(release_date, '%Y-%m-%d').year)
+        else:
+            year = release_date
+        return cls(
+            spotify_album_id=raw.get('id', ''),
+            artist=raw['artists'][0]['name'],
+            album=raw['name'],
+            year=year,
+            label=raw.get('label', '') or '',
+            genres=', '.join(raw.get('genres', []) or artist_genres),
+            total_tracks=_text(raw.get('total_tracks', '')),
+            artwork_url=raw['images'][1]['url'],
+            spotify_url=url,
+        )
+
+    @classmethod
+    def sheet_reader(cls, header_map: Dict[str, int]):
+        """Return row → AlbumRecord for sheets with this header (column lookups done once)."""
+        def column(name):
+            return header_map.get(name, -1)
+
+        url_col, pick_col, date_col = column('spotify_album_url'), column('pick'), column('date')
+        text_cols = [(name, column(name)) for name in (
+            'artist', 'album', 'year', 'label', 'genres', 'total_tracks', 'artwork_url',
+            'apple_music_url', 'alt_url', 'picker',
+        )]
+
+        def read(row: List[str]) -> 'AlbumRecord':
+            width = len(row)
+
+            def cell(col):
+                return row[col].strip() if 0 <= col < width else ''
+
+            url = cell(url_col)
+            album_id = extract_spotify_album_id(url)
+            try:
+                pick_number = int(float(cell(pick_col) or 0))
+            except (ValueError, TypeError):
+                pick_number = 0  # empty, or a formula placeholder
+            record = cls(album_id, pick_number, parse_sheet_date(cell(date_col)),
+                         spotify_url=url if album_id else '')
+            for name, col in text_cols:
+                if 0 <= col < width:
+                    setattr(record, name, row[col].strip())
+            return record
+        return read
+
+    @classmethod
+    def from_sheet_row(cls, row: List[str], header_map: Dict[str, int]) -> 'AlbumRecord':
+        return cls.sheet_reader(header_map)(row)
+
+    @classmethod
+    def from_json(cls, entry: dict) -> 'AlbumRecord':
+        picked_at = entry.get('picked_at') or ''
+        return cls(
+            entry.get('spotify_album_id'),
+            int(entry.get('pick_number') or 0),
+            date.fromisoformat(picked_at) if picked_at else None,
+            *(_text(entry.get(name)) for name in _TEXT_FIELDS),
+        )
+
+    @classmethod
+    def from_album_info(cls, info: dict, pick_number: int = 0, picked_at: Optional[date] = None) -> 'AlbumRecord':
+        get = info.get
+        return cls(
+            get('spotify_album_id'), pick_number, picked_at,
+            get('Artist', ''), get('Album', ''), str(get('Year', '')), get('Label', ''), get('Genres', ''),
+            str(get('Total Tracks', '')), get('artwork_url', ''), get('spotify_album_url', ''),
+            get('apple_music_url', ''), '', get('picker', ''),
+        )
+
+    # -- serializers ----------------------------------------------------
+
+    def to_json(self) -> dict:
+        """The data.json entry (key order is the schema order)."""
+        values = _json_values(self)
+        entry = dict(zip(JSON_FIELDS, values))
+        entry['picked_at'] = self.picked_at.isoformat() if self.picked_at else ''
+        return entry
+
+    def to_sheet_row(self, header_map: Dict[str, int], header_row: Optional[int] = None) -> List[str]:
+        """Row for append_row(s) laid out by header_map.
+
+        With header_row the pick cell is the live =ROW()-N formula the sheet
+        uses, so the number stays right wherever the row ends up.
+        """
+        row = [''] * (max(header_map.values()) + 1 if header_map else 0)
+        pick = f'=ROW()-{header_row}' if header_row is not None else str(self.pick_number or '')
+        for name, value in (
+            ('pick', pick),
+            ('date', format_sheet_date(self.picked_at)),
+            ('artist', self.artist),
+            ('album', self.album),
+            ('year', self.year),
+            ('spotify_album_id', self.spotify_album_id or ''),
+            ('spotify_album_url', self.spotify_url),
+            ('artwork_url', self.artwork_url),
+            ('label', self.label),
+            ('total_tracks', self.total_tracks),
+            ('genres', self.genres),
+            ('apple_music_url', self.apple_music_url),
+            ('picker', self.picker),
+        ):
+            idx = header_map.get(name)
+            if idx is not None:
+                row[idx] = value
+        return row
+
+    def to_album_info(self) -> dict:
+        """The legacy get_album_info dict."""
+        return {
+            'spotify_album_id': self.spotify_album_id or '',
+            'Artist': self.artist,
+            'Album': self.album,
+            'Year': self.year,
+            'spotify_album_url': self.spotify_url,
+            'artwork_url': self.artwork_url,
+            'Label': self.label,
+            'Total Tracks': self.total_tracks,
+            'Genres': self.genres,
+        }
+
+
+JSON_FIELDS = tuple(AlbumRecord.__dataclass_fields__)
+_TEXT_FIELDS = JSON_FIELDS[3:]
+_json_values = attrgetter(*JSON_FIELDS)
@@ -0,0 +1,106 @@
+"""Ordering for concurrent pipeline runs inside one bot process.
+
+With concurrent_updates enabled, several process_album calls run at once.
+Spotify/Odesli lookups and Telegram replies can overlap freely, but two
+things must not:
+
+  * the read-next-date → dedup → append critical section for a sheet
+    (otherwise two albums get the same date, or one album is added twice)
+  * the export → GitHub push (concurrent PUTs race on the file SHA)
+
+AppendCoordinator provides a per-sheet append lock, a per-target publish
+lock (clubs publishing to different sites don't wait on each other), and
+single-flight: concurrent requests for the same album and sheet share one run.
+Each sheet also has an append generation, bumped on every append, so a run
+can tell whether its optimistic dedup check is still current when it gets
+the lock.
+
+This only orders work within one process. Given the worksheet,
+append_lock() also takes the cross-process append lease (append_lease.py)
+when APPEND_LOCK_BACKEND is set, for several replicas or a CLI back-fill
+next to the bot.
+"""
+import asyncio
+import contextlib
+import weakref
+from typing import Awaitable, Callable, Dict
+
+import append_lease
+from logging_config import setup_logging
+from metrics import counter, stage_timer
+from profiling import to_thread
+
+logger = setup_logging()
+
+SINGLE_FLIGHT_JOINS = counter(
+    'aotw_single_flight_joins_total',
+    'Requests that joined an in-flight run for the same album.',
+)
+
+
+class AppendCoordinator:
+    def __init__(self):
+        self._append_locks: Dict[str, asyncio.Lock] = {}
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._publish_locks: Dict[str, asyncio.Lock] = {}
+
+    def generation(self, sheet_key: str) -> int:
+        return self._generations.get(sheet_key, 0)
+
+    def mark_appended(self, sheet_key: str) -> None:
+        self._generations[sheet_key] = self.generation(sheet_key) + 1
+
+    @contextlib.asynccontextmanager
+    async def append_lock(self, sheet_key: str, worksheet=None):
+        """Serialize the next-date/dedup/append critical section for one sheet.
+
+        Yields the cross-process append_lease.Lease when a worksheet is given
+        and a lease backend is configured, else None.
+        """
+        lock = self._append_locks.setdefault(sheet_key, asyncio.Lock())
+        with stage_timer('append_lock_wait'):
+            await lock.acquire()
+        try:
+            lease_lock = lease = None
+            if worksheet is not None:
+                lease_lock = append_lease.get_lease_lock(worksheet)
+            if lease_lock is not None:
+                from sheet_cache import sheet_key_for
+                lease = await to_thread(append_lease.acquire, lease_lock, sheet_key_for(worksheet))
+            try:
+                yield lease
+            finally:
+                if lease is not None:
+                    await to_thread(append_lease.release, lease_lock, lease)
+        finally:
+            lock.release()
+
+    def publish_lock(self, target_key: str = '') -> asyncio.Lock:
+        """Serialize export → push for one GitHub target (github_push.target_key())."""
+        return self._publish_locks.setdefault(target_key, asyncio.Lock())
+
+    async def single_flight(self, key: str, factory: Callable[[], Awaitable]):
+        """Run factory() once per key at a time; concurrent callers await the same result."""
+        task = self._inflight.get(key)
+        if task is not None:
+            SINGLE_FLIGHT_JOINS.inc()
+            logger.info('Joining in-flight run for %s', key, extra={'album_id': key})
+        else:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one caller being cancelled must not cancel the shared run
+        return await asyncio.shield(task)
+
+
+_coordinators: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AppendCoordinator]' = weakref.WeakKeyDictionary()
+
+
+def get_coordinator() -> AppendCoordinator:
+    """Coordinator for the running event loop (asyncio locks are loop-bound)."""
+    loop = asyncio.get_running_loop()
+    coordinator = _coordinators.get(loop)
+    if coordinator is None:
+        coordinator = _coordinators[loop] = AppendCoordinator()
+    return coordinator
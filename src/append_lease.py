@@ -0,0 +1,363 @@
+"""Cross-process lease around the sheet append critical section.
+
+append_coordinator.py orders appends inside one bot process. A second bot
+replica, or a CLI/GUI back-fill running next to the bot, can still
+interleave check_duplicate → get_next_pick_number_and_date → append_row and
+add an album twice or two picks on the same date. APPEND_LOCK_BACKEND
+selects a lease every writer takes first:
+
+    sqlite  a lease row in APPEND_LOCK_DB (BEGIN IMMEDIATE makes the
+            check-and-take atomic across processes on one host or volume)
+    sheet   one lock row per album tab (name, owner, expires_at, last_owner)
+            on the APPEND_LOCK_TAB tab of the spreadsheet itself, for
+            writers that share nothing but the sheet. Sheets has no
+            compare-and-swap, so a writer claims the row, waits
+            SHEET_LOCK_SETTLE seconds and re-reads it: the last claim wins
+            and the others back off. Best effort — prefer sqlite where
+            the writers can share a file.
+    (unset) no lease; single-process ordering only
+
+A lease expires APPEND_LEASE_TTL seconds after it was last renewed, so a
+writer that crashed mid-append blocks the others for at most that long.
+While held, a heartbeat thread renews it every APPEND_LEASE_TTL / 3 seconds,
+so a slow Sheets call does not let another writer in mid-append. Writers
+call ensure_held() just before the append; it raises LeaseLost if the
+lease was taken over or is about to lapse. Waiting longer than
+APPEND_LOCK_TIMEOUT to take the lease raises LeaseTimeout.
+
+Each lease records the last owner. Lease.foreign is True when another
+process held it since this one did — its appends are then not in this
+process's caches, so callers re-check duplicates before appending.
+
+Metrics: aotw_append_lease_acquisitions_total{backend,outcome} (acquired,
+contended, expired, timeout, lost), aotw_append_lease_held_seconds and the
+append_lease_wait stage timer.
+"""
+import contextlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from typing import Optional
+
+from logging_config import setup_logging
+from metrics import counter, histogram, stage_timer
+
+logger = setup_logging()
+
+APPEND_LOCK_BACKEND = os.getenv('APPEND_LOCK_BACKEND', '').lower()
+APPEND_LOCK_DB      = os.getenv('APPEND_LOCK_DB')
+APPEND_LOCK_TAB     = os.getenv('APPEND_LOCK_TAB', '_aotw_lock')
+APPEND_LEASE_TTL    = float(os.getenv('APPEND_LEASE_TTL', '30'))
+APPEND_LOCK_TIMEOUT = float(os.getenv('APPEND_LOCK_TIMEOUT', '30'))
+SHEET_LOCK_SETTLE   = float(os.getenv('SHEET_LOCK_SETTLE', '1.0'))
+POLL_INTERVAL       = 0.25
+
+# One owner ID per process: in-process ordering is append_coordinator's job
+OWNER = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+LEASE_ACQUISITIONS = counter(
+    'aotw_append_lease_acquisitions_total',
+    'Append lease attempts by backend and outcome (acquired, contended, expired, timeout, lost).',
+    ('backend', 'outcome'),
+)
+LEASE_HELD = histogram(
+    'aotw_append_lease_held_seconds',
+    'How long the append lease was held.',
+    ('backend',),
+)
+
+
+class LeaseTimeout(TimeoutError):
+    """The append lease could not be taken within APPEND_LOCK_TIMEOUT."""
+
+
+class LeaseLost(LeaseTimeout):
+    """The append lease was taken over, or is about to expire, before the write."""
+
+
+class Lease:
+    """A held lease. foreign: another process held it since this one last did.
+
+    lost is set by the heartbeat when a renewal finds another owner.
+    """
+
+    def __init__(self, name: str, owner: str, expires_at: float, foreign: bool = False, ttl: float = None):
+        self.name = name
+        self.owner = owner
+        self.expires_at = expires_at
+        self.foreign = foreign
+        self.ttl = APPEND_LEASE_TTL if ttl is None else ttl
+        self.lost = False
+        self.acquired_at = time.monotonic()
+        self.heartbeat = None
+
+
+class SqliteLeaseLock:
+    """Lease rows in a SQLite file shared by every writer on the host."""
+
+    backend = 'sqlite'
+
+    def __init__(self, db_path: str, owner: str = OWNER, ttl: float = None):
+        self.owner = owner
+        self.ttl = APPEND_LEASE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        # isolation_level=None: transactions are managed explicitly below
+        self._conn = sqlite3.connect(db_path, timeout=APPEND_LOCK_TIMEOUT, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS append_lease ('
+            'name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL, last_owner TEXT NOT NULL)'
+        )
+
+    def try_acquire(self, name: str, now: float = None) -> Optional[Lease]:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT owner, expires_at, last_owner FROM append_lease WHERE name = ?', (name,)
+                ).fetchone()
+                owner, expires_at, last_owner = row or ('', 0.0, '')
+                if owner and owner != self.owner and expires_at > now:
+                    self._conn.execute('ROLLBACK')
+                    return None
+                if owner and owner != self.owner:
+                    LEASE_ACQUISITIONS.inc(backend=self.backend, outcome='expired')
+                    logger.warning('Took over expired append lease from %s', owner, extra={'lease': name})
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO append_lease (name, owner, expires_at, last_owner) VALUES (?, ?, ?, ?)',
+                    (name, self.owner, now + self.ttl, self.owner),
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return Lease(name, self.owner, now + self.ttl, foreign=last_owner not in ('', self.owner), ttl=self.ttl)
+
+    def renew(self, lease: Lease, now: float = None) -> bool:
+        """Push the lease's expiry out by ttl; False if another writer owns it now."""
+        now = time.time() if now is None else now
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE append_lease SET expires_at = ? WHERE name = ? AND owner = ?',
+                (now + self.ttl, lease.name, self.owner),
+            )
+        if cursor.rowcount != 1:
+            return False
+        lease.expires_at = now + self.ttl
+        return True
+
+    def release(self, lease: Lease) -> bool:
+        """Give the lease up; False if it had already expired and been taken over."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE append_lease SET owner = '', expires_at = 0 WHERE name = ? AND owner = ?",
+                (lease.name, self.owner),
+            )
+        return cursor.rowcount == 1
+
+
+class SheetLeaseLock:
+    """Lock rows (name, owner, expires_at, last_owner) on a tab of the album spreadsheet.
+
+    Each lease name (one per album tab) gets its own row, found by name in
+    column A and appended on first use. If two writers append the same name
+    at once, both use the first matching row.
+    """
+
+    backend = 'sheet'
+
+    def __init__(self, worksheet, owner: str = OWNER, ttl: float = None, settle: float = None,
+                 tab: str = None):
+        self.worksheet = worksheet
+        self.owner = owner
+        self.ttl = APPEND_LEASE_TTL if ttl is None else ttl
+        self.settle = SHEET_LOCK_SETTLE if settle is None else settle
+        self.tab = tab or APPEND_LOCK_TAB
+        self._lock_tab = None
+        self._rows = {}  # lease name → lock row number (rows are only ever appended)
+        self._lock = threading.Lock()  # the heartbeat renews from its own thread
+
+    def _tab(self):
+        if self._lock_tab is None:
+            spreadsheet = self.worksheet.spreadsheet
+            try:
+                self._lock_tab = spreadsheet.worksheet(self.tab)
+            except Exception:
+                logger.info('Creating append lock tab %r', self.tab)
+                self._lock_tab = spreadsheet.add_worksheet(title=self.tab, rows=1, cols=4)
+        return self._lock_tab
+
+    def _row(self, name: str) -> int:
+        row = self._rows.get(name)
+        if row is None:
+            tab = self._tab()
+            names = tab.col_values(1)
+            if name not in names:
+                tab.append_row([name, '', '0', ''], value_input_option='RAW')
+                names = tab.col_values(1)
+            row = self._rows[name] = names.index(name) + 1
+        return row
+
+    def _read(self, name: str):
+        row_num = self._row(name)
+        values = self._tab().get(f'B{row_num}:D{row_num}')
+        row = (values[0] if values else []) + ['', '', '']
+        try:
+            expires_at = float(row[1] or 0)
+        except ValueError:
+            expires_at = 0.0
+        return row[0], expires_at, row[2]
+
+    def _write(self, name: str, owner: str, expires_at: float, last_owner: str) -> None:
+        row_num = self._row(name)
+        self._tab().batch_update([{'range': f'B{row_num}:D{row_num}',
+                                   'values': [[owner, repr(expires_at), last_owner]]}])
+
+    def try_acquire(self, name: str, now: float = None) -> Optional[Lease]:
+        now = time.time() if now is None else now
+        with self._lock:
+            owner, expires_at, last_owner = self._read(name)
+            if owner and owner != self.owner and expires_at > now:
+                return None
+            if owner and owner != self.owner:
+                LEASE_ACQUISITIONS.inc(backend=self.backend, outcome='expired')
+                logger.warning('Took over expired append lease from %s', owner, extra={'lease': name})
+            self._write(name, self.owner, now + self.ttl, self.owner)
+        if self.settle:
+            time.sleep(self.settle)
+        # Last writer wins: if another process claimed the row meanwhile, back off
+        with self._lock:
+            if self._read(name)[0] != self.owner:
+                return None
+        return Lease(name, self.owner, now + self.ttl, foreign=last_owner not in ('', self.owner), ttl=self.ttl)
+
+    def renew(self, lease: Lease, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            owner, _, last_owner = self._read(lease.name)
+            if owner != self.owner:
+                return False
+            self._write(lease.name, self.owner, now + self.ttl, last_owner)
+        lease.expires_at = now + self.ttl
+        return True
+
+    def release(self, lease: Lease) -> bool:
+        with self._lock:
+            owner, _, last_owner = self._read(lease.name)
+            if owner != self.owner:
+                return False
+            self._write(lease.name, '', 0.0, last_owner)
+        return True
+
+
+class _Heartbeat(threading.Thread):
+    """Renews a held lease every ttl / 3 seconds until stopped or lost."""
+
+    def __init__(self, lock, lease: Lease):
+        super().__init__(name=f'append-lease-heartbeat:{lease.name}', daemon=True)
+        self.lock = lock
+        self.lease = lease
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.lease.ttl / 3):
+            try:
+                renewed = self.lock.renew(self.lease)
+            except Exception as exc:  # a failed Sheets call: try again next beat
+                logger.warning('Append lease renewal failed: %s', exc, extra={'lease': self.lease.name})
+                continue
+            if not renewed:
+                self.lease.lost = True
+                logger.warning('Append lease for %s was taken over while held', self.lease.name,
+                               extra={'lease': self.lease.name})
+                return
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def acquire(lock, name: str, timeout: float = None) -> Lease:
+    """Take the lease, polling while someone else holds it; LeaseTimeout after `timeout` seconds."""
+    timeout = APPEND_LOCK_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    contended = False
+    with stage_timer('append_lease_wait'):
+        while True:
+            lease = lock.try_acquire(name)
+            if lease is not None:
+                break
+            if not contended:
+                contended = True
+                LEASE_ACQUISITIONS.inc(backend=lock.backend, outcome='contended')
+                logger.info('Append lease for %s is held elsewhere; waiting', name, extra={'lease': name})
+            if time.monotonic() >= deadline:
+                LEASE_ACQUISITIONS.inc(backend=lock.backend, outcome='timeout')
+                raise LeaseTimeout(f'Append lease for {name} not acquired within {timeout:.0f}s')
+            time.sleep(POLL_INTERVAL)
+    LEASE_ACQUISITIONS.inc(backend=lock.backend, outcome='acquired')
+    lease.heartbeat = _Heartbeat(lock, lease)
+    lease.heartbeat.start()
+    return lease
+
+
+def ensure_held(lease: Optional[Lease], now: float = None) -> None:
+    """Call just before writing: LeaseLost unless the lease is still ours for at least ttl / 3."""
+    if lease is None:
+        return
+    now = time.time() if now is None else now
+    if lease.lost or lease.expires_at - now < lease.ttl / 3:
+        raise LeaseLost(f'Append lease for {lease.name} was lost or is about to expire; not writing')
+
+
+def release(lock, lease: Lease) -> None:
+    if lease.heartbeat is not None:
+        lease.heartbeat.stop()
+    LEASE_HELD.observe(time.monotonic() - lease.acquired_at, backend=lock.backend)
+    if not lock.release(lease):
+        LEASE_ACQUISITIONS.inc(backend=lock.backend, outcome='lost')
+        logger.warning('Append lease for %s was lost while held (renewals failing, or APPEND_LEASE_TTL too short?)', lease.name)
+
+
+_sqlite_locks = {}
+_sheet_locks: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+_locks_guard = threading.Lock()
+
+
+def get_lease_lock(worksheet):
+    """The configured lease backend for this worksheet, or None if APPEND_LOCK_BACKEND is unset."""
+    if APPEND_LOCK_BACKEND == 'sqlite':
+        if not APPEND_LOCK_DB:
+            raise ValueError('APPEND_LOCK_BACKEND=sqlite needs APPEND_LOCK_DB')
+        with _locks_guard:
+            if APPEND_LOCK_DB not in _sqlite_locks:
+                _sqlite_locks[APPEND_LOCK_DB] = SqliteLeaseLock(APPEND_LOCK_DB)
+            return _sqlite_locks[APPEND_LOCK_DB]
+    if APPEND_LOCK_BACKEND == 'sheet':
+        with _locks_guard:
+            if worksheet not in _sheet_locks:
+                _sheet_locks[worksheet] = SheetLeaseLock(worksheet)
+            return _sheet_locks[worksheet]
+    if APPEND_LOCK_BACKEND:
+        raise ValueError(f'Unknown APPEND_LOCK_BACKEND: {APPEND_LOCK_BACKEND}')
+    return None
+
+
+@contextlib.contextmanager
+def append_lease(worksheet):
+    """Hold the cross-process append lease for this worksheet; yields the Lease, or None if disabled."""
+    lock = get_lease_lock(worksheet)
+    if lock is None:
+        yield None
+        return
+    from sheet_cache import sheet_key_for
+    lease = acquire(lock, sheet_key_for(worksheet))
+    try:
+        yield lease
+    finally:
+        release(lock, lease)
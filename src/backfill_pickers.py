@@ -14,6 +14,7 @@ sys.path.insert(0, os.path.dirname(__file__))
 import gspread
 from add_album import get_google_sheet, get_header_row_and_map
 from logging_config import setup_logging
+from sheet_cache import get_sheet_replica
 
 logger = setup_logging()
 
@@ -76,6 +77,9 @@ def backfill_pickers(sheet_id=None, sheet_tab=None, creds_path=None, dry_run=Fal
         logger.info('Dry run — no changes written.')
     else:
         worksheet.batch_update(updates)
+        replica = get_sheet_replica(worksheet)
+        if replica is not None:
+            replica.invalidate()
         logger.info('Done.')
 
 
@@ -0,0 +1,155 @@
+"""On-disk snapshot of the bot's in-process caches, for fast warm restarts.
+
+Railway restarts the bot on failure and on every deploy, and each restart
+starts cold: a new Spotify token, header discovery on the sheet, and a GET
+for data.json's SHA before the first push. With CACHE_SNAPSHOT_PATH set, the
+bot writes those caches to a small gzip'd JSON file every
+CACHE_SNAPSHOT_INTERVAL seconds (default 300) and on shutdown, and warm-up
+(warmup.py) loads it at startup. Each part is validated before use:
+
+    spotify   client-credentials token    used only if not yet expired
+    headers   header row/map per sheet    one row_values() of the header row must match
+    github    last pushed blob SHA + hash the file's current SHA must match (one GET
+              per GitHub target           per target, at startup rather than on the
+                                          first album)
+
+Anything stale or unreadable is ignored and that cache fills the normal way.
+The dedup index is not duplicated here: point SHEET_CACHE_DB at the same
+volume and the SQLite replica (sheet_cache.py) survives restarts on its own.
+"""
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+CACHE_SNAPSHOT_PATH     = os.getenv('CACHE_SNAPSHOT_PATH')
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv('CACHE_SNAPSHOT_INTERVAL', '300'))
+SNAPSHOT_VERSION        = 2
+TOKEN_MIN_REMAINING     = 60  # seconds of validity a restored Spotify token must still have
+
+
+def _spotify_token() -> Optional[Dict]:
+    import add_album
+    sp = add_album._clients.get('spotify')
+    cache_handler = getattr(getattr(sp, 'auth_manager', None), 'cache_handler', None)
+    if cache_handler is None:
+        return None
+    return cache_handler.get_cached_token()
+
+
+def collect() -> Dict:
+    """Gather the current caches into a JSON-serialisable snapshot."""
+    import add_album
+    import github_push
+    from sheet_cache import sheet_key_for
+
+    return {
+        'version': SNAPSHOT_VERSION,
+        'saved_at': time.time(),
+        'spotify_token': _spotify_token(),
+        'headers': {sheet_key_for(ws): layout for ws, layout in add_album.header_layouts()},
+        'github': github_push.publish_states(),
+    }
+
+
+def save(path: Optional[str] = None, snapshot: Optional[Dict] = None) -> bool:
+    """Write the snapshot atomically; returns False if disabled or the write failed."""
+    path = path or CACHE_SNAPSHOT_PATH
+    if not path:
+        return False
+    snapshot = collect() if snapshot is None else snapshot
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as tmp:
+            tmp_path = tmp.name
+            with gzip.GzipFile(fileobj=tmp, mode='wb') as gz:
+                gz.write(json.dumps(snapshot, separators=(',', ':')).encode('utf-8'))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning('Could not write cache snapshot %s: %s', path, e)
+        # Don't leave a copy of the Spotify token behind in a stray .tmp file
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return False
+    logger.info('Cache snapshot saved', extra={'path': path, 'sheets': len(snapshot['headers'])})
+    return True
+
+
+def load(path: Optional[str] = None) -> Optional[Dict]:
+    """Read a snapshot; None if disabled, missing, corrupt or from another version."""
+    path = path or CACHE_SNAPSHOT_PATH
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        with gzip.open(path, 'rb') as f:
+            snapshot = json.loads(f.read().decode('utf-8'))
+    except (OSError, ValueError) as e:
+        logger.warning('Ignoring unreadable cache snapshot %s: %s', path, e)
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.info('Ignoring cache snapshot %s with a different version', path)
+        return None
+    return snapshot
+
+
+def restore_spotify(snapshot: Dict) -> bool:
+    token = snapshot.get('spotify_token')
+    if not token or token.get('expires_at', 0) - TOKEN_MIN_REMAINING < time.time():
+        return False
+    from add_album import get_spotify_api
+    cache_handler = getattr(getattr(get_spotify_api(), 'auth_manager', None), 'cache_handler', None)
+    if cache_handler is None:
+        return False
+    cache_handler.save_token_to_cache(token)
+    return True
+
+
+def restore_header(worksheet, snapshot: Dict) -> bool:
+    from add_album import prime_header_cache
+    from sheet_cache import sheet_key_for
+
+    layout = snapshot.get('headers', {}).get(sheet_key_for(worksheet))
+    if not layout:
+        return False
+    header_values = worksheet.row_values(layout['header_row'])
+    header_map = {str(name).strip().lower(): idx for idx, name in enumerate(header_values)}
+    if header_map != layout['header_map']:
+        logger.info('Snapshot header layout is stale; rediscovering')
+        return False
+    prime_header_cache(worksheet, layout)
+    return True
+
+
+def restore_github(snapshot: Dict, target: Optional[Dict] = None) -> bool:
+    import github_push
+
+    state = (snapshot.get('github') or {}).get(github_push.target_key(target)) or {}
+    if not state.get('sha'):
+        return False
+    current = github_push.fetch_current_sha(target)
+    if current != state['sha']:
+        # Someone else pushed since; keep the SHA (saves the GET) but not the hash
+        github_push.restore_publish_state(current, None, target)
+        return False
+    github_push.restore_publish_state(state['sha'], state.get('content_hash'), target)
+    return True
+
+
+async def snapshot_loop(interval: Optional[float] = None, path: Optional[str] = None):
+    """Save a snapshot every `interval` seconds until cancelled."""
+    interval = CACHE_SNAPSHOT_INTERVAL if interval is None else interval
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(save, path)
+        except Exception as e:
+            logger.warning('Cache snapshot failed: %s', e)
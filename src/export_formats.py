@@ -0,0 +1,210 @@
+"""Compact alternatives to the row-oriented data.json.
+
+data.json repeats all 14 key names in every record. export_sheet_to_json can
+write these next to it (EXPORT_FORMATS, comma-separated). columnar, msgpack
+and ndjson are local tooling output (scripts, notebooks, jq/DuckDB) and are
+never published: export_and_push pushes data.json and the search index only,
+and the website reads data.json for the albums themselves.
+
+    columnar  data.columnar.json — one array per field, compact separators
+    msgpack   data.msgpack — the same columnar payload as MessagePack
+              (needs the optional msgpack package)
+    ndjson    data.ndjson — one album per line, for streaming tools (jq, DuckDB)
+    search    data.search.json — the site's prebuilt search/sort index
+              (search_index.py; export_and_push publishes it with data.json
+              when PUBLISH_SEARCH_INDEX is on, whatever EXPORT_FORMATS says;
+              not an album list, so
+              load_export does not read it)
+
+Columnar payload:
+
+    {"version": 1, "count": N, "columns": {field: column, ...}}
+
+with one column per data.json field, encoded by FIELD_ENCODINGS:
+
+    int        {"type": "int", "values": [...]}
+    date       {"type": "date", "values": [days since 1970-01-01 | null]}
+    dict       {"type": "dict", "table": [unique strings], "index": [...]}
+    dict_list  {"type": "dict_list", "sep": ", ", "table": [...], "index": [[...], ...]}
+               (a separated list such as genres, one table entry per item)
+    prefix     {"type": "prefix", "prefix": "https://...", "values": [suffix | null]}
+               (null is ''; the prefix is the longest one all values share)
+    str        {"type": "str", "values": [...]}
+
+decode_columnar() turns a payload back into the data.json list exactly.
+"""
+import json
+import os
+from datetime import date
+from typing import Dict, List
+
+from logging_config import setup_logging
+from search_index import build_search_index, source_sha256
+
+logger = setup_logging()
+
+EXPORT_FORMATS = os.getenv('EXPORT_FORMATS', '')
+COLUMNAR_VERSION = 1
+SUFFIXES = {'columnar': '.columnar.json', 'msgpack': '.msgpack', 'ndjson': '.ndjson', 'search': '.search.json'}
+
+_EPOCH = date(1970, 1, 1).toordinal()
+
+FIELD_ENCODINGS = {
+    'spotify_album_id': 'str',
+    'pick_number':      'int',
+    'picked_at':        'date',
+    'artist':           'str',
+    'album':            'str',
+    'year':             'dict',
+    'label':            'dict',
+    'genres':           'dict_list',
+    'total_tracks':     'dict',
+    'artwork_url':      'prefix',
+    'spotify_url':      'prefix',
+    'apple_music_url':  'prefix',
+    'alt_url':          'str',
+    'picker':           'dict',
+}
+
+
+def parse_formats(value) -> List[str]:
+    """'columnar, ndjson' or an iterable → validated list of format names."""
+    if isinstance(value, str):
+        value = value.split(',')
+    formats = [f.strip().lower() for f in value or () if f.strip()]
+    unknown = [f for f in formats if f not in SUFFIXES]
+    if unknown:
+        raise ValueError(f'Unknown export format: {", ".join(unknown)} (choose from {", ".join(SUFFIXES)})')
+    return formats
+
+
+def _table(values):
+    table, index, positions = [], [], {}
+    for value in values:
+        if value not in positions:
+            positions[value] = len(table)
+            table.append(value)
+        index.append(positions[value])
+    return table, index
+
+
+def _encode(kind: str, values: list) -> dict:
+    if kind == 'int':
+        return {'type': kind, 'values': values}
+    if kind == 'date':
+        return {'type': kind, 'values': [date.fromisoformat(v).toordinal() - _EPOCH if v else None
+                                          for v in values]}
+    if kind == 'dict':
+        table, index = _table(values)
+        return {'type': kind, 'table': table, 'index': index}
+    if kind == 'dict_list':
+        table, positions, index = [], {}, []
+        for value in values:
+            items = []
+            for item in value.split(', ') if value else ():
+                if item not in positions:
+                    positions[item] = len(table)
+                    table.append(item)
+                items.append(positions[item])
+            index.append(items)
+        return {'type': kind, 'sep': ', ', 'table': table, 'index': index}
+    if kind == 'prefix':
+        prefix = os.path.commonprefix([v for v in values if v])
+        cut = len(prefix)
+        return {'type': kind, 'prefix': prefix, 'values': [v[cut:] if v else None for v in values]}
+    return {'type': 'str', 'values': values}
+
+
+def _decode(column: dict) -> list:
+    kind = column['type']
+    if kind == 'date':
+        return [date.fromordinal(v + _EPOCH).isoformat() if v is not None else '' for v in column['values']]
+    if kind == 'dict':
+        table = column['table']
+        return [table[i] for i in column['index']]
+    if kind == 'dict_list':
+        table, sep = column['table'], column['sep']
+        return [sep.join(table[i] for i in items) for items in column['index']]
+    if kind == 'prefix':
+        prefix = column['prefix']
+        return [prefix + v if v is not None else '' for v in column['values']]
+    return column['values']  # int, str
+
+
+def encode_columnar(albums: List[Dict]) -> dict:
+    """data.json album list → columnar payload."""
+    fields = list(albums[0]) if albums else list(FIELD_ENCODINGS)
+    columns = {field: _encode(FIELD_ENCODINGS.get(field, 'str'), [a.get(field) for a in albums])
+               for field in fields}
+    return {'version': COLUMNAR_VERSION, 'count': len(albums), 'columns': columns}
+
+
+def decode_columnar(payload: dict) -> List[Dict]:
+    """Columnar payload → the data.json album list (field order preserved)."""
+    if payload.get('version') != COLUMNAR_VERSION:
+        raise ValueError(f'Unsupported columnar version: {payload.get("version")}')
+    names = list(payload['columns'])
+    columns = [_decode(payload['columns'][name]) for name in names]
+    return [dict(zip(names, values)) for values in zip(*columns)] if names else []
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise RuntimeError('The msgpack export format needs the msgpack package (pip install msgpack)') from exc
+    return msgpack
+
+
+def _file_sha256(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return source_sha256(f.read())
+
+
+def write_exports(albums: List[Dict], output_path: str, formats) -> Dict[str, str]:
+    """Write each requested format next to output_path (data.json → data.columnar.json, ...).
+
+    The search index is fingerprinted with the bytes already at output_path.
+
+    Returns {format: path written}.
+    """
+    written = {}
+    base = os.path.splitext(output_path)[0]
+    for fmt in parse_formats(formats):
+        path = base + SUFFIXES[fmt]
+        if fmt == 'ndjson':
+            with open(path, 'w', encoding='utf-8') as f:
+                for album in albums:
+                    f.write(json.dumps(album, ensure_ascii=False, separators=(',', ':')))
+                    f.write('\n')
+        elif fmt in ('columnar', 'search'):
+            if fmt == 'search':
+                payload = build_search_index(albums, _file_sha256(output_path))
+            else:
+                payload = encode_columnar(albums)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            packed = _msgpack().packb(encode_columnar(albums), use_bin_type=True)
+            with open(path, 'wb') as f:
+                f.write(packed)
+        written[fmt] = path
+    if written:
+        logger.info('Wrote %s', ', '.join(written.values()))
+    return written
+
+
+def load_export(path: str) -> List[Dict]:
+    """Read any album export (by suffix) back into the data.json album list."""
+    if path.endswith(SUFFIXES['search']):
+        raise ValueError(f'{path} is a search index, not an album list')
+    if path.endswith(SUFFIXES['msgpack']):
+        with open(path, 'rb') as f:
+            return decode_columnar(_msgpack().unpackb(f.read(), raw=False))
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(SUFFIXES['ndjson']):
+            return [json.loads(line) for line in f if line.strip()]
+        payload = json.load(f)
+    return decode_columnar(payload) if isinstance(payload, dict) else payload
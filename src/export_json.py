@@ -1,18 +1,56 @@
 import json
+import sys
 from typing import List, Dict
 
 from logging_config import setup_logging
-from add_album import get_google_sheet, get_header_row_and_map, parse_sheet_date
-from validation import extract_spotify_album_id
+from add_album import get_google_sheet, get_header_row_and_map
+from album_record import AlbumRecord
+from export_formats import EXPORT_FORMATS, write_exports
+from profiling import profile_from_argv, profiled
+from sheet_cache import get_sheet_replica
 
 logger = setup_logging()
 
 
+def normalize_album_rows(data_rows: List[List[str]], header_map: Dict[str, int]) -> List[Dict]:
+    """Normalize raw sheet data rows into the data.json album structure.
+
+    Rows are returned in sheet order (export_sheet_to_json sorts them).
+    See export_sheet_to_json for the field list.
+    """
+    return [record.to_json() for record in sheet_records(data_rows, header_map)]
+
+
+def sheet_records(data_rows: List[List[str]], header_map: Dict[str, int]) -> List[AlbumRecord]:
+    """AlbumRecords for the exportable rows, in sheet order."""
+    read = AlbumRecord.sheet_reader(header_map)
+    url_col = header_map.get('spotify_album_url')
+    records = []
+    for row in data_rows:
+        # Skip completely empty rows (can appear at end of sheet)
+        if not row or not any(cell.strip() for cell in row):
+            continue
+
+        record = read(row)
+        if not record.spotify_album_id:
+            # Rows must have at least artist + album to be included
+            if not (record.artist and record.album):
+                spotify_url = row[url_col].strip() if url_col is not None and url_col < len(row) else ''
+                logger.warning('Skipping row with invalid Spotify URL: %r', spotify_url)
+                continue
+            logger.info('Including non-Spotify album: %r (alt_url: %r)', record.album, record.alt_url)
+        records.append(record)
+
+    return records
+
+
+@profiled('export_sheet_to_json')
 def export_sheet_to_json(
     sheet_id=None,
     sheet_tab=None,
     creds_path=None,
     output_path='data.json',
+    formats=None,
 ) -> List[Dict]:
     """Read the Google Sheet and write a normalized data.json.
 
@@ -25,69 +63,32 @@ def export_sheet_to_json(
         picked_at         — ISO date string (YYYY-MM-DD), '' if missing
         artist, album, year, artwork_url, spotify_url, apple_music_url, picker
 
+    formats lists extra encodings to write next to output_path (columnar,
+    msgpack, ndjson — local tooling output, see export_formats.py); default
+    EXPORT_FORMATS.
+
     Returns the list of normalized album dicts (also written to output_path).
     """
     worksheet = get_google_sheet(sheet_id, sheet_tab, creds_path)
+    replica = get_sheet_replica(worksheet)
 
-    # header_row is the 0-based index of the header row in the sheet values;
-    # header_map maps lowercase column names → index in each row list.
-    header_row, header_map = get_header_row_and_map(worksheet)
+    if replica is not None:
+        # Local SQLite mirror — one cheap tail probe at most instead of a full read
+        replica.sync(worksheet)
+        header_row, header_map = replica.header()
+        data_rows = replica.data_rows()
+    else:
+        # header_row is the 0-based index of the header row in the sheet values;
+        # header_map maps lowercase column names → index in each row list.
+        header_row, header_map = get_header_row_and_map(worksheet)
 
-    # Fetch every cell in one API call — list of lists, one per row
-    all_values = worksheet.get_all_values()
+        # Fetch every cell in one API call — list of lists, one per row
+        all_values = worksheet.get_all_values()
 
-    # Everything after the header row is data
-    data_rows = all_values[header_row:]
+        # Everything after the header row is data
+        data_rows = all_values[header_row:]
 
-    albums = []
-    for row in data_rows:
-        # Skip completely empty rows (can appear at end of sheet)
-        if not row or not any(cell.strip() for cell in row):
-            continue
-
-        # Build a dict from the header map so we can look up by column name
-        row_dict = {}
-        for col_name, col_idx in header_map.items():
-            row_dict[col_name] = row[col_idx].strip() if col_idx < len(row) else ''
-
-        # Rows must have at least artist + album to be included
-        spotify_url = row_dict.get('spotify_album_url', '')
-        alternative_url = row_dict.get('alt_url', '')
-        album_id = extract_spotify_album_id(spotify_url)
-        if not album_id:
-            if not (row_dict.get('artist', '').strip() and row_dict.get('album', '').strip()):
-                logger.warning('Skipping row with invalid Spotify URL: %r', spotify_url)
-                continue
-            spotify_url = ''
-            logger.info('Including non-Spotify album: %r (alt_url: %r)', row_dict.get('album', ''), alternative_url)
-
-        # Coerce pick number to int; default to 0 if cell is empty or a formula placeholder
-        try:
-            pick_number = int(float(row_dict.get('pick', '') or 0))
-        except (ValueError, TypeError):
-            pick_number = 0
-
-        # Normalise the date to ISO format (YYYY-MM-DD) regardless of sheet format
-        raw_date = row_dict.get('date', '')
-        parsed_date = parse_sheet_date(raw_date)
-        picked_at = parsed_date.isoformat() if parsed_date else ''
-
-        albums.append({
-            'spotify_album_id': album_id,
-            'pick_number':      pick_number,
-            'picked_at':        picked_at,
-            'artist':           row_dict.get('artist', ''),
-            'album':            row_dict.get('album', ''),
-            'year':             row_dict.get('year', ''),
-            'label':            row_dict.get('label', ''),
-            'genres':           row_dict.get('genres', ''),
-            'total_tracks':     row_dict.get('total_tracks', ''),
-            'artwork_url':      row_dict.get('artwork_url', ''),
-            'spotify_url':      spotify_url,
-            'apple_music_url':  row_dict.get('apple_music_url', ''),
-            'alt_url':          alternative_url,
-            'picker':           row_dict.get('picker', ''),
-        })
+    albums = normalize_album_rows(data_rows, header_map)
 
     # Sort ascending by pick number so the frontend gets them in order
     albums.sort(key=lambda x: x['pick_number'])
@@ -96,9 +97,11 @@ def export_sheet_to_json(
         json.dump(albums, f, indent=2, ensure_ascii=False)
 
     logger.info('Exported %d albums to %s', len(albums), output_path)
+    write_exports(albums, output_path, EXPORT_FORMATS if formats is None else formats)
     return albums
 
 
 if __name__ == '__main__':
     # Quick manual test — writes data.json in the current directory
+    profile_from_argv(sys.argv)
     export_sheet_to_json()
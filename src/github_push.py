@@ -1,4 +1,5 @@
 import base64
+import hashlib
 import json
 import os
 import tempfile
@@ -6,8 +7,10 @@ from typing import Optional, Tuple
 
 import requests
 
+from export_formats import SUFFIXES
 from export_json import export_sheet_to_json
 from logging_config import setup_logging
+from metrics import stage_timer, UPSTREAM_ERRORS
 from retry_utils import retry_with_backoff
 
 logger = setup_logging()
@@ -21,6 +24,105 @@ GITHUB_REPO_OWNER = os.getenv('GITHUB_REPO_OWNER')  # e.g. 'davidgreenblott'
 GITHUB_REPO_NAME  = os.getenv('GITHUB_REPO_NAME')   # e.g. 'aotw-website'
 GITHUB_FILE_PATH  = 'public/data.json'               # path inside the repo (Vite serves public/ at root)
 GITHUB_BRANCH     = 'main'
+# data.search.json is published next to data.json (search_index.py); the site
+# builds the index itself while it is missing or stale
+PUBLISH_SEARCH_INDEX = os.getenv('PUBLISH_SEARCH_INDEX', '1').lower() not in ('0', 'false', 'no', 'off')
+
+# Where data.json is published. The default target comes from the env vars
+# above; tenants.py gives each album club its own.
+def github_target(owner=None, repo=None, path=None, branch=None, token=None) -> dict:
+    """A publish target, with unset fields filled from the GITHUB_* config."""
+    return {
+        'owner':  owner  or GITHUB_REPO_OWNER,
+        'repo':   repo   or GITHUB_REPO_NAME,
+        'path':   path   or GITHUB_FILE_PATH,
+        'branch': branch or GITHUB_BRANCH,
+        'token':  token  or GITHUB_TOKEN,
+    }
+
+
+def search_index_target(target: Optional[dict] = None) -> dict:
+    """Where the search index for target's data.json is published (same repo and branch)."""
+    target = target or github_target()
+    return dict(target, path=os.path.splitext(target['path'])[0] + SUFFIXES['search'])
+
+
+def target_key(target: Optional[dict] = None) -> str:
+    target = target or github_target()
+    return f"{target['owner']}/{target['repo']}/{target['path']}@{target['branch']}"
+
+
+# Long-running processes (the bot) remember the blob SHA and content hash of the
+# last push to each target: an unchanged export skips the push entirely, and a
+# known SHA skips the GET. A stale SHA (someone else pushed) is detected by the
+# PUT's 409/422 and refetched. Off by default; cache_snapshot.py persists it
+# across restarts.
+_publish_cache = {'enabled': False, 'targets': {}}
+
+
+def enable_publish_cache():
+    _publish_cache['enabled'] = True
+
+
+def publish_state(target: Optional[dict] = None) -> dict:
+    state = _publish_cache['targets'].get(target_key(target), {})
+    return {'sha': state.get('sha'), 'content_hash': state.get('content_hash')}
+
+
+def publish_states() -> dict:
+    """target key → publish_state() for every target pushed (or restored) so far."""
+    return {key: dict(state) for key, state in _publish_cache['targets'].items()}
+
+
+def restore_publish_state(sha: Optional[str], content_hash: Optional[str], target: Optional[dict] = None) -> None:
+    _publish_cache['targets'][target_key(target)] = {'sha': sha, 'content_hash': content_hash}
+
+
+def content_hash(json_content: str) -> str:
+    return hashlib.sha256(json_content.encode('utf-8')).hexdigest()
+
+
+def git_blob_sha(json_content: str) -> str:
+    """The blob SHA GitHub reports for a file with this content."""
+    data = json_content.encode('utf-8')
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def _contents_endpoint(target: dict) -> Tuple[str, dict]:
+    api_url = (
+        f"https://api.github.com/repos/{target['owner']}/"
+        f"{target['repo']}/contents/{target['path']}"
+    )
+    headers = {
+        'Authorization': f"token {target['token']}",
+        'Accept': 'application/vnd.github.v3+json',
+    }
+    return api_url, headers
+
+
+def fetch_current_sha(target: Optional[dict] = None) -> Optional[str]:
+    """Current blob SHA of data.json on the branch (None if the file doesn't exist)."""
+    target = target or github_target()
+    return _fetch_current_sha(target, *_contents_endpoint(target))
+
+
+def _fetch_current_sha(target: dict, api_url: str, headers: dict) -> Optional[str]:
+    """GET the file's current blob SHA; None if it doesn't exist yet."""
+    logger.info('Fetching current %s SHA from GitHub...', target['path'])
+    with stage_timer('github_get'):
+        get_resp = requests.get(api_url, headers=headers, params={'ref': target['branch']})
+
+    if get_resp.status_code == 200:
+        current_sha = get_resp.json()['sha']
+        logger.info('Found existing file (SHA: %s)', current_sha[:7])
+        return current_sha
+    if get_resp.status_code == 404:
+        logger.info('File does not exist yet — will create it.')
+        return None
+    # Any other status (401, 403, 5xx…) is unexpected — raise to trigger retry
+    UPSTREAM_ERRORS.inc(upstream='github')
+    get_resp.raise_for_status()
+    return None
 
 
 # ---------------------------------------------------------------------------
@@ -32,7 +134,7 @@ GITHUB_BRANCH     = 'main'
     base_delay=2.0,
     exceptions=(requests.exceptions.RequestException,),
 )
-def push_data_to_github(json_content: str, commit_message: str) -> bool:
+def push_data_to_github(json_content: str, commit_message: str, target: Optional[dict] = None) -> bool:
     """Push data.json to a GitHub repo via the REST API.
 
     Uses the GitHub Contents API (PUT /repos/:owner/:repo/contents/:path).
@@ -42,38 +144,36 @@ def push_data_to_github(json_content: str, commit_message: str) -> bool:
     Args:
         json_content:   The JSON string to write into the file.
         commit_message: Git commit message for the change.
+        target:         github_target() to publish to (default: the GITHUB_* config).
 
     Returns:
         True on success. Raises on failure (triggers retry decorator).
     """
-    if not all([GITHUB_TOKEN, GITHUB_REPO_OWNER, GITHUB_REPO_NAME]):
+    target = target or github_target()
+    if not all([target['token'], target['owner'], target['repo']]):
         raise ValueError(
             'GitHub config incomplete. '
             'Set GITHUB_TOKEN, GITHUB_REPO_OWNER, and GITHUB_REPO_NAME env vars.'
         )
 
-    api_url = (
-        f'https://api.github.com/repos/{GITHUB_REPO_OWNER}/'
-        f'{GITHUB_REPO_NAME}/contents/{GITHUB_FILE_PATH}'
-    )
-    headers = {
-        'Authorization': f'token {GITHUB_TOKEN}',
-        'Accept': 'application/vnd.github.v3+json',
-    }
+    api_url, headers = _contents_endpoint(target)
+    file_path = target['path']
 
-    # --- Step 1: Get the current file SHA (required to update an existing file) ---
-    logger.info('Fetching current %s SHA from GitHub...', GITHUB_FILE_PATH)
-    get_resp = requests.get(api_url, headers=headers, params={'ref': GITHUB_BRANCH})
+    new_hash = content_hash(json_content)
+    state = publish_state(target)
+    cached = _publish_cache['enabled'] and state['sha'] is not None
+    if cached and state['content_hash'] == new_hash:
+        logger.info('%s unchanged since last push — skipping', file_path)
+        return True
 
-    current_sha: Optional[str] = None
-    if get_resp.status_code == 200:
-        current_sha = get_resp.json()['sha']
-        logger.info('Found existing file (SHA: %s)', current_sha[:7])
-    elif get_resp.status_code == 404:
-        logger.info('File does not exist yet — will create it.')
-    else:
-        # Any other status (401, 403, 5xx…) is unexpected — raise to trigger retry
-        get_resp.raise_for_status()
+    # --- Step 1: Get the current file SHA (required to update an existing file) ---
+    current_sha = state['sha'] if cached else _fetch_current_sha(target, api_url, headers)
+    if current_sha == git_blob_sha(json_content):
+        # Already on the branch byte-for-byte; a PUT would only add an empty commit
+        logger.info('%s already up to date on GitHub — skipping', file_path)
+        if _publish_cache['enabled']:
+            restore_publish_state(current_sha, new_hash, target)
+        return True
 
     # --- Step 2: Encode the JSON content to base64 (GitHub API requirement) ---
     content_b64 = base64.b64encode(json_content.encode('utf-8')).decode('utf-8')
@@ -82,22 +182,38 @@ def push_data_to_github(json_content: str, commit_message: str) -> bool:
     payload = {
         'message': commit_message,
         'content': content_b64,
-        'branch':  GITHUB_BRANCH,
+        'branch':  target['branch'],
     }
     # SHA must be included when updating; omitted when creating for the first time
     if current_sha:
         payload['sha'] = current_sha
 
     # --- Step 4: Push ---
-    logger.info('Pushing %s to GitHub (%s/%s)...', GITHUB_FILE_PATH, GITHUB_REPO_OWNER, GITHUB_REPO_NAME)
-    put_resp = requests.put(api_url, headers=headers, json=payload)
+    logger.info('Pushing %s to GitHub (%s/%s)...', file_path, target['owner'], target['repo'])
+    with stage_timer('github_put'):
+        put_resp = requests.put(api_url, headers=headers, json=payload)
+
+    if cached and put_resp.status_code in (409, 422):
+        # Remembered SHA is stale — fetch the real one and push once more
+        logger.info('Cached SHA for %s is stale; refetching', file_path)
+        restore_publish_state(None, None, target)
+        current_sha = _fetch_current_sha(target, api_url, headers)
+        payload.pop('sha', None)
+        if current_sha:
+            payload['sha'] = current_sha
+        with stage_timer('github_put'):
+            put_resp = requests.put(api_url, headers=headers, json=payload)
 
     if put_resp.status_code in (200, 201):
-        commit_sha = put_resp.json()['commit']['sha']
+        body = put_resp.json()
+        commit_sha = body['commit']['sha']
         logger.info('GitHub push succeeded. Commit: %s', commit_sha[:7])
+        if _publish_cache['enabled']:
+            restore_publish_state(body.get('content', {}).get('sha'), new_hash, target)
         return True
 
     # Non-success status — raise so the retry decorator can handle transient errors
+    UPSTREAM_ERRORS.inc(upstream='github')
     put_resp.raise_for_status()
     return False  # unreachable, but satisfies type checkers
 
@@ -111,6 +227,8 @@ def export_and_push(
     sheet_tab=None,
     creds_path=None,
     album_info: Optional[dict] = None,
+    commit_message: Optional[str] = None,
+    target: Optional[dict] = None,
 ) -> Tuple[bool, str]:
     """Export the full Google Sheet to JSON, then push it to GitHub.
 
@@ -118,9 +236,21 @@ def export_and_push(
     If the push fails (network blip, quota, etc.) the album is already safely
     stored in the sheet — the next successful push will self-heal.
 
+    With PUBLISH_SEARCH_INDEX (the default) data.search.json is pushed right
+    after data.json, as its own file with its own publish-cache entry. A failed
+    index push is only logged: the index fingerprints the data.json it was
+    built from, so the site ignores a stale one and builds its own.
+
+    That makes two commits per change (two site builds on push-triggered
+    deploys; the first serves a stale index, so the site builds its own until
+    the second lands). This is accepted so the Contents API stays the only
+    GitHub API in use; PUBLISH_SEARCH_INDEX=0 goes back to one commit.
+
     Args:
         sheet_id, sheet_tab, creds_path: Passed through to export_sheet_to_json.
         album_info: Optional dict with 'Artist'/'Album' keys; used in commit message.
+        commit_message: Overrides the generated commit message (batch adds).
+        target: github_target() to publish to (a tenant's); default GITHUB_* env vars.
 
     Returns:
         (success: bool, message: str) — message is suitable for the Telegram reply.
@@ -132,27 +262,42 @@ def export_and_push(
         ) as tmp:
             tmp_path = tmp.name
 
-        export_sheet_to_json(
-            sheet_id=sheet_id,
-            sheet_tab=sheet_tab,
-            creds_path=creds_path,
-            output_path=tmp_path,
-        )
+        search_path = os.path.splitext(tmp_path)[0] + SUFFIXES['search']
+        with stage_timer('export'):
+            export_sheet_to_json(
+                sheet_id=sheet_id,
+                sheet_tab=sheet_tab,
+                creds_path=creds_path,
+                output_path=tmp_path,
+                formats=('search',) if PUBLISH_SEARCH_INDEX else (),  # EXPORT_FORMATS is local-only
+            )
 
         with open(tmp_path, 'r', encoding='utf-8') as f:
             json_content = f.read()
-
         os.unlink(tmp_path)
+        search_content = None
+        if PUBLISH_SEARCH_INDEX:
+            with open(search_path, 'r', encoding='utf-8') as f:
+                search_content = f.read()
+            os.unlink(search_path)
 
         # Build a descriptive commit message if we know which album was just added
-        if album_info:
+        if commit_message:
+            commit_msg = commit_message
+        elif album_info:
             artist = album_info.get('Artist', 'Unknown')
             album  = album_info.get('Album',  'Unknown')
             commit_msg = f'Add {artist} - {album}'
         else:
             commit_msg = 'Update album data'
 
-        push_data_to_github(json_content, commit_msg)
+        push_data_to_github(json_content, commit_msg, target=target)
+        if search_content is not None:
+            try:
+                push_data_to_github(search_content, f'{commit_msg} (search index)',
+                                    target=search_index_target(target))
+            except Exception as e:
+                logger.warning('Search index push failed; the site will build its own: %s', e)
         return True, 'Website will update shortly'
 
     except Exception as e:
@@ -0,0 +1,123 @@
+"""Idempotency store for Telegram webhook updates.
+
+Telegram redelivers a webhook update when it doesn't see a timely 200, and
+drop_pending_updates only helps at startup. Without this a slow album add
+can run twice for one message — a second Spotify lookup, sheet scan and
+GitHub push that ends in a duplicate rejection.
+
+The bot claims each album trigger under two keys, its update_id and its
+(chat ID, message ID), before doing any upstream work:
+
+  * a new key is recorded as in flight and processed normally; the result
+    is stored when the handler finishes
+  * a key already in flight or finished is a redelivery: the stored result
+    (None while still in flight) is returned, nothing is re-run and the
+    chat gets no second reply
+  * a handler that crashes releases its keys so a redelivery can retry
+
+Entries expire after IDEMPOTENCY_TTL seconds (default 3600, well past
+Telegram's retry window) and at most IDEMPOTENCY_MAX_ENTRIES (default
+10000) are kept, oldest evicted first. In memory: a restart forgets them,
+which drop_pending_updates covers.
+"""
+import collections
+import os
+import threading
+import time
+from typing import Hashable, Iterable, Optional
+
+from logging_config import setup_logging
+from metrics import counter, gauge
+
+logger = setup_logging()
+
+IDEMPOTENCY_TTL         = float(os.getenv('IDEMPOTENCY_TTL', '3600'))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000'))
+
+REPLAYS = counter(
+    'aotw_idempotent_replays_total',
+    'Redelivered updates answered from the idempotency store, by state (in_flight, done).',
+    ('state',),
+)
+ENTRIES = gauge(
+    'aotw_idempotency_entries',
+    'Keys held in the idempotency store.',
+)
+
+
+class Entry:
+    """One claimed update: in flight until done() stores its result."""
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+        self.finished = False
+        self.result = None
+
+    def done(self, result) -> None:
+        self.finished = True
+        self.result = result
+
+
+class IdempotencyStore:
+    """Bounded, TTL'd map of update keys → Entry. Thread-safe."""
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = IDEMPOTENCY_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl = IDEMPOTENCY_TTL if ttl is None else ttl
+        self._entries: 'collections.OrderedDict[Hashable, Entry]' = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _purge(self, now: float) -> None:
+        # insertion order == expiry order (fixed TTL), so stop at the first live entry
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
+
+    def claim(self, keys: Iterable[Hashable], now: float = None):
+        """Return (entry, is_new). An existing entry under any key means a redelivery."""
+        keys = list(keys)
+        now = time.time() if now is None else now
+        with self._lock:
+            self._purge(now)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    REPLAYS.inc(state='done' if entry.finished else 'in_flight')
+                    return entry, False
+            entry = Entry(now + self.ttl)
+            for key in keys:
+                self._entries[key] = entry
+            self._purge(now)
+            ENTRIES.set(len(self._entries))
+            return entry, True
+
+    def release(self, keys: Iterable[Hashable]) -> None:
+        """Forget keys whose handler failed, so a redelivery is processed again."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+            ENTRIES.set(len(self._entries))
+
+
+def update_keys(update) -> list:
+    """Idempotency keys for a Telegram update: its update_id and (chat ID, message ID)."""
+    keys = [('update', update.update_id)]
+    message = getattr(update, 'message', None)
+    if message is not None and getattr(message, 'message_id', None) is not None:
+        keys.append(('message', str(update.effective_chat.id), message.message_id))
+    return keys
+
+
+_store: Optional[IdempotencyStore] = None
+
+
+def get_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        _store = IdempotencyStore()
+    return _store
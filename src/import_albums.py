@@ -0,0 +1,225 @@
+"""Bulk import albums into the sheet from a CSV file or a Spotify playlist.
+
+Back-filling a year of picks through add_album.py costs one or two Spotify
+requests and a dedup scan plus an append per album. This does the whole
+list in a handful of requests:
+
+  * a playlist is paged with playlist_items/next (100 tracks per page) and
+    reduced to its unique albums, in playlist order
+  * metadata comes from the several-albums and several-artists endpoints,
+    20 and 50 IDs per request, at most IMPORT_CONCURRENCY (default 4)
+    requests in flight (read through SPOTIFY_CACHE_DB when it is set)
+  * duplicates are checked against one snapshot of the sheet (and within
+    the import itself)
+  * rows go out in append_rows chunks of IMPORT_CHUNK_SIZE (default 500),
+    each under the cross-process append lease (append_lease.py)
+
+CSV columns (header names are case-insensitive; only url is required):
+
+    url,date,picker,apple_music_url
+
+Rows without a date continue weekly from the sheet's last date. Playlist
+imports carry no picker or Apple Music link; scripts/enrich_apple_music.py
+fills the latter in afterwards.
+
+    python src/import_albums.py --csv picks.csv
+    python src/import_albums.py --playlist https://open.spotify.com/playlist/... --dry-run
+
+Prints throughput (albums/s) and the Spotify and Sheets API calls used.
+"""
+import argparse
+import csv
+import os
+import time
+from datetime import timedelta
+
+from add_album import (
+    find_header_cells, get_albums_info, get_existing_album_ids, get_google_sheet,
+    get_header_row_and_map, get_next_pick_number_and_date, get_spotify_api,
+    build_row_from_header, parse_sheet_date, record_tail_append,
+)
+from append_lease import append_lease, ensure_held
+from logging_config import setup_logging
+from metrics import CountingClient, stage_timer
+from profiling import add_profile_args, apply_profile_args, profile_run
+from spotify_cache import get_spotify_cache
+from validation import extract_spotify_album_id, validate_album_metadata
+
+logger = setup_logging()
+
+IMPORT_CONCURRENCY = int(os.getenv('IMPORT_CONCURRENCY', '4'))
+IMPORT_CHUNK_SIZE  = int(os.getenv('IMPORT_CHUNK_SIZE', '500'))
+
+PLAYLIST_FIELDS = 'items(track(album(id))),next'
+
+
+def read_csv(path: str) -> list:
+    """Entries ({'url', 'date', 'picker', 'apple_music_url'}) from an import CSV."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        fields = {name.strip().lower(): name for name in reader.fieldnames or []}
+        if 'url' not in fields:
+            raise ValueError(f'{path}: CSV needs a "url" column')
+        entries = []
+        for row in reader:
+            entry = {key: (row.get(fields[key]) or '').strip() if key in fields else ''
+                     for key in ('url', 'date', 'picker', 'apple_music_url')}
+            if entry['url']:
+                entries.append(entry)
+    return entries
+
+
+def playlist_entries(sp, playlist: str) -> list:
+    """One entry per unique album on a playlist, in playlist order."""
+    album_ids = {}
+    with stage_timer('spotify_playlist'):
+        page = sp.playlist_items(playlist, fields=PLAYLIST_FIELDS, additional_types=('track',))
+        while page:
+            for item in page.get('items', []):
+                album = ((item or {}).get('track') or {}).get('album') or {}
+                if album.get('id'):  # local files and removed tracks have none
+                    album_ids.setdefault(album['id'], None)
+            page = sp.next(page) if page.get('next') else None
+    return [{'url': f'https://open.spotify.com/album/{album_id}', 'date': '', 'picker': '',
+             'apple_music_url': ''} for album_id in album_ids]
+
+
+def _dated_rows(chunk, next_date, header_map, header_row):
+    """Sheet rows for a chunk; undated entries continue weekly after the previous date."""
+    rows, dates = [], []
+    for entry, album_info in chunk:
+        date_value = parse_sheet_date(entry['date']) or next_date
+        next_date = date_value + timedelta(days=7) if date_value else None
+        dates.append(date_value)
+        rows.append(build_row_from_header(header_map, '', date_value, album_info, header_row))
+    return rows, dates
+
+
+def import_albums(entries, sheet_id=None, sheet_tab=None, creds_path=None, sp=None,
+                  chunk_size=None, concurrency=None, dry_run=False) -> dict:
+    """Import entries into the sheet; returns a summary of what happened and what it cost."""
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    concurrency = concurrency or IMPORT_CONCURRENCY
+    started = time.perf_counter()
+    calls = {'spotify': 0, 'sheets': 0}
+    summary = {'requested': len(entries), 'invalid': [], 'not_found': [], 'duplicates': [],
+               'added': 0, 'dry_run': dry_run}
+
+    worksheet = CountingClient(get_google_sheet(sheet_id, sheet_tab, creds_path), calls, 'sheets')
+    from sheet_cache import get_sheet_replica  # local import: sheet_cache imports add_album
+    replica = get_sheet_replica(worksheet)
+    existing = get_existing_album_ids(worksheet, replica=replica)
+
+    wanted = {}  # album_id → entry, first occurrence wins
+    for entry in entries:
+        album_id = extract_spotify_album_id(entry['url'])
+        if not album_id:
+            summary['invalid'].append(entry['url'])
+        elif album_id in existing or album_id in wanted:
+            summary['duplicates'].append(entry['url'])
+        else:
+            wanted[album_id] = entry
+
+    sp = CountingClient(sp or get_spotify_api(), calls, 'spotify')
+    infos = get_albums_info(list(wanted), sp, urls={i: e['url'] for i, e in wanted.items()},
+                            max_workers=concurrency, cache=get_spotify_cache())
+    found = []
+    for album_id, entry in wanted.items():
+        album_info = infos.get(album_id)
+        if album_info is None or not validate_album_metadata(album_info)[0]:
+            summary['not_found'].append(entry['url'])
+            continue
+        album_info['picker'] = entry['picker']
+        album_info['apple_music_url'] = entry['apple_music_url']
+        found.append((entry, album_info))
+
+    for start in range(0, 0 if dry_run else len(found), chunk_size):
+        chunk = found[start:start + chunk_size]
+        with append_lease(worksheet) as lease:
+            if lease is not None and lease.foreign:
+                # another writer appended since the snapshot: drop albums it added
+                if replica is not None:
+                    replica.expire()
+                existing = get_existing_album_ids(worksheet, replica=replica)
+                summary['duplicates'] += [e['url'] for e, info in chunk
+                                          if info['spotify_album_id'] in existing]
+                chunk = [(e, info) for e, info in chunk if info['spotify_album_id'] not in existing]
+                if not chunk:
+                    continue
+            if replica is not None:
+                header_row, header_map = replica.header()
+                _, next_date = get_next_pick_number_and_date(worksheet, header_row, None, None, replica=replica)
+            else:
+                header_row, header_map = get_header_row_and_map(worksheet)
+                pick_cell, date_cell = find_header_cells(worksheet)
+                _, next_date = get_next_pick_number_and_date(worksheet, header_row, pick_cell.col, date_cell.col)
+            rows, dates = _dated_rows(chunk, next_date, header_map, header_row)
+            ensure_held(lease)
+            with stage_timer('sheet_append'):
+                response = worksheet.append_rows(rows, value_input_option='USER_ENTERED')
+            if replica is not None:
+                replica.record_appends(rows, response)
+            else:
+                record_tail_append(worksheet, header_row, dates, response)
+        summary['added'] += len(chunk)
+        logger.info('Imported %d/%d albums', summary['added'], len(found))
+
+    seconds = time.perf_counter() - started
+    processed = len(found) if dry_run else summary['added']
+    summary.update(
+        would_add=len(found) if dry_run else summary['added'],
+        seconds=round(seconds, 3),
+        albums_per_second=round(processed / seconds, 1) if seconds else 0.0,
+        api_calls=dict(calls),
+    )
+    logger.info('Import finished', extra={k: v for k, v in summary.items() if not isinstance(v, list)})
+    return summary
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Bulk import albums into the sheet')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', type=str, help='CSV with url[,date,picker,apple_music_url] columns')
+    source.add_argument('--playlist', type=str, help='Spotify playlist URL, URI or ID')
+    parser.add_argument('--dry-run', action='store_true', help='fetch and dedup, but write nothing')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='rows per append_rows call (or set IMPORT_CHUNK_SIZE)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Spotify requests in flight (or set IMPORT_CONCURRENCY)')
+    parser.add_argument('--sheet-id', type=str, help='Google Sheet ID (or set GOOGLE_SHEET_ID)')
+    parser.add_argument('--sheet-tab', type=str, help='Google Sheet tab name (or set GOOGLE_SHEET_TAB)')
+    parser.add_argument('--service-account-file', type=str,
+                        help='Service account JSON file (or set GOOGLE_SERVICE_ACCOUNT_FILE)')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    apply_profile_args(args)
+    with profile_run('import_albums'):
+        sp = get_spotify_api()
+        if args.csv:
+            entries = read_csv(args.csv)
+            playlist_calls = 0
+        else:
+            calls = {}
+            entries = playlist_entries(CountingClient(sp, calls, 'spotify'), args.playlist)
+            playlist_calls = calls.get('spotify', 0)
+        summary = import_albums(entries, args.sheet_id, args.sheet_tab, args.service_account_file, sp=sp,
+                                chunk_size=args.chunk_size, concurrency=args.concurrency,
+                                dry_run=args.dry_run)
+    summary['api_calls']['spotify'] += playlist_calls
+
+    verb = 'Would add' if args.dry_run else 'Added'
+    print(f"{verb} {summary['would_add']} of {summary['requested']} albums in {summary['seconds']:.1f}s "
+          f"({summary['albums_per_second']} albums/s)")
+    print(f"Skipped: {len(summary['duplicates'])} already in the sheet, "
+          f"{len(summary['invalid'])} invalid URLs, {len(summary['not_found'])} not found on Spotify")
+    print(f"API calls: {summary['api_calls']['spotify']} Spotify, {summary['api_calls']['sheets']} Sheets")
+    for url in summary['invalid'] + summary['not_found']:
+        print(f'  skipped: {url}')
+
+
+if __name__ == '__main__':
+    main()
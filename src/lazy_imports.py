@@ -0,0 +1,50 @@
+"""Deferred imports for heavy third-party clients (spotipy, gspread, requests).
+
+Each CLI run, GUI launch and Railway cold start pays for every module-level
+import, and the Spotify/Sheets stacks cost ~150ms before any work happens.
+Modules declare those names lazily instead:
+
+    _lazy, __getattr__ = lazy_globals(globals(), {
+        'gspread': ('gspread', None),
+        'SpotifyException': ('spotipy.exceptions', 'SpotifyException'),
+    })
+
+    def get_sheet():
+        gc = _lazy('gspread').service_account(...)
+
+_lazy(name) imports on first use and caches the value as a module global.
+The module-level __getattr__ (PEP 562) keeps `module.name` working for other
+callers and for unittest.mock.patch('module.name') targets; a patched global
+takes precedence over the import.
+"""
+import importlib
+from typing import Callable, Dict, Optional, Tuple, Union
+
+# (module to import, attribute or None for the module itself) — or a zero-arg loader
+Spec = Union[Tuple[str, Optional[str]], Callable[[], object]]
+
+
+def lazy_globals(module_globals: dict, specs: Dict[str, Spec]):
+    """Return (_lazy, __getattr__) for a module whose globals are module_globals."""
+
+    def _lazy(name: str):
+        try:
+            return module_globals[name]
+        except KeyError:
+            pass
+        spec = specs[name]
+        if callable(spec):
+            value = spec()
+        else:
+            module_name, attr = spec
+            module = importlib.import_module(module_name)
+            value = module if attr is None else getattr(module, attr)
+        module_globals[name] = value
+        return value
+
+    def __getattr__(name: str):
+        if name in specs:
+            return _lazy(name)
+        raise AttributeError(f"module {module_globals['__name__']!r} has no attribute {name!r}")
+
+    return _lazy, __getattr__
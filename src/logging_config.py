@@ -1,24 +1,183 @@
+"""Structured, non-blocking logging to stdout (Railway-compatible).
+
+Loggers put records on an in-memory queue; a QueueListener thread formats
+them and writes to stdout, so the event loop never blocks on I/O.
+
+Records are emitted as JSON lines carrying every `extra={...}` field and the
+current correlation ID (set per Telegram update / pipeline run). Set
+LOG_FORMAT=text for the old human-readable format when running locally.
+
+LOG_LEVEL sets the level (default INFO). At LOG_LEVEL=DEBUG, high-volume
+debug logs (such as the text of every group message) are rate-limited per call
+site: at most LOG_DEBUG_RATE records per second (default 20), with a
+`suppressed` count on the next record that gets through.
+"""
+import atexit
+import contextlib
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
+import uuid
+from typing import Optional
+
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('correlation_id', default=None)
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+_RESERVED = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'correlation_id'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def set_correlation_id(value: Optional[str] = None) -> str:
+    """Set the correlation ID for the current context (new random ID if None)."""
+    value = value or uuid.uuid4().hex[:12]
+    _correlation_id.set(value)
+    return value
+
+
+def ensure_correlation_id() -> str:
+    """Return the current correlation ID, creating one if none is set."""
+    return _correlation_id.get() or set_correlation_id()
+
+
+@contextlib.contextmanager
+def correlation_context(value: Optional[str] = None):
+    token = _correlation_id.set(value or uuid.uuid4().hex[:12])
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamp the caller's correlation ID on the record before it is queued."""
+
+    def filter(self, record):
+        record.correlation_id = _correlation_id.get()
+        return True
 
 
-def setup_logging(level=logging.INFO):
-    """Configure structured logging to stdout (Railway-compatible)."""
+class DebugRateLimitFilter(logging.Filter):
+    """Allow at most `rate` DEBUG records per second per call site."""
+
+    def __init__(self, rate: float = 20.0):
+        super().__init__()
+        self.rate = rate
+        self._windows = {}  # (pathname, lineno) → [window_start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate <= 0:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= 1.0:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.rate:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'correlation_id', None):
+            payload['correlation_id'] = record.correlation_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc'] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps extra fields intact for the listener's formatter.
+
+    The stock prepare() bakes the formatted text into msg; here the message is
+    merged with its args and the traceback rendered, but formatting is left to
+    the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _make_formatter():
+    if os.getenv('LOG_FORMAT', 'json').lower() == 'text':
+        return logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+    return JsonFormatter()
+
+
+def _env_level() -> int:
+    name = os.getenv('LOG_LEVEL', 'INFO').strip().upper()
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else logging.INFO
+
+
+def setup_logging(level=None):
+    """Configure non-blocking structured logging to stdout (level defaults to LOG_LEVEL)."""
+    global _listener
     logger = logging.getLogger('aotw')
 
     if logger.handlers:
         return logger
 
-    logger.setLevel(level)
+    logger.setLevel(_env_level() if level is None else level)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_make_formatter())
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(level)
+    queue_handler = _QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(CorrelationFilter())
+    queue_handler.addFilter(DebugRateLimitFilter(float(os.getenv('LOG_DEBUG_RATE', '20'))))
 
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
 
-    logger.addHandler(handler)
+    logger.addHandler(queue_handler)
     return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
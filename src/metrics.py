@@ -0,0 +1,279 @@
+"""In-process metrics with Prometheus text exposition.
+
+Dependency-free on purpose: the bot is a single process, so a small
+thread-safe registry is enough and avoids pulling in prometheus_client.
+
+Usage:
+    from metrics import stage_timer, UPSTREAM_ERRORS
+
+    with stage_timer('dedup'):
+        ...
+    UPSTREAM_ERRORS.inc(upstream='spotify')
+
+web_server.py serves render() on GET /metrics.
+"""
+import contextlib
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # key → [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return int(series[-1]) if series else 0
+
+    def sum(self, **labels) -> float:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[-2] if series else 0.0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                base = list(zip(self.labelnames, key))
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(base + [('le', _format_value(bound))])
+                    lines.append(f'{self.name}_bucket{labels} {_format_value(count)}')
+                lines.append(f'{self.name}_sum{_format_labels(base)} {_format_value(series[-2])}')
+                lines.append(f'{self.name}_count{_format_labels(base)} {_format_value(series[-1])}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render() -> str:
+    """Prometheus text exposition (format 0.0.4) of every registered metric."""
+    return REGISTRY.render()
+
+
+# ---------------------------------------------------------------------------
+# Shared metrics
+# ---------------------------------------------------------------------------
+
+STAGE_LATENCY = histogram(
+    'aotw_stage_duration_seconds',
+    'Time spent in each pipeline stage.',
+    ('stage',),
+)
+RETRIES = counter(
+    'aotw_retries_total',
+    'Retry attempts made by retry_with_backoff.',
+    ('function',),
+)
+CACHE_HITS = counter(
+    'aotw_cache_hits_total',
+    'Reads answered from a local cache.',
+    ('cache',),
+)
+CACHE_MISSES = counter(
+    'aotw_cache_misses_total',
+    'Reads that had to go to the upstream service.',
+    ('cache',),
+)
+UPSTREAM_ERRORS = counter(
+    'aotw_upstream_errors_total',
+    'Failed calls to upstream services.',
+    ('upstream',),
+)
+
+
+@contextlib.contextmanager
+def stage_timer(stage: str):
+    """Time a pipeline stage into STAGE_LATENCY (recorded even if the stage raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        logger.debug('Stage %s took %.3fs', stage, elapsed,
+                     extra={'stage': stage, 'duration_ms': round(elapsed * 1000, 1)})
+
+
+class CountingClient:
+    """Proxy that counts method calls on an API client into calls[api] (one call = one request).
+
+    For one-off commands that report the requests they used (import_albums.py,
+    rebuild.py); non-callable attributes pass through uncounted.
+    """
+
+    def __init__(self, client, calls: dict, api: str):
+        self._client = client
+        self._calls = calls
+        self._api = api
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self._calls[self._api] = self._calls.get(self._api, 0) + 1
+            return attr(*args, **kwargs)
+        return counted
@@ -1,15 +1,20 @@
 import time
-from typing import Dict
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
 
-import requests
-
-from logging_config import setup_logging
+from append_coordinator import get_coordinator
+from append_lease import ensure_held
+from lazy_imports import lazy_globals
+from logging_config import ensure_correlation_id, setup_logging
 from validation import (
     is_valid_spotify_album_url,
     extract_spotify_album_id,
     validate_album_metadata,
 )
-from github_push import export_and_push
+from metrics import stage_timer, UPSTREAM_ERRORS
+from profiling import profiled, to_thread
+from publish_outbox import get_outbox
+from sheet_cache import get_sheet_replica
 from add_album import (
     get_spotify_api,
     get_album_info,
@@ -19,34 +24,144 @@ from add_album import (
     get_next_pick_number_and_date,
     build_row_from_header,
     check_duplicate,
+    get_existing_album_ids,
+    record_tail_append,
 )
 
 logger = setup_logging()
 
+# requests and the GitHub/export stack load on first use, so an invalid-URL
+# rejection never pays for them
+_lazy, __getattr__ = lazy_globals(globals(), {
+    'requests': ('requests', None),
+    'export_and_push': ('github_push', 'export_and_push'),
+    'target_key': ('github_push', 'target_key'),
+})
+
+Progress = Optional[Callable[[str], Awaitable[None]]]
+
 _ODESLI_API = 'https://api.song.link/v1-alpha.1/links'
 
 
 def _fetch_apple_music_url(spotify_url: str) -> str:
     """Look up Apple Music URL via Odesli API. Returns '' on any failure."""
     try:
-        resp = requests.get(_ODESLI_API, params={'url': spotify_url}, timeout=10)
+        with stage_timer('odesli'):
+            resp = _lazy('requests').get(_ODESLI_API, params={'url': spotify_url}, timeout=10)
         if resp.status_code == 200:
             return resp.json().get('linksByPlatform', {}).get('appleMusic', {}).get('url', '')
+        if resp.status_code != 404:
+            UPSTREAM_ERRORS.inc(upstream='odesli')
         return ''
     except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream='odesli')
         logger.warning('Odesli lookup failed: %s', e)
         return ''
 
 
-async def process_album(url: str, sheet_id=None, sheet_tab=None, creds_path=None, picker='', apple_music_url='') -> Dict:
+async def _notify(progress: Progress, text: str) -> None:
+    """Report a completed stage to the caller (e.g. edit the Telegram status reply)."""
+    if progress is None:
+        return
+    try:
+        await progress(text)
+    except Exception as e:
+        logger.warning('Progress callback failed: %s', e)
+
+
+def _sheet_key(sheet_id, sheet_tab) -> str:
+    return f'{sheet_id or ""}:{sheet_tab or ""}'
+
+
+async def _publish(coordinator, sheet_id, sheet_tab, creds_path, outbox_message, target=None, **kwargs):
+    """Export + push under the publish lock; on failure, queue the sync in the outbox.
+
+    Returns (success, message) like export_and_push. A success also clears
+    outbox entries recorded before it started, since the export covers them.
+    """
+    outbox = get_outbox()
+    async with coordinator.publish_lock(_lazy('target_key')(target)):
+        covered = outbox.last_id() if outbox is not None else 0
+        github_success, github_message = await to_thread(
+            _lazy('export_and_push'),
+            sheet_id=sheet_id,
+            sheet_tab=sheet_tab,
+            creds_path=creds_path,
+            target=target,
+            **kwargs,
+        )
+    if outbox is not None:
+        if github_success:
+            if covered:
+                outbox.complete(sheet_id, sheet_tab, up_to_id=covered)
+        else:
+            outbox.enqueue(sheet_id, sheet_tab, commit_message=outbox_message)
+            github_message = 'Website update queued — retrying automatically'
+    return github_success, github_message
+
+
+def _fetch_album_info(url: str):
+    """Spotify album + artist lookup (stages are timed inside get_album_info)."""
+    spotify_start = time.perf_counter()
+    sp = get_spotify_api()
+    album_info = get_album_info(url=url, spot_api=sp)
+    logger.info('Spotify lookup succeeded in %.2fs', time.perf_counter() - spotify_start)
+    return album_info
+
+
+def _next_date(worksheet, replica):
+    """Return (header_row, header_map, next_date) from the replica or the live sheet."""
+    if replica is not None:
+        header_row, header_map = replica.header()
+        _, next_date = get_next_pick_number_and_date(
+            worksheet, header_row, None, None, replica=replica
+        )
+    else:
+        header_row, header_map = get_header_row_and_map(worksheet)
+        pick_cell, date_cell = find_header_cells(worksheet)
+        _, next_date = get_next_pick_number_and_date(
+            worksheet, header_row, pick_cell.col, date_cell.col
+        )
+    return header_row, header_map, next_date
+
+
+def _append_album_row(worksheet, replica, album_info, lease=None) -> None:
+    """Read the next date and append one row (pick # as =ROW()-N). Caller holds the append lock (and lease)."""
+    with stage_timer('append'):
+        header_row, header_map, next_date = _next_date(worksheet, replica)
+        row = build_row_from_header(header_map, '', next_date, album_info, header_row)
+        ensure_held(lease)
+        response = worksheet.append_row(row, value_input_option='USER_ENTERED')
+        if replica is not None:
+            replica.record_append(row, response)
+        else:
+            record_tail_append(worksheet, header_row, [next_date], response)
+
+
+@profiled('process_album')
+async def process_album(url: str, sheet_id=None, sheet_tab=None, creds_path=None, picker='', apple_music_url='',
+                        progress: Progress = None, github_target: Optional[dict] = None) -> Dict:
     """Main pipeline orchestrator.
 
+    Each step is timed into the aotw_stage_duration_seconds histogram (see metrics.py).
+    Blocking Sheets/Spotify/Odesli/GitHub calls run in worker threads so concurrent
+    updates overlap; the append and the push are ordered by append_coordinator, and
+    concurrent requests for the same album share one run.
+
+    progress, if given, is awaited with a short status line as stages complete
+    (metadata found, added to sheet); its failures never fail the pipeline.
+
+    github_target (github_push.github_target(), e.g. a tenant's) picks the website
+    to publish to; default is the GITHUB_* env config.
+
     Returns: {'success': bool, 'message': str, 'data': dict}
     """
-    start_time = time.time()
+    ensure_correlation_id()
 
     # Step 1: URL validation
-    if not is_valid_spotify_album_url(url):
+    with stage_timer('validation'):
+        url_ok = is_valid_spotify_album_url(url)
+    if not url_ok:
         logger.warning('Invalid URL format: %s', url)
         return {
             'success': False,
@@ -54,20 +169,39 @@ async def process_album(url: str, sheet_id=None, sheet_tab=None, creds_path=None
         }
 
     album_id = extract_spotify_album_id(url)
-    logger.info('Processing album: %s', album_id)
+    return await get_coordinator().single_flight(
+        f'{_sheet_key(sheet_id, sheet_tab)}/{album_id}',
+        lambda: _process_album(url, album_id, sheet_id, sheet_tab, creds_path, picker, apple_music_url, progress,
+                               github_target),
+    )
+
+
+async def _process_album(url, album_id, sheet_id, sheet_tab, creds_path, picker, apple_music_url, progress,
+                         github_target=None) -> Dict:
+    coordinator = get_coordinator()
+    sheet_key = _sheet_key(sheet_id, sheet_tab)
+    logger.info('Processing album: %s', album_id, extra={'album_id': album_id, 'picker': picker})
 
     # Step 2: Get Google Sheet for dedup check
     try:
-        worksheet = get_google_sheet(sheet_id, sheet_tab, creds_path)
+        with stage_timer('sheet_open'):
+            worksheet = await to_thread(get_google_sheet, sheet_id, sheet_tab, creds_path)
     except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream='sheets')
         logger.error('Sheet access failed: %s', e)
         return {
             'success': False,
             'message': "❌ Failed to access Google Sheet. Please try again later.",
         }
 
-    # Step 3: Deduplication check
-    is_duplicate, dup_message = check_duplicate(url, worksheet)
+    # Optional local SQLite mirror of the sheet (None unless SHEET_CACHE_DB is set)
+    replica = get_sheet_replica(worksheet)
+
+    # Step 3: Deduplication check (optimistic — re-checked under the append lock
+    # only if another run appended in the meantime)
+    generation = coordinator.generation(sheet_key)
+    with stage_timer('dedup'):
+        is_duplicate, dup_message = await to_thread(check_duplicate, url, worksheet, replica=replica)
     if is_duplicate:
         logger.info('Duplicate detected: %s - %s', album_id, dup_message)
         return {
@@ -77,11 +211,9 @@ async def process_album(url: str, sheet_id=None, sheet_tab=None, creds_path=None
 
     # Step 4: Fetch Spotify metadata
     try:
-        sp = get_spotify_api()
-        album_info = get_album_info(url=url, spot_api=sp)
-        spotify_latency = time.time() - start_time
-        logger.info('Spotify lookup succeeded in %.2fs', spotify_latency)
+        album_info = await to_thread(_fetch_album_info, url)
     except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream='spotify')
         logger.error('Spotify lookup failed: %s', e)
         return {
             'success': False,
@@ -103,9 +235,13 @@ async def process_album(url: str, sheet_id=None, sheet_tab=None, creds_path=None
             'message': f"❌ {validation_error}",
         }
 
+    artist = album_info.get('Artist', 'Unknown')
+    album_name = album_info.get('Album', 'Unknown')
+    await _notify(progress, f"🔎 Found *{album_name}* by *{artist}* — adding to sheet…")
+
     # Step 5.5: Use caller-supplied Apple Music URL; fall back to Odesli only if not provided
     if not apple_music_url:
-        apple_music_url = _fetch_apple_music_url(url)
+        apple_music_url = await to_thread(_fetch_apple_music_url, url)
         if apple_music_url:
             logger.info('Apple Music URL found via Odesli for %s', album_id)
         else:
@@ -113,33 +249,42 @@ async def process_album(url: str, sheet_id=None, sheet_tab=None, creds_path=None
     album_info['apple_music_url'] = apple_music_url
     album_info['picker'] = picker
 
-    # Step 6: Append to Google Sheet (pick # written as =ROW()-N formula)
+    # Step 6: Append to Google Sheet — the only step serialized per sheet
     try:
-        header_row, header_map = get_header_row_and_map(worksheet)
-        pick_cell, date_cell = find_header_cells(worksheet)
-        _, next_date = get_next_pick_number_and_date(
-            worksheet, header_row, pick_cell.col, date_cell.col
-        )
-        row = build_row_from_header(header_map, '', next_date, album_info, header_row)
-        worksheet.append_row(row, value_input_option='USER_ENTERED')
+        async with coordinator.append_lock(sheet_key, worksheet) as lease:
+            if lease is not None and lease.foreign and replica is not None:
+                replica.expire()  # another process appended since we last held the lease
+            if coordinator.generation(sheet_key) != generation or (lease is not None and lease.foreign):
+                is_duplicate, dup_message = await to_thread(
+                    check_duplicate, url, worksheet, replica=replica
+                )
+                if is_duplicate:
+                    logger.info('Duplicate detected under append lock: %s', album_id)
+                    return {
+                        'success': False,
+                        'message': f"❌ {dup_message}",
+                    }
+            await to_thread(_append_album_row, worksheet, replica, album_info, lease)
+            coordinator.mark_appended(sheet_key)
         logger.info('Sheet append succeeded for album: %s', album_id)
     except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream='sheets')
         logger.error('Sheet append failed: %s', e)
         return {
             'success': False,
             'message': "❌ Failed to add album to sheet. Please try again.",
         }
 
-    artist = album_info.get('Artist', 'Unknown')
-    album_name = album_info.get('Album', 'Unknown')
+    await _notify(progress, f"📝 Added *{album_name}* by *{artist}* to sheet — updating website…")
 
     # Step 7: Export sheet to JSON and push to GitHub so the website stays in sync.
     # The sheet is the source of truth — if the push fails the album is still safely
-    # stored, and the next successful run will self-heal the website.
-    github_success, github_message = export_and_push(
-        sheet_id=sheet_id,
-        sheet_tab=sheet_tab,
-        creds_path=creds_path,
+    # stored; the outbox reconciler (publish_outbox.py) or the next successful run
+    # will self-heal the website.
+    github_success, github_message = await _publish(
+        coordinator, sheet_id, sheet_tab, creds_path,
+        outbox_message=f'Add {artist} - {album_name}',
+        target=github_target,
         album_info=album_info,
     )
 
@@ -163,3 +308,182 @@ async def process_album(url: str, sheet_id=None, sheet_tab=None, creds_path=None
         ),
         'data': album_info,
     }
+
+
+def _lookup_batch(entries, pending, results) -> Dict[int, Dict]:
+    """Spotify metadata, validation and Apple Music link for each pending entry."""
+    album_infos = {}
+    try:
+        sp = get_spotify_api()
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream='spotify')
+        logger.error('Spotify client setup failed: %s', e)
+        sp = None
+    for i in pending:
+        url = entries[i]['url']
+        try:
+            album_info = get_album_info(url=url, spot_api=sp) if sp is not None else None
+        except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream='spotify')
+            logger.error('Spotify lookup failed for %s: %s', url, e)
+            album_info = None
+        if not album_info:
+            results[i]['message'] = f"❌ Couldn't fetch album info from Spotify: {url}"
+            continue
+        is_valid, validation_error = validate_album_metadata(album_info)
+        if not is_valid:
+            results[i]['message'] = f"❌ {validation_error}"
+            continue
+        album_info['apple_music_url'] = entries[i].get('apple_music_url') or _fetch_apple_music_url(url)
+        album_info['picker'] = entries[i].get('picker', '')
+        album_infos[i] = album_info
+    return album_infos
+
+
+def _append_album_rows(worksheet, replica, album_infos, lease=None) -> None:
+    """Append several albums in one call at consecutive weekly dates. Caller holds the append lock (and lease)."""
+    with stage_timer('append'):
+        header_row, header_map, next_date = _next_date(worksheet, replica)
+        dates = [next_date + timedelta(days=7 * offset) if next_date else None for offset in range(len(album_infos))]
+        rows = [build_row_from_header(header_map, '', date_value, album_info, header_row)
+                for date_value, album_info in zip(dates, album_infos)]
+        ensure_held(lease)
+        response = worksheet.append_rows(rows, value_input_option='USER_ENTERED')
+        if replica is not None:
+            replica.record_appends(rows, response)
+        else:
+            record_tail_append(worksheet, header_row, dates, response)
+
+
+@profiled('process_albums_batch')
+async def process_albums_batch(entries: List[Dict], sheet_id=None, sheet_tab=None, creds_path=None,
+                               progress: Progress = None, github_target: Optional[dict] = None) -> Dict:
+    """Add several albums from one message with one sheet snapshot, one append and one push.
+
+    entries: [{'url': str, 'apple_music_url': str, 'picker': str}, ...] in message order.
+
+    Albums that fail validation, dedup or the Spotify lookup are reported and
+    skipped; the rest are appended together with consecutive weekly dates.
+
+    Returns: {'success': bool, 'message': str, 'results': [per-album dicts], 'data': [album_info, ...]}
+    """
+    ensure_correlation_id()
+    results = [{'url': entry['url'], 'success': False, 'message': ''} for entry in entries]
+
+    def reply(added, github_line=''):
+        lines = [f"Added {len(added)} of {len(entries)} albums:"]
+        lines.extend(r['message'] for r in results)
+        if github_line:
+            lines.append(github_line)
+        return '\n'.join(lines)
+
+    # Step 1: URL validation
+    with stage_timer('validation'):
+        for entry, result in zip(entries, results):
+            if not is_valid_spotify_album_url(entry['url']):
+                result['message'] = f"❌ Invalid Spotify album link: {entry['url']}"
+    pending = [i for i, r in enumerate(results) if not r['message']]
+    if not pending:
+        return {'success': False, 'message': reply([]), 'results': results}
+
+    # Step 2: One sheet handle for the whole batch
+    try:
+        with stage_timer('sheet_open'):
+            worksheet = await to_thread(get_google_sheet, sheet_id, sheet_tab, creds_path)
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream='sheets')
+        logger.error('Sheet access failed: %s', e)
+        return {
+            'success': False,
+            'message': "❌ Failed to access Google Sheet. Please try again later.",
+            'results': results,
+        }
+    replica = get_sheet_replica(worksheet)
+    coordinator = get_coordinator()
+    sheet_key = _sheet_key(sheet_id, sheet_tab)
+
+    # Step 3: Dedup against one snapshot of the sheet, and within the batch itself
+    generation = coordinator.generation(sheet_key)
+    with stage_timer('dedup'):
+        existing = await to_thread(get_existing_album_ids, worksheet, replica=replica)
+    seen = set()
+    for i in list(pending):
+        album_id = extract_spotify_album_id(entries[i]['url'])
+        if album_id in existing:
+            pick, date = existing[album_id]
+            results[i]['message'] = f"❌ Already added — Pick #{pick} on {date}"
+        elif album_id in seen:
+            results[i]['message'] = "❌ Listed twice in this message"
+        else:
+            seen.add(album_id)
+            continue
+        pending.remove(i)
+
+    # Step 4-5: Spotify metadata + validation, per album
+    album_infos = await to_thread(_lookup_batch, entries, pending, results) if pending else {}
+    if album_infos:
+        await _notify(progress, f"🔎 Found {len(album_infos)} of {len(entries)} albums — adding to sheet…")
+
+    if not album_infos:
+        return {'success': False, 'message': reply([]), 'results': results}
+
+    # Step 6: One append_rows call for every album that made it through
+    try:
+        async with coordinator.append_lock(sheet_key, worksheet) as lease:
+            if lease is not None and lease.foreign and replica is not None:
+                replica.expire()  # another process appended since we last held the lease
+            if coordinator.generation(sheet_key) != generation or (lease is not None and lease.foreign):
+                existing = await to_thread(get_existing_album_ids, worksheet, replica=replica)
+                for i in list(album_infos):
+                    album_id = extract_spotify_album_id(entries[i]['url'])
+                    if album_id in existing:
+                        pick, date = existing[album_id]
+                        results[i]['message'] = f"❌ Already added — Pick #{pick} on {date}"
+                        del album_infos[i]
+            order = sorted(album_infos)
+            if order:
+                await to_thread(_append_album_rows, worksheet, replica, [album_infos[i] for i in order], lease)
+                coordinator.mark_appended(sheet_key)
+        logger.info('Sheet append succeeded for %d albums', len(order))
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(upstream='sheets')
+        logger.error('Sheet batch append failed: %s', e)
+        for i in album_infos:
+            results[i]['message'] = "❌ Failed to add album to sheet. Please try again."
+        return {'success': False, 'message': reply([]), 'results': results}
+    if not order:
+        return {'success': False, 'message': reply([]), 'results': results}
+
+    added = [album_infos[i] for i in order]
+    for i in order:
+        results[i]['success'] = True
+        results[i]['message'] = f"✅ *{album_infos[i].get('Album', 'Unknown')}* by *{album_infos[i].get('Artist', 'Unknown')}*"
+
+    await _notify(progress, f"📝 Added {len(added)} albums to sheet — updating website…")
+
+    # Step 7: One export + push for the whole batch
+    titles = '; '.join(f"{a.get('Artist', 'Unknown')} - {a.get('Album', 'Unknown')}" for a in added)
+    commit_message = f'Add {len(added)} albums: {titles}'
+    github_success, github_message = await _publish(
+        coordinator, sheet_id, sheet_tab, creds_path,
+        outbox_message=commit_message,
+        target=github_target,
+        commit_message=commit_message,
+    )
+
+    if not github_success:
+        logger.warning('GitHub push failed but sheet updated: %s', github_message)
+        return {
+            'success': True,
+            'message': reply(added, f"⚠️ {github_message}"),
+            'results': results,
+            'data': added,
+            'partial_failure': True,
+        }
+
+    return {
+        'success': True,
+        'message': reply(added, f"🌐 {github_message}"),
+        'results': results,
+        'data': added,
+    }
@@ -0,0 +1,266 @@
+"""Opt-in CPU and memory profiling for pipeline runs and batch scripts.
+
+Disabled by default. Enable with an environment variable:
+
+    AOTW_PROFILE=1            cProfile + tracemalloc
+    AOTW_PROFILE=cpu          cProfile only
+    AOTW_PROFILE=mem          tracemalloc only
+    AOTW_PROFILE_DIR=profiles output directory (default: ./profiles)
+
+or with --profile on the CLI entry points (add_album.py, export_json.py,
+scripts/enrich_*.py); --profile-dir overrides the output directory.
+
+Each profiled run writes, under a unique run ID:
+    <run_id>.prof        raw cProfile stats (open with snakeviz / pstats)
+    <run_id>.cpu.txt     top functions by cumulative time
+    <run_id>.mem.txt     top allocation sites from a tracemalloc snapshot
+
+When disabled, profile_run()/profiled() cost a single flag check per call.
+Nested profiled calls (export_sheet_to_json inside process_album) are folded
+into the outermost run.
+
+cProfile only sees the thread that enabled it, and the pipeline does its
+Sheets/Spotify/export work in worker threads. The active run is a ContextVar,
+which asyncio.to_thread copies into the worker; profiling.to_thread() (a
+drop-in for asyncio.to_thread) profiles the call there and merges it into
+the run's .prof. Concurrent runs on one event loop each get their own report
+and worker-thread stats; the loop thread itself can only be profiled by one
+run at a time, so a second concurrent run reports worker threads only.
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Optional
+
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+TOP_N = 30
+
+
+def _parse_mode(value: Optional[str]):
+    value = (value or '').strip().lower()
+    if value in ('', '0', 'false', 'no', 'off'):
+        return False, False
+    if value == 'cpu':
+        return True, False
+    if value in ('mem', 'memory'):
+        return False, True
+    return True, True
+
+
+_cpu, _mem = _parse_mode(os.getenv('AOTW_PROFILE'))
+_config = {
+    'cpu': _cpu,
+    'mem': _mem,
+    'dir': os.getenv('AOTW_PROFILE_DIR', 'profiles'),
+}
+_active_run = contextvars.ContextVar('profile_run', default=None)
+_thread_state = threading.local()  # .profiling: a run's profiler is enabled on this thread
+_tracemalloc = {'users': 0, 'owned': False}
+_tracemalloc_lock = threading.Lock()
+
+
+class _Run:
+    """One profiled run: its ID and the cProfile profilers of every thread it ran on."""
+
+    def __init__(self, run_id: str, cpu: bool):
+        self.run_id = run_id
+        self.cpu = cpu
+        self.profilers = []
+        self._lock = threading.Lock()
+
+    def start_thread_profiler(self):
+        """Enable a profiler on the calling thread for this run; None if the thread is taken."""
+        if not self.cpu or getattr(_thread_state, 'profiling', False):
+            return None
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Python 3.12+: one cProfile per process, and it already sees every thread
+            return None
+        _thread_state.profiling = True
+        return profiler
+
+    def stop_thread_profiler(self, profiler) -> None:
+        if profiler is None:
+            return
+        profiler.disable()
+        _thread_state.profiling = False
+        with self._lock:
+            self.profilers.append(profiler)
+
+
+def _tracemalloc_acquire() -> None:
+    with _tracemalloc_lock:
+        if _tracemalloc['users'] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            _tracemalloc['owned'] = True
+        _tracemalloc['users'] += 1
+
+
+def _tracemalloc_release() -> None:
+    with _tracemalloc_lock:
+        _tracemalloc['users'] -= 1
+        if _tracemalloc['users'] == 0 and _tracemalloc['owned']:
+            tracemalloc.stop()
+            _tracemalloc['owned'] = False
+
+
+def enable_profiling(output_dir: Optional[str] = None, cpu: bool = True, mem: bool = True) -> None:
+    """Turn profiling on for this process (used by --profile CLI flags)."""
+    _config['cpu'] = cpu
+    _config['mem'] = mem
+    if output_dir:
+        _config['dir'] = output_dir
+
+
+def disable_profiling() -> None:
+    _config['cpu'] = False
+    _config['mem'] = False
+
+
+def is_enabled() -> bool:
+    return _config['cpu'] or _config['mem']
+
+
+def add_profile_args(parser) -> None:
+    """Add --profile / --profile-dir to an argparse parser."""
+    parser.add_argument('--profile', action='store_true',
+                        help='write cProfile + tracemalloc reports (or set AOTW_PROFILE=1)')
+    parser.add_argument('--profile-dir', type=str, default=None,
+                        help='directory for profile output (or set AOTW_PROFILE_DIR)')
+
+
+def apply_profile_args(args) -> None:
+    if getattr(args, 'profile', False):
+        enable_profiling(getattr(args, 'profile_dir', None))
+
+
+def profile_from_argv(argv: list) -> None:
+    """Strip --profile / --profile-dir=DIR from argv in place and enable profiling.
+
+    For the scripts that read sys.argv positionally instead of using argparse.
+    """
+    for arg in list(argv[1:]):
+        if arg == '--profile':
+            argv.remove(arg)
+            enable_profiling()
+        elif arg.startswith('--profile-dir='):
+            argv.remove(arg)
+            _config['dir'] = arg.split('=', 1)[1]
+
+
+def new_run_id(name: str) -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+
+
+@contextlib.contextmanager
+def profile_run(name: str):
+    """Profile the enclosed block if profiling is enabled; yields the run ID or None."""
+    if not (_config['cpu'] or _config['mem']) or _active_run.get() is not None:
+        yield None
+        return
+
+    import cProfile  # profiler modules load only when profiling is on
+    import io
+    import pstats
+
+    run = _Run(new_run_id(name), _config['cpu'])
+    out_dir = _config['dir']
+    os.makedirs(out_dir, exist_ok=True)
+    token = _active_run.set(run)
+
+    mem = _config['mem']
+    if mem:
+        _tracemalloc_acquire()
+
+    start = time.perf_counter()
+    profiler = run.start_thread_profiler()
+    try:
+        yield run.run_id
+    finally:
+        run.stop_thread_profiler(profiler)
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot() if mem and tracemalloc.is_tracing() else None
+        peak = tracemalloc.get_traced_memory()[1] if snapshot is not None else None
+        if mem:
+            _tracemalloc_release()
+        _active_run.reset(token)
+
+        base = os.path.join(out_dir, run.run_id)
+        if run.cpu:
+            stats = pstats.Stats(*(run.profilers or [cProfile.Profile()]))
+            stats.dump_stats(f'{base}.prof')
+            buf = io.StringIO()
+            stats.stream = buf
+            stats.sort_stats('cumulative').print_stats(TOP_N)
+            with open(f'{base}.cpu.txt', 'w', encoding='utf-8') as f:
+                f.write(f'{name}: {elapsed:.3f}s wall, {len(run.profilers)} thread profile(s) merged\n\n')
+                f.write(buf.getvalue())
+        if snapshot is not None:
+            _write_memory_report(f'{base}.mem.txt', name, snapshot, peak)
+        logger.info('Profile for %s written to %s.* (%.3fs)', name, base, elapsed,
+                    extra={'run_id': run.run_id, 'profile_dir': out_dir})
+
+
+def _call_in_run(run: _Run, func, args, kwargs):
+    profiler = run.start_thread_profiler()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        run.stop_thread_profiler(profiler)
+
+
+async def to_thread(func, *args, **kwargs):
+    """asyncio.to_thread that profiles the worker-thread call into the active run, if any."""
+    run = _active_run.get()
+    if run is None or not run.cpu:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return await asyncio.to_thread(_call_in_run, run, func, args, kwargs)
+
+
+def _write_memory_report(path: str, name: str, snapshot, peak) -> None:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    stats = snapshot.statistics('lineno')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'{name}: peak traced memory {peak / 1024:.1f} KiB\n')
+        f.write(f'Top {TOP_N} allocation sites:\n\n')
+        for stat in stats[:TOP_N]:
+            f.write(f'{stat}\n')
+
+
+def profiled(name: Optional[str] = None):
+    """Decorator form of profile_run for sync and async functions."""
+    def decorator(func):
+        run_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not (_config['cpu'] or _config['mem']):
+                    return await func(*args, **kwargs)
+                with profile_run(run_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (_config['cpu'] or _config['mem']):
+                return func(*args, **kwargs)
+            with profile_run(run_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,231 @@
+"""Durable outbox for website syncs that failed, plus the background reconciler.
+
+When the export → GitHub push after an append fails, the album is safe in
+the sheet but the website is stale. Instead of waiting for the next
+successful add (possibly a week away), the pipeline records the pending
+publish here and the bot's reconcile_loop() retries it:
+
+  * every OUTBOX_POLL_INTERVAL seconds (default 30), entries whose retry
+    time has come are pushed
+  * all pending entries for the same sheet are coalesced into one push —
+    the export is a full snapshot, so one success covers every entry
+    recorded before it started
+  * a failed attempt backs off exponentially from OUTBOX_RETRY_BASE
+    (default 30s) up to OUTBOX_RETRY_MAX (default 600s)
+  * a successful push from the normal pipeline also clears the outbox
+
+Outbox depth and the age of the oldest entry are exported as gauges on
+/metrics. Entries live in SQLite at PUBLISH_OUTBOX_DB so they survive
+restarts; get_outbox() returns None when no outbox is configured (CLI runs),
+and the bot falls back to an in-memory one. Only the sheet ID and tab are
+stored — never credentials; the reconciler looks up the club that owns the
+sheet (tenants.py) for its credentials and GitHub target.
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from logging_config import setup_logging
+from metrics import gauge, stage_timer
+
+logger = setup_logging()
+
+PUBLISH_OUTBOX_DB    = os.getenv('PUBLISH_OUTBOX_DB')
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '30'))
+OUTBOX_RETRY_BASE    = float(os.getenv('OUTBOX_RETRY_BASE', '30'))
+OUTBOX_RETRY_MAX     = float(os.getenv('OUTBOX_RETRY_MAX', '600'))
+
+OUTBOX_DEPTH = gauge(
+    'aotw_publish_outbox_depth',
+    'Website syncs waiting to be retried.',
+)
+OUTBOX_OLDEST_AGE = gauge(
+    'aotw_publish_outbox_oldest_age_seconds',
+    'Age of the oldest pending website sync (0 when the outbox is empty).',
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS publish_outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    sheet_id        TEXT NOT NULL DEFAULT '',
+    sheet_tab       TEXT NOT NULL DEFAULT '',
+    commit_message  TEXT NOT NULL DEFAULT '',
+    created_at      REAL NOT NULL,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error      TEXT NOT NULL DEFAULT ''
+);
+"""
+
+Target = Tuple[str, str]  # (sheet_id, sheet_tab); '' means "use the env default"
+
+
+def backoff_delay(attempts: int, base: float = None, maximum: float = None) -> float:
+    base = OUTBOX_RETRY_BASE if base is None else base
+    maximum = OUTBOX_RETRY_MAX if maximum is None else maximum
+    return min(maximum, base * (2 ** max(attempts - 1, 0)))
+
+
+class PublishOutbox:
+    """SQLite-backed queue of pending website syncs. Thread-safe."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, sheet_id=None, sheet_tab=None, commit_message: str = '', delay: float = None) -> int:
+        """Record a pending sync; first retry after `delay` seconds (default OUTBOX_RETRY_BASE)."""
+        now = time.time()
+        delay = OUTBOX_RETRY_BASE if delay is None else delay
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                'INSERT INTO publish_outbox (sheet_id, sheet_tab, commit_message, created_at, next_attempt_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (sheet_id or '', sheet_tab or '', commit_message, now, now + delay),
+            )
+            entry_id = cur.lastrowid
+        logger.info('Website sync queued for retry', extra={'outbox_id': entry_id, 'commit_message': commit_message})
+        self.update_metrics()
+        return entry_id
+
+    def last_id(self) -> int:
+        with self._lock:
+            row = self._conn.execute('SELECT MAX(id) FROM publish_outbox').fetchone()
+        return row[0] or 0
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM publish_outbox').fetchone()[0]
+
+    def oldest_age(self, now: float = None) -> float:
+        with self._lock:
+            oldest = self._conn.execute('SELECT MIN(created_at) FROM publish_outbox').fetchone()[0]
+        return 0.0 if oldest is None else max(0.0, (now or time.time()) - oldest)
+
+    def due(self, now: float = None) -> Dict[Target, List[Tuple[int, str, int]]]:
+        """Pending entries grouped by target, for every target with at least one entry due.
+
+        Values are [(id, commit_message, attempts), ...] — the whole group, not
+        just the due entries, since one push covers them all.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, sheet_id, sheet_tab, commit_message, attempts, next_attempt_at '
+                'FROM publish_outbox ORDER BY id'
+            ).fetchall()
+        groups: Dict[Target, List[Tuple[int, str, int]]] = {}
+        due_targets = set()
+        for entry_id, sheet_id, sheet_tab, message, attempts, next_attempt_at in rows:
+            groups.setdefault((sheet_id, sheet_tab), []).append((entry_id, message, attempts))
+            if next_attempt_at <= now:
+                due_targets.add((sheet_id, sheet_tab))
+        return {target: entries for target, entries in groups.items() if target in due_targets}
+
+    def complete(self, sheet_id=None, sheet_tab=None, up_to_id: int = None) -> int:
+        """Drop entries for a target that a successful push covered (ids <= up_to_id)."""
+        up_to_id = self.last_id() if up_to_id is None else up_to_id
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                'DELETE FROM publish_outbox WHERE sheet_id = ? AND sheet_tab = ? AND id <= ?',
+                (sheet_id or '', sheet_tab or '', up_to_id),
+            )
+        self.update_metrics()
+        return cur.rowcount
+
+    def defer(self, ids: List[int], error: str, now: float = None) -> None:
+        """Record a failed attempt and schedule the next one with exponential backoff."""
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            for entry_id in ids:
+                row = self._conn.execute('SELECT attempts FROM publish_outbox WHERE id = ?', (entry_id,)).fetchone()
+                if row is None:
+                    continue
+                attempts = row[0] + 1
+                self._conn.execute(
+                    'UPDATE publish_outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?',
+                    (attempts, now + backoff_delay(attempts), error, entry_id),
+                )
+        self.update_metrics()
+
+    def update_metrics(self) -> None:
+        OUTBOX_DEPTH.set(self.depth())
+        OUTBOX_OLDEST_AGE.set(self.oldest_age())
+
+
+_outbox: Optional[PublishOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def configure_outbox(db_path: Optional[str]) -> Optional[PublishOutbox]:
+    """Install the process-wide outbox (None disables it)."""
+    global _outbox
+    with _outbox_lock:
+        _outbox = PublishOutbox(db_path) if db_path else None
+    return _outbox
+
+
+def get_outbox() -> Optional[PublishOutbox]:
+    """Return the process-wide outbox, opening PUBLISH_OUTBOX_DB on first use; None if unset."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None and PUBLISH_OUTBOX_DB:
+            _outbox = PublishOutbox(PUBLISH_OUTBOX_DB)
+        return _outbox
+
+
+def _commit_message(entries: List[Tuple[int, str, int]]) -> str:
+    messages = [message for _, message, _ in entries if message]
+    if len(messages) == 1:
+        return messages[0]
+    return f'Sync album data ({len(entries)} pending updates)'
+
+
+async def reconcile_once(outbox: Optional[PublishOutbox] = None, creds_path=None, now: float = None) -> int:
+    """Push every due target once; returns the number of entries cleared."""
+    from append_coordinator import get_coordinator
+    from github_push import export_and_push, target_key
+    from tenants import get_registry
+
+    outbox = outbox or get_outbox()
+    if outbox is None:
+        return 0
+    cleared = 0
+    for (sheet_id, sheet_tab), entries in outbox.due(now).items():
+        ids = [entry_id for entry_id, _, _ in entries]
+        tenant = get_registry().for_sheet(sheet_id, sheet_tab)
+        target = tenant.github_target() if tenant else None
+        async with get_coordinator().publish_lock(target_key(target)):
+            with stage_timer('outbox_publish'):
+                ok, message = await asyncio.to_thread(
+                    export_and_push,
+                    sheet_id=sheet_id or None,
+                    sheet_tab=sheet_tab or None,
+                    creds_path=tenant.creds_path if tenant else creds_path,
+                    commit_message=_commit_message(entries),
+                    target=target,
+                )
+        if ok:
+            cleared += outbox.complete(sheet_id, sheet_tab, up_to_id=max(ids))
+            logger.info('Outbox sync succeeded', extra={'entries': len(ids), 'sheet_tab': sheet_tab})
+        else:
+            outbox.defer(ids, message)
+            logger.warning('Outbox sync failed; will retry', extra={'entries': len(ids)})
+    outbox.update_metrics()
+    return cleared
+
+
+async def reconcile_loop(creds_path=None, interval: float = None):
+    """Run reconcile_once() every `interval` seconds until cancelled."""
+    interval = OUTBOX_POLL_INTERVAL if interval is None else interval
+    while True:
+        try:
+            await reconcile_once(creds_path=creds_path)
+        except Exception as e:
+            logger.error('Outbox reconcile failed: %s', e, exc_info=True)
+        await asyncio.sleep(interval)
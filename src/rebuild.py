@@ -0,0 +1,223 @@
+"""Re-derive every album's Spotify metadata from the sheet's album IDs.
+
+When the mapping from Spotify's album object to sheet columns changes
+(artwork size, genre fallback, label), old rows keep the values they were
+added with. The one-off enrichment scripts refresh them one album at a
+time. This does the whole history at once:
+
+  * one get_all_values read of the sheet
+  * metadata for every album through add_album.get_albums_info — 20 albums
+    and 50 artists per request, IMPORT_CONCURRENCY requests in flight, and
+    read through the SPOTIFY_CACHE_DB cache of raw objects when it is set, so
+    a re-run after a mapping change makes no Spotify requests at all
+  * the current mapping (add_album.parse_album_info) re-applied, and every
+    cell that differs reported as a diff
+
+With --write the corrections go back to the sheet in one batch_update, runs
+of changed cells in the same column coalesced into one range each. The bot's
+sheet watcher (sheet_watch.py) then republishes the website; --output writes
+the rebuilt data.json locally as well.
+
+    python src/rebuild.py                          # diff only
+    python src/rebuild.py --fields artwork_url genres --write
+    python src/rebuild.py --refresh --json diff.json --output data.json
+
+Only metadata columns are rewritten (REBUILD_FIELDS). Pick, date, picker and
+the links are the club's own and are never touched.
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from add_album import get_albums_info, get_google_sheet, get_header_row_and_map, get_spotify_api
+from import_albums import IMPORT_CONCURRENCY
+from logging_config import setup_logging
+from metrics import CountingClient, stage_timer
+from profiling import add_profile_args, apply_profile_args, profile_run
+from spotify_cache import SpotifyCache, get_spotify_cache
+from validation import extract_spotify_album_id
+
+logger = setup_logging()
+
+# sheet column → album_info key (see add_album.parse_album_info)
+REBUILD_FIELDS = {
+    'spotify_album_id': 'spotify_album_id',
+    'artist':           'Artist',
+    'album':            'Album',
+    'year':             'Year',
+    'artwork_url':      'artwork_url',
+    'label':            'Label',
+    'total_tracks':     'Total Tracks',
+    'genres':           'Genres',
+}
+
+
+def _cell(row, col) -> str:
+    return row[col].strip() if col is not None and col < len(row) else ''
+
+
+def _row_album_id(row, header_map) -> str:
+    """Album ID from the row's Spotify URL, else its spotify_album_id cell ('' for neither)."""
+    album_id = (extract_spotify_album_id(_cell(row, header_map.get('spotify_album_url')))
+                or _cell(row, header_map.get('spotify_album_id')))
+    return album_id if len(album_id) == 22 else ''
+
+
+def diff_rows(data_rows, header_row: int, header_map: Dict[str, int], infos: Dict[str, dict],
+              fields=None) -> List[dict]:
+    """Cells whose current value differs from the freshly derived one.
+
+    Returns [{'row', 'album_id', 'field', 'old', 'new'}, ...] with 1-based
+    sheet row numbers, in sheet order.
+    """
+    columns = [f for f in (fields or REBUILD_FIELDS) if f in header_map]
+    changes = []
+    for offset, row in enumerate(data_rows):
+        album_id = _row_album_id(row, header_map)
+        info = infos.get(album_id)
+        if info is None:
+            continue
+        for field in columns:
+            old, new = _cell(row, header_map[field]), str(info.get(REBUILD_FIELDS[field], ''))
+            if old != new:
+                changes.append({'row': header_row + 1 + offset, 'album_id': album_id,
+                                'field': field, 'old': old, 'new': new})
+    return changes
+
+
+def coalesce_updates(changes: List[dict], header_map: Dict[str, int]) -> List[dict]:
+    """batch_update payload: one range per run of consecutive changed rows in a column."""
+    from gspread.utils import rowcol_to_a1  # gspread loads on first use (lazy_imports.py)
+
+    by_column: Dict[int, Dict[int, str]] = {}
+    for change in changes:
+        by_column.setdefault(header_map[change['field']] + 1, {})[change['row']] = change['new']
+
+    updates = []
+    for col, cells in sorted(by_column.items()):
+        rows = sorted(cells)
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i] != rows[i - 1] + 1:
+                first, last = rows[start], rows[i - 1]
+                updates.append({
+                    'range': f'{rowcol_to_a1(first, col)}:{rowcol_to_a1(last, col)}',
+                    'values': [[cells[r]] for r in rows[start:i]],
+                })
+                start = i
+    return updates
+
+
+def _apply(data_rows, header_row, header_map, changes):
+    rows = [list(row) for row in data_rows]
+    for change in changes:
+        row, col = rows[change['row'] - header_row - 1], header_map[change['field']]
+        row.extend([''] * (col + 1 - len(row)))
+        row[col] = change['new']
+    return rows
+
+
+def rebuild(sheet_id=None, sheet_tab=None, creds_path=None, sp=None, fields=None, write=False,
+            output_path=None, refresh=False, concurrency=None) -> dict:
+    """Diff (and with write=True, correct) the sheet's Spotify metadata; returns a summary."""
+    started = time.perf_counter()
+    calls = {'spotify': 0, 'sheets': 0}
+    unknown = [f for f in fields or () if f not in REBUILD_FIELDS]
+    if unknown:
+        raise ValueError(f'Not a rebuildable field: {", ".join(unknown)} (choose from {", ".join(REBUILD_FIELDS)})')
+
+    worksheet = CountingClient(get_google_sheet(sheet_id, sheet_tab, creds_path), calls, 'sheets')
+    header_row, header_map = get_header_row_and_map(worksheet)
+    with stage_timer('rebuild_read'):
+        data_rows = worksheet.get_all_values()[header_row:]
+
+    urls = {}  # album_id → the row's own URL, kept as the spotify_album_url
+    for row in data_rows:
+        album_id = _row_album_id(row, header_map)
+        if album_id:
+            urls.setdefault(album_id, _cell(row, header_map.get('spotify_album_url')))
+    album_ids = list(urls)
+
+    cache = get_spotify_cache()
+    if cache is not None and refresh:
+        cache = SpotifyCache(cache.db_path, ttl=0)  # every entry expired: refetch, then store
+    sp = CountingClient(sp or get_spotify_api(), calls, 'spotify')
+    with stage_timer('rebuild_lookup'):
+        infos = get_albums_info(album_ids, sp, urls=urls, max_workers=concurrency or IMPORT_CONCURRENCY,
+                                cache=cache)
+
+    changes = diff_rows(data_rows, header_row, header_map, infos, fields)
+    updates = coalesce_updates(changes, header_map)
+    if write and updates:
+        worksheet.batch_update(updates, value_input_option='USER_ENTERED')
+        from sheet_cache import get_sheet_replica  # local import: sheet_cache imports add_album
+        replica = get_sheet_replica(worksheet)
+        if replica is not None:
+            replica.invalidate()
+        logger.info('Rebuild wrote %d cells in %d ranges', len(changes), len(updates))
+
+    if output_path:
+        from export_json import normalize_album_rows
+        albums = normalize_album_rows(_apply(data_rows, header_row, header_map, changes), header_map)
+        albums.sort(key=lambda x: x['pick_number'])
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(albums, f, indent=2, ensure_ascii=False)
+
+    seconds = time.perf_counter() - started
+    summary = {
+        'rows': len(data_rows),
+        'albums': len(album_ids),
+        'not_found': [album_id for album_id in album_ids if album_id not in infos],
+        'changes': changes,
+        'ranges': len(updates),
+        'written': bool(write and updates),
+        'seconds': round(seconds, 3),
+        'api_calls': dict(calls),
+    }
+    logger.info('Rebuild finished', extra={k: v for k, v in summary.items() if k not in ('changes', 'not_found')})
+    return summary
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Re-derive the sheet's Spotify metadata and diff it")
+    parser.add_argument('--fields', nargs='+', choices=list(REBUILD_FIELDS), default=None,
+                        help='columns to rebuild (default: all metadata columns)')
+    parser.add_argument('--write', action='store_true', help='write the corrected cells back to the sheet')
+    parser.add_argument('--refresh', action='store_true', help='ignore SPOTIFY_CACHE_DB entries and refetch')
+    parser.add_argument('--json', type=str, default=None, help='write the diff as JSON to this path')
+    parser.add_argument('--output', type=str, default=None, help='write the rebuilt data.json to this path')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='Spotify requests in flight (or set IMPORT_CONCURRENCY)')
+    parser.add_argument('--sheet-id', type=str, help='Google Sheet ID (or set GOOGLE_SHEET_ID)')
+    parser.add_argument('--sheet-tab', type=str, help='Google Sheet tab name (or set GOOGLE_SHEET_TAB)')
+    parser.add_argument('--service-account-file', type=str,
+                        help='Service account JSON file (or set GOOGLE_SERVICE_ACCOUNT_FILE)')
+    add_profile_args(parser)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+    apply_profile_args(args)
+    with profile_run('rebuild'):
+        summary = rebuild(args.sheet_id, args.sheet_tab, args.service_account_file, fields=args.fields,
+                          write=args.write, output_path=args.output, refresh=args.refresh,
+                          concurrency=args.concurrency)
+
+    for change in summary['changes']:
+        print(f"row {change['row']} {change['field']}: {change['old']!r} → {change['new']!r}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary['changes'], f, indent=2, ensure_ascii=False)
+    rows_changed = len({c['row'] for c in summary['changes']})
+    verb = 'Wrote' if summary['written'] else 'Found'
+    print(f"{verb} {len(summary['changes'])} changed cells in {rows_changed} of {summary['rows']} rows "
+          f"({summary['ranges']} ranges) in {summary['seconds']:.1f}s")
+    print(f"API calls: {summary['api_calls']['spotify']} Spotify, {summary['api_calls']['sheets']} Sheets")
+    if summary['not_found']:
+        print(f"Not found on Spotify: {', '.join(summary['not_found'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ import functools
 from typing import Callable, Tuple, Type
 
 from logging_config import setup_logging
+from metrics import RETRIES
 
 logger = setup_logging()
 
@@ -52,6 +53,7 @@ def retry_with_backoff(
 
                     # Otherwise wait and try again — delay doubles each round
                     delay = base_delay * (exponential_base ** (attempt - 1))
+                    RETRIES.inc(function=func.__name__)
                     logger.warning(
                         '%s attempt %d/%d failed: %s. Retrying in %.1fs...',
                         func.__name__, attempt, max_attempts, e, delay,
@@ -0,0 +1,112 @@
+"""Prebuilt search index for the website's album search and sort.
+
+website/src/utils/filterSort.js used to lower-case every artist and album
+and re-sort a copy of the whole list on each keystroke. The exporter writes
+this index next to data.json (data.search.json; export_and_push publishes
+it with data.json) so search and sort become lookups:
+
+    {
+      "version": 1,
+      "count": N,                  # albums, in data.json order
+      "source_sha256": "...",      # SHA-256 of the data.json bytes it indexes
+      "fields": ["artist", "album"],
+      "picks": [pick_number, ...], # position → pick number
+      "text":  ["artist\\nalbum", ...],   # lower-cased
+      "grams": {"abc": [position, ...], ...},
+      "sort":  {"pick_number": [...], "year": [...]}
+    }
+
+The index reproduces the site's scan exactly, so using it changes speed,
+not results:
+
+  - Search: a query matches when artist.toLowerCase() or
+    album.toLowerCase() contains query.toLowerCase(). Nothing is
+    diacritic-folded or whitespace-collapsed. A query of three or more
+    characters is the intersection of its trigrams' postings, confirmed
+    against `text`; shorter queries scan `text`.
+  - Sort: pick_number and year are presorted here (ascending, ties in
+    data.json order as the site's stable sort leaves them; a year that is
+    not a number sorts as 0). Artist and album order is the browser's
+    Intl.Collator, which Python cannot reproduce, so the site computes
+    those two once per album list.
+
+Postings and orderings hold positions in data.json, not pick numbers, so
+the site only uses an index whose source_sha256 matches the data.json it
+loaded; otherwise it builds the same index itself
+(website/src/utils/searchIndex.js).
+"""
+import hashlib
+from typing import Dict, List, Optional
+
+SEARCH_INDEX_VERSION = 1
+NGRAM = 3
+SEARCH_FIELDS = ('artist', 'album')
+SORT_KEYS = ('pick_number', 'year')
+
+
+def source_sha256(data: bytes) -> str:
+    """Fingerprint of the published data.json bytes (what the site hashes after fetching)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def search_text(album: Dict) -> str:
+    """The searched text of one album: each field lower-cased, one per line."""
+    return '\n'.join(str(album.get(field) or '').lower() for field in SEARCH_FIELDS)
+
+
+def _year(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def build_search_index(albums: List[Dict], source: Optional[str] = None) -> dict:
+    """Search index for a data.json album list; source is source_sha256() of its bytes."""
+    texts = [search_text(album) for album in albums]
+
+    grams: Dict[str, List[int]] = {}
+    for position, text in enumerate(texts):
+        seen = set()
+        for part in text.split('\n'):
+            for i in range(len(part) - NGRAM + 1):
+                seen.add(part[i:i + NGRAM])
+        for gram in seen:
+            grams.setdefault(gram, []).append(position)
+
+    positions = range(len(albums))
+    sort_keys = {
+        'pick_number': lambda p: albums[p].get('pick_number') or 0,
+        'year':        lambda p: _year(albums[p].get('year')),
+    }
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'count': len(albums),
+        'source_sha256': source,
+        'fields': list(SEARCH_FIELDS),
+        'picks': [album.get('pick_number') or 0 for album in albums],
+        'text': texts,
+        'grams': {gram: grams[gram] for gram in sorted(grams)},
+        # sorted() is stable, so ties stay in data.json order
+        'sort': {key: sorted(positions, key=sort_keys[key]) for key in SORT_KEYS},
+    }
+
+
+def search(index: dict, query: str) -> List[int]:
+    """Positions of albums whose artist or album contains query (case-insensitive), in data.json order."""
+    texts = index['text']
+    if not query.strip():
+        return list(range(index['count']))
+    term = query.lower()
+    if len(term) < NGRAM:
+        return [p for p, text in enumerate(texts) if term in text]
+
+    candidates = None
+    for i in range(len(term) - NGRAM + 1):
+        postings = index['grams'].get(term[i:i + NGRAM])
+        if not postings:
+            return []
+        candidates = set(postings) if candidates is None else candidates.intersection(postings)
+        if not candidates:
+            return []
+    return sorted(p for p in candidates if term in texts[p])
@@ -0,0 +1,424 @@
+"""Local SQLite read replica of the album sheet.
+
+The Google Sheet stays the source of truth. The replica mirrors the album tab
+into an indexed SQLite table so read paths (dedup, next-date, export) can be
+answered locally instead of downloading whole columns on every message.
+
+Freshness model:
+  - Our own appends are written through immediately (record_append). The
+    sheet displays USER_ENTERED values its own way (formatted dates and
+    numbers), so the written tail row is not hashed as sent: the next probe
+    checks its identity cells (artist, album, Spotify URL) and then adopts
+    the row as the sheet displays it.
+  - At most every SHEET_CACHE_MAX_AGE seconds, one batch_get reads the header
+    row plus a small window around the last known row. A changed header or a
+    changed tail row triggers a full resync; new rows below the tail are
+    inserted incrementally.
+  - A full resync also runs every SHEET_CACHE_FULL_RESYNC seconds to pick up
+    manual edits in the middle of the sheet.
+
+Enable by setting SHEET_CACHE_DB to a file path; when unset, get_sheet_replica()
+returns None and every caller falls back to live Sheets reads.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from add_album import get_header_row_and_map, parse_sheet_date
+from logging_config import setup_logging
+from metrics import CACHE_HITS, CACHE_MISSES
+from validation import extract_spotify_album_id
+
+logger = setup_logging()
+
+SHEET_CACHE_DB          = os.getenv('SHEET_CACHE_DB')
+SHEET_CACHE_MAX_AGE     = float(os.getenv('SHEET_CACHE_MAX_AGE', '60'))
+SHEET_CACHE_FULL_RESYNC = float(os.getenv('SHEET_CACHE_FULL_RESYNC', '900'))
+TAIL_WINDOW             = 50   # rows read below the last known row on each probe
+IDENTITY_COLUMNS        = ('artist', 'album', 'spotify_album_url')  # cells Sheets shows as written
+_APPENDED               = 'appended:'  # tail_hash prefix: our own write, not yet seen as displayed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheet_meta (
+    sheet_key   TEXT PRIMARY KEY,
+    header_row  INTEGER NOT NULL,
+    header_json TEXT NOT NULL,
+    header_hash TEXT NOT NULL,
+    last_row    INTEGER NOT NULL,
+    tail_hash   TEXT NOT NULL,
+    synced_at   REAL NOT NULL,
+    checked_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS album_rows (
+    sheet_key        TEXT NOT NULL,
+    row_num          INTEGER NOT NULL,
+    pick             INTEGER,
+    date             TEXT NOT NULL DEFAULT '',
+    date_iso         TEXT NOT NULL DEFAULT '',
+    picker           TEXT NOT NULL DEFAULT '',
+    spotify_album_id TEXT NOT NULL DEFAULT '',
+    spotify_url      TEXT NOT NULL DEFAULT '',
+    values_json      TEXT NOT NULL,
+    PRIMARY KEY (sheet_key, row_num)
+);
+CREATE INDEX IF NOT EXISTS idx_album_rows_album_id ON album_rows (sheet_key, spotify_album_id);
+CREATE INDEX IF NOT EXISTS idx_album_rows_pick     ON album_rows (sheet_key, pick);
+CREATE INDEX IF NOT EXISTS idx_album_rows_date     ON album_rows (sheet_key, date_iso);
+CREATE INDEX IF NOT EXISTS idx_album_rows_picker   ON album_rows (sheet_key, picker);
+"""
+
+
+def _trim(row) -> List[str]:
+    """Drop trailing empty cells so rows compare equal however they were fetched."""
+    values = [str(cell) for cell in row]
+    while values and not values[-1].strip():
+        values.pop()
+    return values
+
+
+def _hash_row(row) -> str:
+    return hashlib.sha1(json.dumps(_trim(row)).encode('utf-8')).hexdigest()
+
+
+def _identity_hash(row, header_map: Dict[str, int]) -> str:
+    """tail_hash for a row we wrote: only the cells the sheet displays verbatim."""
+    values = _trim(row)
+    cells = [values[idx].strip() if idx is not None and idx < len(values) else ''
+             for idx in (header_map.get(name) for name in IDENTITY_COLUMNS)]
+    return _APPENDED + hashlib.sha1(json.dumps(cells).encode('utf-8')).hexdigest()
+
+
+def sheet_key_for(worksheet) -> str:
+    """Stable identity for a worksheet: '<spreadsheet id>:<worksheet id>'."""
+    spreadsheet_id = getattr(worksheet, 'spreadsheet_id', None) or worksheet.spreadsheet.id
+    return f'{spreadsheet_id}:{worksheet.id}'
+
+
+class SheetReplica:
+    """SQLite mirror of one album worksheet. Thread-safe."""
+
+    def __init__(self, db_path: str, sheet_key: str,
+                 max_age: float = SHEET_CACHE_MAX_AGE,
+                 full_resync_interval: float = SHEET_CACHE_FULL_RESYNC):
+        self.db_path = db_path
+        self.sheet_key = sheet_key
+        self.max_age = max_age
+        self.full_resync_interval = full_resync_interval
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def _meta(self) -> Optional[tuple]:
+        cur = self._conn.execute(
+            'SELECT header_row, header_json, header_hash, last_row, tail_hash, synced_at, checked_at '
+            'FROM sheet_meta WHERE sheet_key = ?',
+            (self.sheet_key,),
+        )
+        return cur.fetchone()
+
+    def sync(self, worksheet, force: bool = False) -> str:
+        """Bring the replica up to date with the sheet.
+
+        Returns what was done: 'fresh' (no API call), 'probe' (tail unchanged),
+        'incremental' (new rows inserted) or 'full' (complete reload).
+        """
+        outcome = self._sync(worksheet, force)
+        if outcome == 'full':
+            CACHE_MISSES.inc(cache='sheet_replica')
+        else:
+            CACHE_HITS.inc(cache='sheet_replica')
+        return outcome
+
+    def _sync(self, worksheet, force: bool) -> str:
+        with self._lock:
+            meta = self._meta()
+            now = time.time()
+            if force or meta is None or now - meta[5] >= self.full_resync_interval:
+                self._full_resync(worksheet)
+                return 'full'
+            if now - meta[6] < self.max_age:
+                return 'fresh'
+            return self._probe(worksheet, meta, now)
+
+    def _probe(self, worksheet, meta, now: float) -> str:
+        header_row, _, header_hash, last_row, tail_hash = meta[:5]
+        first = max(last_row, header_row + 1)
+        header_range, tail_range = worksheet.batch_get([
+            f'{header_row}:{header_row}',
+            f'{first}:{first + TAIL_WINDOW}',
+        ])
+        header_values = header_range[0] if header_range else []
+        if _hash_row(header_values) != header_hash:
+            logger.info('Sheet header changed — full replica resync')
+            self._full_resync(worksheet)
+            return 'full'
+
+        header_map = json.loads(meta[1])
+        tail_rows = list(tail_range)
+        if last_row > header_row:
+            current_tail = tail_rows[0] if tail_rows else []
+            if tail_hash.startswith(_APPENDED):
+                unchanged = _identity_hash(current_tail, header_map) == tail_hash
+            else:
+                unchanged = _hash_row(current_tail) == tail_hash
+            if not unchanged:
+                logger.info('Sheet tail row %d changed — full replica resync', last_row)
+                self._full_resync(worksheet)
+                return 'full'
+            if tail_hash.startswith(_APPENDED):
+                # Our own write as the sheet displays it (formatted date, numbers, evaluated pick)
+                self._insert_row(last_row, current_tail, header_map)
+                tail_hash = _hash_row(current_tail)
+            new_rows = tail_rows[1:]
+        else:
+            new_rows = tail_rows
+
+        if len(tail_rows) > TAIL_WINDOW:
+            # The window filled up — more rows may follow than we can see.
+            self._full_resync(worksheet)
+            return 'full'
+
+        while new_rows and not _trim(new_rows[-1]):
+            new_rows.pop()
+        if not new_rows:
+            self._conn.execute(
+                'UPDATE sheet_meta SET tail_hash = ?, checked_at = ? WHERE sheet_key = ?',
+                (tail_hash, now, self.sheet_key),
+            )
+            self._conn.commit()
+            return 'probe'
+
+        start = last_row + 1 if last_row > header_row else header_row + 1
+        with self._conn:
+            for offset, row in enumerate(new_rows):
+                self._insert_row(start + offset, row, header_map)
+            new_last = start + len(new_rows) - 1
+            self._conn.execute(
+                'UPDATE sheet_meta SET last_row = ?, tail_hash = ?, checked_at = ? WHERE sheet_key = ?',
+                (new_last, _hash_row(new_rows[-1]), now, self.sheet_key),
+            )
+        logger.info('Replica picked up %d new sheet rows', len(new_rows))
+        return 'incremental'
+
+    def _full_resync(self, worksheet) -> None:
+        header_row, header_map = get_header_row_and_map(worksheet)
+        all_values = worksheet.get_all_values()
+        header_values = all_values[header_row - 1] if len(all_values) >= header_row else []
+        self.load(header_row, header_map, header_values, all_values[header_row:])
+
+    def load(self, header_row: int, header_map: Dict[str, int], header_values, data_rows) -> None:
+        """Replace the replica contents with the given header and data rows.
+
+        data_rows[0] is sheet row header_row + 1.
+        """
+        data_rows = list(data_rows)
+        while data_rows and not _trim(data_rows[-1]):
+            data_rows.pop()
+        last_row = header_row + len(data_rows)
+        tail = data_rows[-1] if data_rows else []
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM album_rows WHERE sheet_key = ?', (self.sheet_key,))
+            for offset, row in enumerate(data_rows):
+                self._insert_row(header_row + 1 + offset, row, header_map)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sheet_meta '
+                '(sheet_key, header_row, header_json, header_hash, last_row, tail_hash, synced_at, checked_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.sheet_key, header_row, json.dumps(header_map), _hash_row(header_values),
+                 last_row, _hash_row(tail), now, now),
+            )
+        logger.info('Replica loaded %d sheet rows', len(data_rows))
+
+    def _insert_row(self, row_num: int, row, header_map: Dict[str, int]) -> None:
+        values = _trim(row)
+
+        def cell(name):
+            idx = header_map.get(name)
+            return values[idx].strip() if idx is not None and idx < len(values) else ''
+
+        try:
+            pick = int(float(cell('pick'))) if cell('pick') else None
+        except ValueError:
+            pick = None
+        raw_date = cell('date')
+        parsed = parse_sheet_date(raw_date)
+        spotify_url = cell('spotify_album_url')
+        self._conn.execute(
+            'INSERT OR REPLACE INTO album_rows '
+            '(sheet_key, row_num, pick, date, date_iso, picker, spotify_album_id, spotify_url, values_json) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.sheet_key, row_num, pick, raw_date, parsed.isoformat() if parsed else '',
+             cell('picker'), extract_spotify_album_id(spotify_url) or '', spotify_url,
+             json.dumps(values, ensure_ascii=False)),
+        )
+
+    # ------------------------------------------------------------------
+    # Write-through
+    # ------------------------------------------------------------------
+
+    def record_append(self, row, response=None) -> None:
+        """Mirror a row we just appended to the sheet.
+
+        The pick cell is usually a =ROW()-N formula, so it is resolved locally
+        from the row number. If the append response reports the written range
+        that row number is used; otherwise the row lands after the last one.
+        The tail is recorded by its identity cells until the next probe sees
+        how the sheet displays it.
+        """
+        self.record_appends([row], response)
+
+    def record_appends(self, rows, response=None) -> None:
+        """Mirror rows written by one append_rows call (consecutive sheet rows)."""
+        if not rows:
+            return
+        with self._lock:
+            meta = self._meta()
+            if meta is None:
+                return  # never synced — the next read will do a full load
+            header_row, header_json, _, last_row = meta[:4]
+            header_map = json.loads(header_json)
+            first_row = _row_from_append_response(response) or last_row + 1
+            pick_idx = header_map.get('pick')
+
+            with self._conn:
+                for offset, row in enumerate(rows):
+                    row_num = first_row + offset
+                    values = [str(cell) for cell in row]
+                    if pick_idx is not None and pick_idx < len(values) and values[pick_idx].startswith('='):
+                        values[pick_idx] = str(row_num - header_row)
+                    self._insert_row(row_num, values, header_map)
+                if row_num >= last_row:
+                    self._conn.execute(
+                        'UPDATE sheet_meta SET last_row = ?, tail_hash = ? WHERE sheet_key = ?',
+                        (row_num, _identity_hash(values, header_map), self.sheet_key),
+                    )
+
+    def expire(self) -> None:
+        """Probe the sheet on the next read even within max_age (another process may have appended)."""
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE sheet_meta SET checked_at = 0 WHERE sheet_key = ?', (self.sheet_key,))
+
+    def invalidate(self) -> None:
+        """Force a full resync on the next read (after bulk edits such as batch_update)."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM sheet_meta WHERE sheet_key = ?', (self.sheet_key,))
+
+    # ------------------------------------------------------------------
+    # Read paths
+    # ------------------------------------------------------------------
+
+    def header(self) -> Tuple[int, Dict[str, int]]:
+        """Return (header_row, header_map), same shape as get_header_row_and_map."""
+        meta = self._meta()
+        if meta is None:
+            raise ValueError('Sheet replica has not been synced yet.')
+        return meta[0], json.loads(meta[1])
+
+    def lookup_album(self, album_id: str) -> Optional[Tuple[str, str]]:
+        """Return (pick, date) for an album ID already in the sheet, else None."""
+        with self._lock:
+            cur = self._conn.execute(
+                'SELECT pick, date FROM album_rows WHERE sheet_key = ? AND spotify_album_id = ? '
+                'ORDER BY row_num LIMIT 1',
+                (self.sheet_key, album_id),
+            )
+            hit = cur.fetchone()
+        if hit is None:
+            return None
+        pick, date = hit
+        return ('' if pick is None else str(pick)), date
+
+    def existing_album_ids(self) -> Dict[str, Tuple[str, str]]:
+        """Same contract as add_album.get_existing_album_ids."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT spotify_album_id, pick, date FROM album_rows "
+                "WHERE sheet_key = ? AND spotify_album_id != '' ORDER BY row_num",
+                (self.sheet_key,),
+            )
+            return {
+                album_id: ('' if pick is None else str(pick), date)
+                for album_id, pick, date in cur.fetchall()
+            }
+
+    def last_pick_and_date(self):
+        """Return (last_pick, last_date) using the same 'last non-empty value' rule
+        as get_next_pick_number_and_date. Either may be None."""
+        with self._lock:
+            pick_row = self._conn.execute(
+                'SELECT pick FROM album_rows WHERE sheet_key = ? AND pick IS NOT NULL '
+                'ORDER BY row_num DESC LIMIT 1',
+                (self.sheet_key,),
+            ).fetchone()
+            date_row = self._conn.execute(
+                "SELECT date_iso FROM album_rows WHERE sheet_key = ? AND date_iso != '' "
+                'ORDER BY row_num DESC LIMIT 1',
+                (self.sheet_key,),
+            ).fetchone()
+        last_pick = pick_row[0] if pick_row else None
+        last_date = parse_sheet_date(date_row[0]) if date_row else None
+        return last_pick, last_date
+
+    def data_rows(self) -> List[List[str]]:
+        """All data rows in sheet order (gaps for empty sheet rows are omitted)."""
+        with self._lock:
+            cur = self._conn.execute(
+                'SELECT values_json FROM album_rows WHERE sheet_key = ? ORDER BY row_num',
+                (self.sheet_key,),
+            )
+            return [json.loads(values) for (values,) in cur.fetchall()]
+
+    def row_numbers_by_url(self) -> Dict[str, int]:
+        """Map spotify_album_url → 1-based sheet row number (used by the enrichment scripts)."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT spotify_url, row_num FROM album_rows WHERE sheet_key = ? AND spotify_url != ''",
+                (self.sheet_key,),
+            )
+            return dict(cur.fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _row_from_append_response(response) -> Optional[int]:
+    """Extract the written row number from an append response ('Sheet1!A12:M12' → 12)."""
+    try:
+        updated_range = response['updates']['updatedRange']
+    except (TypeError, KeyError):
+        return None
+    cell = updated_range.rsplit('!', 1)[-1].split(':', 1)[0]
+    digits = ''.join(ch for ch in cell if ch.isdigit())
+    return int(digits) if digits else None
+
+
+# ---------------------------------------------------------------------------
+# Process-wide registry
+# ---------------------------------------------------------------------------
+
+_replicas: Dict[str, SheetReplica] = {}
+_replicas_lock = threading.Lock()
+
+
+def get_sheet_replica(worksheet, db_path: Optional[str] = None) -> Optional[SheetReplica]:
+    """Return the shared replica for this worksheet, or None if caching is disabled."""
+    db_path = db_path or SHEET_CACHE_DB
+    if not db_path:
+        return None
+    key = sheet_key_for(worksheet)
+    with _replicas_lock:
+        replica = _replicas.get(key)
+        if replica is None:
+            replica = SheetReplica(db_path, key)
+            _replicas[key] = replica
+        return replica
@@ -0,0 +1,232 @@
+"""Watch the album sheet for manual edits and republish the website when it changes.
+
+Edits made directly in the Google Sheet (fixing a picker, adding a
+non-Spotify album with alt_url) have no trigger of their own; without this
+they only reach the website with the next album add. SheetWatcher polls a
+cheap fingerprint of the sheet and runs the export → push only when it moved:
+
+  * the spreadsheet's Drive modifiedTime — one small metadata request that
+    changes on any edit, anywhere in the spreadsheet
+  * if the Drive API is unavailable (service account without Drive scope),
+    a hash of one batch_get of the header row and the pick column; this
+    catches added/removed rows and header changes but not in-place edits
+
+An unchanged export is never pushed (github_push skips content that is
+already on the branch), so edits elsewhere in the spreadsheet and the bot's
+own appends cost an export but no commit. With SHEET_CACHE_DB set the
+replica is invalidated before that export: its incremental sync only checks
+the header and the tail, so it would miss an edit in the middle of the sheet.
+
+The last published fingerprint per sheet and website is kept in
+SHEET_WATCH_STATE (a small JSON file, default in the temp directory; empty
+disables it), so a cron run or a restart with nothing edited costs the one
+fingerprint request and no export.
+
+    python src/sheet_watch.py                 # poll every SHEET_WATCH_INTERVAL (default 60s)
+    python src/sheet_watch.py --once          # single check, e.g. from cron
+
+The Telegram bot runs watch_loop() as a background task (SHEET_WATCH_INTERVAL=0
+disables it).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from logging_config import ensure_correlation_id, setup_logging
+from metrics import counter, stage_timer
+from add_album import get_google_sheet, get_header_row_and_map
+from sheet_cache import get_sheet_replica, sheet_key_for
+
+logger = setup_logging()
+
+SHEET_WATCH_INTERVAL = float(os.getenv('SHEET_WATCH_INTERVAL', '60'))
+SHEET_WATCH_STATE    = os.getenv('SHEET_WATCH_STATE', os.path.join(tempfile.gettempdir(), 'aotw_sheet_watch.json'))
+
+WATCH_POLLS = counter(
+    'aotw_sheet_watch_polls_total',
+    'Sheet watch polls by outcome (unchanged, published, failed).',
+    ('outcome',),
+)
+
+
+_state_lock = threading.Lock()
+
+
+def _load_state(path: str) -> Dict[str, str]:
+    if not path or not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning('Ignoring unreadable sheet watch state %s: %s', path, e)
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def load_fingerprint(path: str, key: str) -> Optional[str]:
+    """Last fingerprint published for key, or None (never published, or no state file)."""
+    with _state_lock:
+        return _load_state(path).get(key)
+
+
+def save_fingerprint(path: str, key: str, fingerprint: str) -> None:
+    """Record a published fingerprint; a failed write only costs one extra export later."""
+    if not path:
+        return
+    with _state_lock:
+        state = _load_state(path)
+        state[key] = fingerprint
+        tmp_path = None
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False, encoding='utf-8') as tmp:
+                tmp_path = tmp.name
+                json.dump(state, tmp)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning('Could not write sheet watch state %s: %s', path, e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+class SheetWatcher:
+    """Tracks the last published fingerprint of one sheet."""
+
+    def __init__(self, sheet_id=None, sheet_tab=None, creds_path=None, state_path: Optional[str] = None):
+        self.sheet_id = sheet_id
+        self.sheet_tab = sheet_tab
+        self.creds_path = creds_path
+        self.state_path = SHEET_WATCH_STATE if state_path is None else state_path
+        self.fingerprint: Optional[str] = None
+        self._state_key: Optional[str] = None
+        self._replica = None
+        self._use_drive = True
+
+    def _fingerprint(self, worksheet) -> str:
+        if self._use_drive:
+            try:
+                return 'drive:' + worksheet.spreadsheet.get_lastUpdateTime()
+            except Exception as e:
+                logger.warning('Drive modifiedTime unavailable (%s); falling back to a range hash', e)
+                self._use_drive = False
+        from gspread.utils import rowcol_to_a1
+        header_row, header_map = get_header_row_and_map(worksheet)
+        pick_col = header_map.get('pick', 0) + 1
+        column = rowcol_to_a1(1, pick_col).rstrip('1')
+        ranges = worksheet.batch_get([f'{header_row}:{header_row}', f'{column}{header_row + 1}:{column}'])
+        return 'range:' + hashlib.sha1(json.dumps(ranges).encode('utf-8')).hexdigest()
+
+    def check(self) -> Tuple[bool, str]:
+        """Return (changed since the last publish, current fingerprint)."""
+        worksheet = get_google_sheet(self.sheet_id, self.sheet_tab, self.creds_path)
+        if self._state_key is None:
+            from github_push import target_key
+            self._state_key = f'{sheet_key_for(worksheet)} {target_key(self.github_target())}'
+            self.fingerprint = load_fingerprint(self.state_path, self._state_key)
+        self._replica = get_sheet_replica(worksheet)
+        with stage_timer('watch_probe'):
+            fingerprint = self._fingerprint(worksheet)
+        return fingerprint != self.fingerprint, fingerprint
+
+    def github_target(self) -> dict:
+        """The website this sheet publishes to: its tenant's, else the GITHUB_* config."""
+        from github_push import github_target
+        from tenants import get_registry
+        tenant = get_registry().for_sheet(self.sheet_id, self.sheet_tab)
+        return tenant.github_target() if tenant else github_target()
+
+    def publish(self, fingerprint: str) -> bool:
+        """Export + push; remember the fingerprint only if it succeeded (else retried next poll)."""
+        from github_push import export_and_push
+        if self._replica is not None:
+            self._replica.invalidate()  # an incremental sync would miss in-place edits
+        ok, message = export_and_push(
+            sheet_id=self.sheet_id,
+            sheet_tab=self.sheet_tab,
+            creds_path=self.creds_path,
+            commit_message='Sync sheet edits',
+            target=self.github_target(),
+        )
+        if ok:
+            self.fingerprint = fingerprint
+            save_fingerprint(self.state_path, self._state_key, fingerprint)
+        else:
+            logger.warning('Watch publish failed: %s', message)
+        WATCH_POLLS.inc(outcome='published' if ok else 'failed')
+        return ok
+
+    def poll(self) -> str:
+        """One check-and-maybe-publish; returns 'unchanged', 'published' or 'failed'."""
+        ensure_correlation_id()
+        changed, fingerprint = self.check()
+        if not changed:
+            WATCH_POLLS.inc(outcome='unchanged')
+            return 'unchanged'
+        logger.info('Sheet changed; republishing', extra={'fingerprint': fingerprint})
+        return 'published' if self.publish(fingerprint) else 'failed'
+
+
+async def watch_loop(sheet_id=None, sheet_tab=None, creds_path=None, interval: float = None):
+    """Poll the sheet every `interval` seconds until cancelled (bot background task)."""
+    from append_coordinator import get_coordinator
+    from github_push import target_key
+
+    interval = SHEET_WATCH_INTERVAL if interval is None else interval
+    watcher = SheetWatcher(sheet_id, sheet_tab, creds_path)
+    while True:
+        try:
+            changed, fingerprint = await asyncio.to_thread(watcher.check)
+            if changed:
+                logger.info('Sheet changed; republishing', extra={'fingerprint': fingerprint})
+                async with get_coordinator().publish_lock(target_key(watcher.github_target())):
+                    await asyncio.to_thread(watcher.publish, fingerprint)
+            else:
+                WATCH_POLLS.inc(outcome='unchanged')
+        except Exception as e:
+            WATCH_POLLS.inc(outcome='failed')
+            logger.error('Sheet watch poll failed: %s', e, exc_info=True)
+        await asyncio.sleep(interval)
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Republish data.json when the album sheet changes')
+    parser.add_argument('--sheet-id', help='Google Sheet ID (or set GOOGLE_SHEET_ID)')
+    parser.add_argument('--sheet-tab', help='Google Sheet tab name (or set GOOGLE_SHEET_TAB)')
+    parser.add_argument('--service-account-file', help='Service account JSON file (or set GOOGLE_SERVICE_ACCOUNT_FILE)')
+    parser.add_argument('--interval', type=float, default=SHEET_WATCH_INTERVAL or 60, help='seconds between polls')
+    parser.add_argument('--once', action='store_true', help='check once and exit')
+    parser.add_argument('--state-file', help='last published fingerprints (or set SHEET_WATCH_STATE)')
+    return parser.parse_args()
+
+
+def main():
+    from add_album import enable_client_cache
+    from github_push import enable_publish_cache
+
+    args = get_args()
+    enable_client_cache()  # one authenticated sheet handle for every poll
+    enable_publish_cache()
+    watcher = SheetWatcher(args.sheet_id, args.sheet_tab, args.service_account_file, args.state_file)
+    while True:
+        try:
+            outcome = watcher.poll()
+        except Exception as e:
+            logger.error('Sheet watch poll failed: %s', e)
+            outcome = 'failed'
+        logger.info('Sheet watch: %s', outcome)
+        if args.once:
+            sys.exit(1 if outcome == 'failed' else 0)
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
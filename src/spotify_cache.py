@@ -0,0 +1,93 @@
+"""On-disk cache of raw Spotify album and artist objects.
+
+The bulk lookups (add_album.get_albums_info, used by import_albums.py and
+rebuild.py) can read through this cache. It stores the objects exactly as
+Spotify returned them, not the sheet fields derived from them. A change to
+that mapping (artwork size, genre fallback, label) is re-applied to the
+whole history from cache without a single Spotify request.
+
+Objects are kept for SPOTIFY_CACHE_TTL seconds (default 7 days); album
+metadata rarely changes, and `rebuild.py --refresh` refetches everything.
+Enable by setting SPOTIFY_CACHE_DB to a file path; get_spotify_cache()
+returns None when it is unset.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from logging_config import setup_logging
+from metrics import CACHE_HITS, CACHE_MISSES
+
+logger = setup_logging()
+
+SPOTIFY_CACHE_DB  = os.getenv('SPOTIFY_CACHE_DB')
+SPOTIFY_CACHE_TTL = float(os.getenv('SPOTIFY_CACHE_TTL', str(7 * 24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spotify_objects (
+    kind       TEXT NOT NULL,
+    id         TEXT NOT NULL,
+    payload    TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+"""
+
+
+class SpotifyCache:
+    """SQLite-backed map of (kind, Spotify ID) → raw object. Thread-safe."""
+
+    def __init__(self, db_path: str, ttl: float = None):
+        self.db_path = db_path
+        self.ttl = SPOTIFY_CACHE_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def get_many(self, kind: str, ids: Iterable[str], now: float = None) -> Dict[str, dict]:
+        """Cached, unexpired objects of this kind ('album', 'artist') among ids."""
+        ids = list(ids)
+        now = time.time() if now is None else now
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):  # stay under SQLite's bound-parameter limit
+                batch = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f'SELECT id, payload FROM spotify_objects WHERE kind = ? AND fetched_at > ? '
+                    f'AND id IN ({",".join("?" * len(batch))})',
+                    (kind, now - self.ttl, *batch),
+                ).fetchall()
+                found.update((object_id, json.loads(payload)) for object_id, payload in rows)
+        CACHE_HITS.inc(len(found), cache=f'spotify_{kind}')
+        CACHE_MISSES.inc(len(ids) - len(found), cache=f'spotify_{kind}')
+        return found
+
+    def put_many(self, kind: str, objects: Iterable[dict], now: float = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO spotify_objects (kind, id, payload, fetched_at) VALUES (?, ?, ?, ?)',
+                [(kind, obj['id'], json.dumps(obj), now) for obj in objects if obj and obj.get('id')],
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_caches: Dict[str, SpotifyCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_spotify_cache(db_path: Optional[str] = None) -> Optional[SpotifyCache]:
+    """Return the shared cache for db_path (default SPOTIFY_CACHE_DB), or None if disabled."""
+    db_path = db_path or SPOTIFY_CACHE_DB
+    if not db_path:
+        return None
+    with _caches_lock:
+        if db_path not in _caches:
+            _caches[db_path] = SpotifyCache(db_path)
+        return _caches[db_path]
@@ -1,23 +1,22 @@
+import asyncio
 import os
 import re
+import signal
+import time
 from telegram import Update
 from telegram.ext import ApplicationBuilder, MessageHandler, filters, ContextTypes
-from logging_config import setup_logging
+from idempotency import get_store, update_keys
+from logging_config import set_correlation_id, setup_logging
+from tenants import TENANT_ALBUMS, TENANT_MESSAGES, get_registry
 from validation import is_valid_spotify_album_url
 
 logger = setup_logging()
 
-ALLOWED_CHAT_ID = os.getenv('TELEGRAM_ALLOWED_CHAT_ID')
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-
-# Maps Telegram username (case-insensitive) → picker initials shown on album cards
-PICKER_MAP = {
-    'steve':   'SS',
-    'd_blott': 'DG',
-    'ross':    'RB',
-    'jack':    'JC',
-    '@Ninajirachi_Fan':     'BR',
-}
+# Minimum gap between edits of one status message (Telegram rate-limits edits)
+EDIT_MIN_INTERVAL = float(os.getenv('BOT_EDIT_MIN_INTERVAL', '1.0'))
+# Updates handled at once; sheet appends and pushes stay ordered (append_coordinator.py)
+CONCURRENT_UPDATES = int(os.getenv('BOT_CONCURRENT_UPDATES', '8'))
 
 # Full pattern:  @aotw <spotify_url> <apple_music_url> [initials]
 _TRIGGER_PATTERN = re.compile(
@@ -34,87 +33,297 @@ _FORMAT_HINT = (
 )
 
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle incoming group messages."""
-    chat_id = str(update.effective_chat.id)
+class ProgressReply:
+    """One status reply, edited in place as the pipeline advances.
 
-    if chat_id != ALLOWED_CHAT_ID:
-        logger.warning('Ignored message from unauthorized chat: %s', chat_id)
-        return
+    start() acknowledges immediately; update() edits are dropped when they
+    come closer together than EDIT_MIN_INTERVAL; finish() always delivers
+    the final text (waiting out the interval if needed), falling back to a
+    fresh reply if the status message can't be edited.
+    """
 
-    message_text = update.message.text or ''
-    username = update.effective_user.username or update.effective_user.first_name
-    logger.info('Message received from %s: %s', username, message_text)
+    def __init__(self, message, min_interval=None):
+        self.message = message
+        self.min_interval = EDIT_MIN_INTERVAL if min_interval is None else min_interval
+        self.status = None
+        self._last_edit = 0.0
+
+    async def start(self, text):
+        try:
+            self.status = await self.message.reply_text(text)
+        except Exception as e:
+            logger.warning('Could not send status reply: %s', e)
+        self._last_edit = time.monotonic()
+
+    async def update(self, text):
+        if self.status is None or time.monotonic() - self._last_edit < self.min_interval:
+            return
+        await self._edit(text, parse_mode='Markdown')
+
+    async def finish(self, text, parse_mode='Markdown'):
+        if self.status is not None:
+            wait = self.min_interval - (time.monotonic() - self._last_edit)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if await self._edit(text, parse_mode=parse_mode):
+                return
+        await self.message.reply_text(text, parse_mode=parse_mode)
+
+    async def _edit(self, text, parse_mode=None) -> bool:
+        try:
+            await self.status.edit_text(text, parse_mode=parse_mode)
+        except Exception as e:
+            if 'not modified' in str(e).lower():
+                return True
+            logger.warning('Status edit failed: %s', e)
+            return False
+        self._last_edit = time.monotonic()
+        return True
 
-    match = _TRIGGER_PATTERN.search(message_text)
-    if not match:
-        if _PARTIAL_PATTERN.search(message_text):
-            await update.message.reply_text(_FORMAT_HINT, parse_mode='Markdown')
-        return
 
+def _limit_rejection(tenant, albums: int):
+    """The reply when this message is over the tenant's batch or hourly limit, else None."""
+    if tenant.max_batch and albums > tenant.max_batch:
+        TENANT_MESSAGES.inc(tenant=tenant.name, outcome='too_many')
+        return f'At most {tenant.max_batch} albums per message, please.'
+    if not tenant.limiter.allow(albums):
+        TENANT_MESSAGES.inc(tenant=tenant.name, outcome='rate_limited')
+        logger.warning('Tenant %s over its hourly album limit', tenant.name, extra={'tenant': tenant.name})
+        return "That's a lot of albums this hour — please try again later."
+    TENANT_MESSAGES.inc(tenant=tenant.name, outcome='accepted')
+    return None
+
+
+async def _reject(update: Update, text: str, parse_mode=None) -> dict:
+    await update.message.reply_text(text, parse_mode=parse_mode)
+    return {'success': False, 'message': text}
+
+
+async def _handle_batch(update: Update, tenant, matches, username) -> dict:
+    """Several @aotw entries in one message: one sheet append and one push for all of them."""
+    entries = [
+        {'url': m.group(1), 'apple_music_url': m.group(2), 'picker': tenant.resolve_picker(m.group(3), username)}
+        for m in matches
+    ]
+    progress = ProgressReply(update.message)
+    await progress.start(f'⏳ Processing {len(entries)} albums…')
+    try:
+        from pipeline import process_albums_batch
+        result = await process_albums_batch(
+            entries,
+            sheet_id=tenant.sheet_id,
+            sheet_tab=tenant.sheet_tab,
+            creds_path=tenant.creds_path,
+            progress=progress.update,
+            github_target=tenant.github_target(),
+        )
+        await progress.finish(result['message'])
+        added = sum(1 for r in result.get('results', []) if r['success'])
+        TENANT_ALBUMS.inc(added, tenant=tenant.name)
+        logger.info('Batch pipeline for %s: %d of %d added', username, added, len(entries))
+        return result
+    except Exception as e:
+        logger.error('Batch pipeline failed: %s', e, exc_info=True)
+        text = "Something went wrong processing those albums. Please try again later."
+        await progress.finish(text, parse_mode=None)
+        return {'success': False, 'message': text}
+
+
+async def _handle_trigger(update: Update, tenant, matches, username) -> dict:
+    """Run the pipeline for one message's @aotw entries; returns the pipeline-style result."""
+    if len(matches) > 1:
+        rejection = _limit_rejection(tenant, len(matches))
+        if rejection:
+            return await _reject(update, rejection)
+        return await _handle_batch(update, tenant, matches, username)
+
+    match = matches[0]
     spotify_url = match.group(1)
     apple_music_url = match.group(2)
     initials = match.group(3)
 
     if not is_valid_spotify_album_url(spotify_url):
-        await update.message.reply_text(
+        return await _reject(
+            update,
             "Couldn't add this album — not a valid Spotify album link.\n" + _FORMAT_HINT,
             parse_mode='Markdown',
         )
-        return
 
-    picker = initials.upper() if initials else PICKER_MAP.get((username or '').lower(), '')
+    rejection = _limit_rejection(tenant, 1)
+    if rejection:
+        return await _reject(update, rejection)
+
+    picker = tenant.resolve_picker(initials, username)
 
+    # Acknowledge straight away, then edit the same message as stages complete
+    progress = ProgressReply(update.message)
+    await progress.start('⏳ Processing album…')
     try:
         from pipeline import process_album
         result = await process_album(
             spotify_url,
-            sheet_id=os.getenv('GOOGLE_SHEET_ID'),
-            sheet_tab=os.getenv('GOOGLE_SHEET_TAB'),
-            creds_path=os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON'),
+            sheet_id=tenant.sheet_id,
+            sheet_tab=tenant.sheet_tab,
+            creds_path=tenant.creds_path,
             picker=picker,
             apple_music_url=apple_music_url,
+            progress=progress.update,
+            github_target=tenant.github_target(),
         )
-        await update.message.reply_text(result['message'], parse_mode='Markdown')
+        await progress.finish(result['message'])
 
         if result['success']:
+            TENANT_ALBUMS.inc(tenant=tenant.name)
             logger.info('Pipeline succeeded for %s: %s', username, result.get('data', {}).get('Album'))
         else:
             logger.warning('Pipeline rejected %s: %s', username, result['message'])
+        return result
 
     except Exception as e:
         logger.error('Pipeline failed: %s', e, exc_info=True)
-        await update.message.reply_text(
-            "Something went wrong processing that album. Please try again later."
+        text = "Something went wrong processing that album. Please try again later."
+        await progress.finish(text, parse_mode=None)
+        return {'success': False, 'message': text}
+
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle incoming group messages.
+
+    Album triggers are claimed in the idempotency store first (idempotency.py):
+    a redelivered update returns the stored result without re-running anything.
+    """
+    set_correlation_id(f'tg-{update.update_id}')
+    chat_id = str(update.effective_chat.id)
+
+    tenant = get_registry().for_chat(chat_id)
+    if tenant is None:
+        logger.warning('Ignored message from unauthorized chat: %s', chat_id)
+        return None
+
+    message_text = update.message.text or ''
+    username = update.effective_user.username or update.effective_user.first_name
+    logger.info('Message received from %s', username,
+                extra={'username': username, 'chat_id': chat_id, 'tenant': tenant.name, 'length': len(message_text)})
+    # The text itself only at LOG_LEVEL=DEBUG, rate-limited by LOG_DEBUG_RATE
+    logger.debug('Message text from %s: %s', username, message_text, extra={'chat_id': chat_id})
+
+    matches = list(_TRIGGER_PATTERN.finditer(message_text))
+    if not matches:
+        if _PARTIAL_PATTERN.search(message_text):
+            await update.message.reply_text(_FORMAT_HINT, parse_mode='Markdown')
+        return None
+
+    keys = update_keys(update)
+    entry, is_new = get_store().claim(keys)
+    if not is_new:
+        logger.info('Redelivered update %s ignored (%s)', update.update_id,
+                    'done' if entry.finished else 'still in flight', extra={'tenant': tenant.name})
+        return entry.result
+
+    logger.info('Album trigger from %s (%d albums)', username, len(matches),
+                extra={'username': username, 'albums': len(matches), 'tenant': tenant.name})
+    try:
+        result = await _handle_trigger(update, tenant, matches, username)
+    except BaseException:
+        get_store().release(keys)
+        raise
+    entry.done(result)
+    return result
+
+
+async def run_webhook_server(app, port, webhook_url, secret_token=None, metrics_token=None):
+    """Serve the Telegram webhook plus /metrics (with metrics_token) and /ready on one port until SIGTERM/SIGINT."""
+    import cache_snapshot
+    from publish_outbox import reconcile_loop
+    from sheet_watch import SHEET_WATCH_INTERVAL, watch_loop
+    from warmup import warm_up
+    from web_server import make_web_app, WEBHOOK_PATH
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    async with app:
+        await app.bot.set_webhook(
+            url=webhook_url,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=True,
         )
+        await app.start()
+        server = make_web_app(app, secret_token, metrics_token).listen(port, address='0.0.0.0')
+        logger.info('Listening on port %d (%s, %s/ready)', port, WEBHOOK_PATH, '/metrics, ' if metrics_token else '')
+        tenants = list(get_registry())
+        # /ready stays 503 until this finishes; messages arriving meanwhile just run cold
+        warm_task = asyncio.create_task(warm_up(tenants=tenants))
+        snapshot_task = asyncio.create_task(cache_snapshot.snapshot_loop()) if cache_snapshot.CACHE_SNAPSHOT_PATH else None
+        # Retries website syncs that failed after an append (see publish_outbox.py)
+        outbox_task = asyncio.create_task(reconcile_loop(creds_path=os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')))
+        # Republishes each club's website after manual sheet edits (see sheet_watch.py)
+        watch_tasks = [
+            asyncio.create_task(watch_loop(
+                sheet_id=tenant.sheet_id,
+                sheet_tab=tenant.sheet_tab,
+                creds_path=tenant.creds_path,
+            ))
+            for tenant in tenants
+        ] if SHEET_WATCH_INTERVAL > 0 else []
+        try:
+            await stop.wait()
+        finally:
+            warm_task.cancel()
+            outbox_task.cancel()
+            for watch_task in watch_tasks:
+                watch_task.cancel()
+            if snapshot_task is not None:
+                snapshot_task.cancel()
+                await asyncio.to_thread(cache_snapshot.save)  # so the next process starts warm
+            server.stop()
+            await app.stop()
 
 
 def main():
     if not BOT_TOKEN:
         raise ValueError('TELEGRAM_BOT_TOKEN env var not set')
-    if not ALLOWED_CHAT_ID:
-        raise ValueError('TELEGRAM_ALLOWED_CHAT_ID env var not set')
+    if not len(get_registry()):
+        raise ValueError('No chats configured: set TENANTS_JSON or TELEGRAM_ALLOWED_CHAT_ID')
 
     railway_domain = os.getenv('RAILWAY_PUBLIC_DOMAIN')
     if not railway_domain:
         raise ValueError('RAILWAY_PUBLIC_DOMAIN env var not set')
 
+    from add_album import enable_client_cache
+    from github_push import enable_publish_cache
+    enable_client_cache()  # reuse the clients warmed at startup across messages
+    enable_publish_cache()  # skip the SHA lookup (and unchanged pushes) after the first push
+
+    import publish_outbox
+    if publish_outbox.get_outbox() is None:
+        logger.info('PUBLISH_OUTBOX_DB not set; failed website syncs are retried in memory only')
+        publish_outbox.configure_outbox(':memory:')
+
     port = int(os.getenv('PORT', '8080'))
     secret_token = os.getenv('WEBHOOK_SECRET_TOKEN')
+    metrics_token = os.getenv('METRICS_TOKEN')
     webhook_url = f'https://{railway_domain}/telegram'
 
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    # updater(None): updates arrive through our own web server (web_server.py),
+    # which also serves /metrics on the same port when METRICS_TOKEN is set.
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .updater(None)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .build()
+    )
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
     logger.info('Bot starting in webhook mode on port %d (url: %s)...', port, webhook_url)
-    app.run_webhook(
-        listen='0.0.0.0',
-        port=port,
-        url_path='/telegram',
-        webhook_url=webhook_url,
-        secret_token=secret_token,
-        drop_pending_updates=True,
-    )
+    asyncio.run(run_webhook_server(app, port, webhook_url, secret_token, metrics_token))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,215 @@
+"""Tenant registry: one bot process serving several album clubs.
+
+Each tenant is one Telegram group with its own Google Sheet, picker map,
+website (GitHub target) and limits. TENANTS_JSON holds the list, either as
+JSON content or as a path to a JSON file (like GOOGLE_SERVICE_ACCOUNT_JSON):
+
+    [
+      {
+        "name": "aotw",
+        "chat_id": "-1001234567890",
+        "sheet_id": "1h1u...",
+        "sheet_tab": "Sheet1",
+        "service_account": "/secrets/aotw.json",
+        "pickers": {"d_blott": "DG", "steve": "SS"},
+        "github": {"owner": "davidgreenblott", "repo": "aotw-website",
+                   "path": "public/data.json", "branch": "main",
+                   "token_env": "AOTW_GITHUB_TOKEN"},
+        "limits": {"albums_per_hour": 10, "max_batch": 5}
+      }
+    ]
+
+Only chat_id is required; anything omitted falls back to the single-club
+env vars (GOOGLE_SHEET_ID, GOOGLE_SERVICE_ACCOUNT_JSON, GITHUB_*), and a
+limit of 0 means unlimited. GitHub tokens are never put in the JSON itself:
+token_env names the env var holding the tenant's token (default GITHUB_TOKEN).
+
+Without TENANTS_JSON the registry holds one tenant built from
+TELEGRAM_ALLOWED_CHAT_ID and the env vars above, so existing deployments
+keep working unchanged.
+
+Tenants share the pooled upstream clients (one Spotify client, one gspread
+client per service account); per-sheet and per-target state — header and
+tail caches, the sheet replica, append locks, the publish cache — is keyed
+by sheet or target, so clubs never see each other's data.
+"""
+import collections
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from logging_config import setup_logging
+from metrics import counter
+
+logger = setup_logging()
+
+TENANTS_JSON = os.getenv('TENANTS_JSON')
+
+# Maps Telegram username (case-insensitive) → picker initials shown on album cards.
+# Used by the single-club tenant and by any tenant without its own "pickers".
+DEFAULT_PICKER_MAP = {
+    'steve':   'SS',
+    'd_blott': 'DG',
+    'ross':    'RB',
+    'jack':    'JC',
+    '@Ninajirachi_Fan':     'BR',
+}
+
+TENANT_MESSAGES = counter(
+    'aotw_tenant_messages_total',
+    'Album triggers by tenant and outcome (accepted, rate_limited, too_many).',
+    ('tenant', 'outcome'),
+)
+TENANT_ALBUMS = counter(
+    'aotw_tenant_albums_added_total',
+    'Albums added to the sheet by tenant.',
+    ('tenant',),
+)
+
+
+class RateLimiter:
+    """Sliding one-hour window of album adds; limit 0 means unlimited."""
+
+    WINDOW = 3600.0
+
+    def __init__(self, per_hour: int = 0):
+        self.per_hour = per_hour
+        self._times = collections.deque()
+        self._lock = threading.Lock()
+
+    def allow(self, albums: int = 1, now: float = None) -> bool:
+        """Record `albums` adds if they fit in the window; False (and nothing recorded) if not."""
+        if not self.per_hour:
+            return True
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._times and self._times[0] <= now - self.WINDOW:
+                self._times.popleft()
+            if len(self._times) + albums > self.per_hour:
+                return False
+            self._times.extend([now] * albums)
+            return True
+
+
+class Tenant:
+    """One album club: a chat, its sheet, picker map, website and limits."""
+
+    def __init__(self, name: str, chat_id: str, sheet_id=None, sheet_tab=None, creds_path=None,
+                 picker_map: Optional[Dict[str, str]] = None, github: Optional[Dict[str, str]] = None,
+                 albums_per_hour: int = 0, max_batch: int = 0):
+        self.name = name
+        self.chat_id = str(chat_id)
+        self.sheet_id = sheet_id
+        self.sheet_tab = sheet_tab
+        self.creds_path = creds_path
+        self.picker_map = {k.lower(): v for k, v in (picker_map or DEFAULT_PICKER_MAP).items()}
+        self.github = dict(github or {})
+        self.max_batch = max_batch
+        self.limiter = RateLimiter(albums_per_hour)
+
+    def __repr__(self):
+        return f'Tenant({self.name!r}, chat_id={self.chat_id!r})'
+
+    def resolve_picker(self, initials: Optional[str], username: Optional[str]) -> str:
+        return initials.upper() if initials else self.picker_map.get((username or '').lower(), '')
+
+    def github_target(self) -> dict:
+        """This tenant's github_push target (unset fields come from the GITHUB_* env vars)."""
+        from github_push import github_target
+        fields = {k: self.github.get(k) for k in ('owner', 'repo', 'path', 'branch')}
+        token_env = self.github.get('token_env')
+        return github_target(token=os.getenv(token_env) if token_env else None, **fields)
+
+    def owns_sheet(self, sheet_id, sheet_tab) -> bool:
+        return (self.sheet_id or '', self.sheet_tab or '') == (sheet_id or '', sheet_tab or '')
+
+
+class TenantRegistry:
+    """Tenants by chat ID."""
+
+    def __init__(self, tenants: List[Tenant] = ()):
+        self._by_chat: Dict[str, Tenant] = {}
+        for tenant in tenants:
+            if tenant.chat_id in self._by_chat:
+                raise ValueError(f'Duplicate tenant chat_id: {tenant.chat_id}')
+            self._by_chat[tenant.chat_id] = tenant
+
+    def __iter__(self) -> Iterator[Tenant]:
+        return iter(self._by_chat.values())
+
+    def __len__(self) -> int:
+        return len(self._by_chat)
+
+    def for_chat(self, chat_id) -> Optional[Tenant]:
+        return self._by_chat.get(str(chat_id))
+
+    def for_sheet(self, sheet_id, sheet_tab) -> Optional[Tenant]:
+        """The tenant that publishes this sheet (outbox entries and the watcher carry only the sheet)."""
+        return next((t for t in self if t.owns_sheet(sheet_id, sheet_tab)), None)
+
+
+def parse_tenants(config: List[dict]) -> TenantRegistry:
+    """Build a registry from the TENANTS_JSON list (see the module docstring)."""
+    if not isinstance(config, list):
+        raise ValueError('TENANTS_JSON must be a list of tenant objects')
+    tenants = []
+    for index, entry in enumerate(config):
+        if not entry.get('chat_id'):
+            raise ValueError(f'Tenant #{index + 1} has no chat_id')
+        limits = entry.get('limits') or {}
+        tenants.append(Tenant(
+            name=entry.get('name') or f'tenant{index + 1}',
+            chat_id=entry['chat_id'],
+            sheet_id=entry.get('sheet_id') or os.getenv('GOOGLE_SHEET_ID'),
+            sheet_tab=entry.get('sheet_tab') or os.getenv('GOOGLE_SHEET_TAB'),
+            creds_path=entry.get('service_account') or os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON'),
+            picker_map=entry.get('pickers'),
+            github=entry.get('github'),
+            albums_per_hour=int(limits.get('albums_per_hour', 0)),
+            max_batch=int(limits.get('max_batch', 0)),
+        ))
+    return TenantRegistry(tenants)
+
+
+def load_registry(tenants_json: Optional[str] = None) -> TenantRegistry:
+    """Registry from TENANTS_JSON, else the single club configured by the legacy env vars."""
+    tenants_json = TENANTS_JSON if tenants_json is None else tenants_json
+    if tenants_json:
+        if tenants_json.strip().startswith('['):
+            config = json.loads(tenants_json)
+        else:
+            with open(tenants_json, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        registry = parse_tenants(config)
+        logger.info('Loaded %d tenants', len(registry), extra={'tenants': [t.name for t in registry]})
+        return registry
+
+    chat_id = os.getenv('TELEGRAM_ALLOWED_CHAT_ID')
+    if not chat_id:
+        return TenantRegistry()
+    return TenantRegistry([Tenant(
+        name='default',
+        chat_id=chat_id,
+        sheet_id=os.getenv('GOOGLE_SHEET_ID'),
+        sheet_tab=os.getenv('GOOGLE_SHEET_TAB'),
+        creds_path=os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON'),
+    )])
+
+
+_registry: Optional[TenantRegistry] = None
+
+
+def configure_registry(registry: Optional[TenantRegistry]) -> Optional[TenantRegistry]:
+    global _registry
+    _registry = registry
+    return registry
+
+
+def get_registry() -> TenantRegistry:
+    """The process-wide registry, loaded from the environment on first use."""
+    global _registry
+    if _registry is None:
+        _registry = load_registry()
+    return _registry
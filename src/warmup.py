@@ -0,0 +1,155 @@
+"""Bot startup warm-up: authenticate upstream clients before the first album.
+
+Without this, the first album after a deploy or restart pays for the Spotify
+client-credentials token, service-account auth, spreadsheet open and header
+discovery while the group waits. warm_up() does that work at startup, in
+worker threads, bounded by WARMUP_TIMEOUT seconds:
+
+    spotify   build the cached client and fetch an access token
+    sheets    open the worksheet, cache its header layout and tail pointer
+              (or sync the replica)
+    github    load the export/push stack and check its configuration
+
+With several clubs (tenants.py), the sheets and github steps run once per
+tenant — reported as e.g. 'sheets:aotw' — while the Spotify client is shared.
+
+When CACHE_SNAPSHOT_PATH is set, each step first tries to restore its part
+of the last cache snapshot (cache_snapshot.py) and only does the full work
+if that is missing or stale.
+
+Failures and timeouts are logged and reported, never raised — the bot still
+serves messages, just cold. Requires add_album.enable_client_cache() so the
+warmed clients are reused by later messages.
+
+readiness() backs the /ready route in web_server.py: 503 while warming,
+200 once warm-up has finished ('warm', or 'degraded' with the errors).
+"""
+import asyncio
+import os
+import time
+from typing import Dict
+
+import cache_snapshot
+from logging_config import setup_logging
+from metrics import stage_timer
+
+logger = setup_logging()
+
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', '20'))
+
+_state = {'status': 'pending', 'timings_ms': {}, 'errors': {}, 'restored': [], 'snapshot': None}
+
+
+def readiness() -> Dict:
+    return {
+        'status': _state['status'],
+        'timings_ms': dict(_state['timings_ms']),
+        'errors': dict(_state['errors']),
+        'restored': sorted(_state['restored']),
+    }
+
+
+def is_ready() -> bool:
+    return _state['status'] in ('warm', 'degraded')
+
+
+def _warm_spotify(sheet_id, sheet_tab, creds_path):
+    from add_album import get_spotify_api
+    sp = get_spotify_api()
+    if _state['snapshot'] and cache_snapshot.restore_spotify(_state['snapshot']):
+        _state['restored'].append('spotify')
+        return
+    auth_manager = getattr(sp, 'auth_manager', None)
+    if auth_manager is not None and hasattr(auth_manager, 'get_access_token'):
+        auth_manager.get_access_token(as_dict=False)
+
+
+def _warm_sheets(sheet_id, sheet_tab, creds_path):
+    from add_album import (
+        find_header_cells, get_google_sheet, get_header_row_and_map, get_next_pick_number_and_date,
+    )
+    from sheet_cache import get_sheet_replica
+    worksheet = get_google_sheet(sheet_id, sheet_tab, creds_path)
+    if _state['snapshot'] and cache_snapshot.restore_header(worksheet, _state['snapshot']):
+        _state['restored'].append('sheets')
+    header_row, _ = get_header_row_and_map(worksheet)
+    replica = get_sheet_replica(worksheet)
+    if replica is not None:
+        replica.sync(worksheet)
+    else:
+        # prime the tail pointer so the first album's next-date lookup is a small read
+        pick_cell, date_cell = find_header_cells(worksheet)
+        get_next_pick_number_and_date(worksheet, header_row, pick_cell.col, date_cell.col)
+
+
+def _warm_github(sheet_id, sheet_tab, creds_path):
+    import github_push
+    from tenants import get_registry
+    tenant = get_registry().for_sheet(sheet_id, sheet_tab)
+    target = tenant.github_target() if tenant else github_push.github_target()
+    missing = [name for name, field in (('GITHUB_TOKEN', 'token'), ('GITHUB_REPO_OWNER', 'owner'),
+                                        ('GITHUB_REPO_NAME', 'repo'))
+               if not target[field]]
+    if missing:
+        raise ValueError(f'Missing GitHub config: {", ".join(missing)}')
+    if _state['snapshot'] and cache_snapshot.restore_github(_state['snapshot'], target):
+        _state['restored'].append('github')
+
+
+STEPS = (
+    ('spotify', _warm_spotify),
+    ('sheets', _warm_sheets),
+    ('github', _warm_github),
+)
+SHARED_STEPS = ('spotify',)  # one client for every tenant
+
+
+async def warm_up(sheet_id=None, sheet_tab=None, creds_path=None, timeout=None, tenants=None) -> Dict:
+    """Run every warm-up step concurrently; returns readiness().
+
+    tenants (tenants.Tenant list) warms each club's sheet and GitHub target
+    instead of the single sheet given by sheet_id/sheet_tab/creds_path.
+    """
+    timeout = WARMUP_TIMEOUT if timeout is None else timeout
+    if tenants:
+        sheets = [(t.name, (t.sheet_id, t.sheet_tab, t.creds_path)) for t in tenants]
+    else:
+        sheets = [('', (sheet_id, sheet_tab, creds_path))]
+    jobs = []
+    for name, step in STEPS:
+        for index, (label, args) in enumerate(sheets):
+            if name in SHARED_STEPS and index:
+                continue
+            step_name = f'{name}:{label}' if len(sheets) > 1 and name not in SHARED_STEPS else name
+            jobs.append((step_name, step, args))
+    _state.update(status='warming', timings_ms={}, errors={}, restored=[], snapshot=None)
+    try:
+        _state['snapshot'] = await asyncio.to_thread(cache_snapshot.load)
+    except Exception as e:
+        logger.warning('Could not load cache snapshot: %s', e)
+
+    async def run(name, step, args):
+        start = time.perf_counter()
+        try:
+            with stage_timer(f'warmup_{name.split(":")[0]}'):
+                await asyncio.to_thread(step, *args)
+        except asyncio.CancelledError:
+            _state['errors'][name] = 'timed out'
+            raise
+        except Exception as e:
+            _state['errors'][name] = str(e)
+            logger.warning('Warm-up step %s failed: %s', name, e)
+        finally:
+            _state['timings_ms'][name] = round((time.perf_counter() - start) * 1000, 1)
+
+    try:
+        await asyncio.wait_for(asyncio.gather(*(run(*job) for job in jobs)), timeout)
+    except asyncio.TimeoutError:
+        logger.warning('Warm-up exceeded %.0fs; continuing cold', timeout)
+
+    _state['status'] = 'degraded' if _state['errors'] else 'warm'
+    _state['snapshot'] = None
+    logger.info('Warm-up %s: %s', _state['status'],
+                ', '.join(f'{k}={v:.0f}ms' for k, v in _state['timings_ms'].items()),
+                extra={'warmup': readiness()})
+    return readiness()
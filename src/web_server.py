@@ -0,0 +1,80 @@
+"""HTTP server for webhook mode: Telegram updates plus operational routes.
+
+python-telegram-bot's run_webhook() only serves the webhook path, so the bot
+runs its own tornado server (tornado ships with python-telegram-bot[webhooks])
+and feeds updates into the Application's update queue itself.
+
+Routes:
+    POST /telegram   Telegram webhook (checks X-Telegram-Bot-Api-Secret-Token)
+    GET  /metrics    Prometheus text exposition of metrics.REGISTRY; only served
+                     when METRICS_TOKEN is set, and only to
+                     `Authorization: Bearer <METRICS_TOKEN>` (it shares the
+                     public webhook port)
+    GET  /ready      200 once startup warm-up has finished (warmup.py), else 503
+"""
+import hmac
+import json
+
+import tornado.web
+from telegram import Update
+
+import metrics
+import warmup
+from logging_config import setup_logging
+
+logger = setup_logging()
+
+WEBHOOK_PATH = '/telegram'
+
+
+class TelegramWebhookHandler(tornado.web.RequestHandler):
+    def initialize(self, bot_app, secret_token=None):
+        self.bot_app = bot_app
+        self.secret_token = secret_token
+
+    async def post(self):
+        if self.secret_token:
+            received = self.request.headers.get('X-Telegram-Bot-Api-Secret-Token')
+            if received != self.secret_token:
+                logger.warning('Rejected webhook call with invalid secret token')
+                raise tornado.web.HTTPError(403)
+        try:
+            data = json.loads(self.request.body)
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+
+        update = Update.de_json(data, self.bot_app.bot)
+        await self.bot_app.update_queue.put(update)
+        self.set_status(200)
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    def initialize(self, token):
+        self.token = token
+
+    def get(self):
+        received = self.request.headers.get('Authorization', '')
+        if not hmac.compare_digest(received.encode('utf-8'), f'Bearer {self.token}'.encode('utf-8')):
+            logger.warning('Rejected /metrics request without a valid bearer token')
+            self.set_header('WWW-Authenticate', 'Bearer')
+            raise tornado.web.HTTPError(401)
+        self.set_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.write(metrics.render())
+
+
+class ReadyHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.set_status(200 if warmup.is_ready() else 503)
+        self.set_header('Content-Type', 'application/json')
+        self.write(json.dumps(warmup.readiness()))
+
+
+def make_web_app(application, secret_token=None, metrics_token=None) -> tornado.web.Application:
+    """Build the tornado app serving the webhook and operational routes (/metrics only with a token)."""
+    routes = [
+        (WEBHOOK_PATH, TelegramWebhookHandler, {'bot_app': application, 'secret_token': secret_token}),
+        (r'/ready', ReadyHandler),
+    ]
+    if metrics_token:
+        routes.append((r'/metrics', MetricsHandler, {'token': metrics_token}))
+    return tornado.web.Application(routes)
@@ -0,0 +1,26 @@
+"""Shared pytest options and fixtures: tests marked `slow` only run with --run-slow."""
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', default=False,
+                     help='also run tests marked slow (e.g. 100k-row API budgets)')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: long-running test, skipped unless --run-slow is given')
+
+
+@pytest.fixture
+def no_retry_sleep(monkeypatch):
+    """Skip retry_with_backoff delays; opt in with pytest.mark.usefixtures('no_retry_sleep')."""
+    monkeypatch.setattr('retry_utils.time.sleep', lambda s: None)
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+    skip_slow = pytest.mark.skip(reason='slow; run with --run-slow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
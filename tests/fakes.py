@@ -0,0 +1,775 @@
+"""In-process stand-ins for the upstream services the pipeline talks to.
+
+Unlike the MagicMock patches in the unit tests, these fakes behave like the
+real services closely enough to run process_album, export_and_push and the
+enrichment scripts end-to-end with no network, while measuring what the code
+actually does:
+
+    FakeWorksheet   gspread.Worksheet (find, row_values, col_values, get_all_values,
+                    get, batch_get, append_row, append_rows, batch_update)
+    FakeSpotify     spotipy.Spotify (album, albums, artist, artists, playlist_items, next)
+    FakeOdesli      api.song.link GET /v1-alpha.1/links
+    FakeGitHub      GitHub Contents API GET/PUT /repos/:owner/:repo/contents/:path
+    FakeRequests    drop-in for the `requests` module that routes to FakeOdesli/FakeGitHub
+
+Every backend supports configurable latency (with jitter), random or scripted
+error injection, a sliding-window request quota and per-operation call
+recording, including the peak number of concurrent in-flight calls.
+FakeWorksheet additionally counts cells_read so tests can tell reads that
+scale with sheet size from constant-size ones.
+
+offline_backends() patches all of them into the pipeline modules at once; see
+benchmarks/bench_e2e.py for the benchmark runner built on top of it.
+"""
+import abc
+import base64
+import contextlib
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+import requests
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+from spotipy.exceptions import SpotifyException
+
+from validation import extract_spotify_album_id
+
+
+# ---------------------------------------------------------------------------
+# Shared behaviour: latency, quota, error injection, call recording
+# ---------------------------------------------------------------------------
+
+class FakeBackend(abc.ABC):
+    """Base class for all fakes. Subclasses implement _error().
+
+    Args:
+        latency:      Seconds each call blocks for (simulated round-trip).
+        jitter:       Extra uniform random latency in [0, jitter).
+        error_rate:   Probability in [0, 1] that a call fails with error_status.
+        error_status: HTTP status used for random failures (default 500).
+        quota:        Max calls per quota_window seconds; excess calls fail with 429.
+        quota_window: Sliding window length for the quota, in seconds.
+        seed:         Seed for the jitter/error RNG so runs are reproducible.
+    """
+
+    name = 'backend'
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500,
+                 quota=None, quota_window=60.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.quota = quota
+        self.quota_window = quota_window
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = deque()
+        self._scripted_failures = deque()
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    # -- introspection ------------------------------------------------------
+
+    def count(self, op: Optional[str] = None) -> int:
+        """Number of calls recorded, optionally for a single operation."""
+        if op is None:
+            return len(self.calls)
+        return sum(1 for name, _ in self.calls if name == op)
+
+    def counts(self) -> Dict[str, int]:
+        return dict(Counter(name for name, _ in self.calls))
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.max_in_flight = self.in_flight
+
+    # -- fault injection ----------------------------------------------------
+
+    def fail_next(self, n: int = 1, status: Optional[int] = 500, op: Optional[str] = None) -> None:
+        """Make the next n calls (optionally only of operation `op`) fail.
+
+        status=None simulates a transport failure (connection error) rather
+        than an HTTP error response.
+        """
+        for _ in range(n):
+            self._scripted_failures.append((op, status))
+
+    def _take_scripted_failure(self, op):
+        for i, (target, status) in enumerate(self._scripted_failures):
+            if target is None or target == op:
+                del self._scripted_failures[i]
+                return True, status
+        return False, None
+
+    @abc.abstractmethod
+    def _error(self, op: str, status: Optional[int]) -> Exception:
+        """Build the exception the real client library would raise (status None: transport failure)."""
+
+    # -- the per-call hook every fake operation goes through ---------------
+
+    def _call(self, op: str, *args) -> None:
+        with self._lock:
+            self.calls.append((op, args))
+            now = time.monotonic()
+            over_quota = False
+            if self.quota is not None:
+                while self._window and now - self._window[0] >= self.quota_window:
+                    self._window.popleft()
+                over_quota = len(self._window) >= self.quota
+                if not over_quota:
+                    self._window.append(now)
+            scripted, scripted_status = self._take_scripted_failure(op)
+            random_failure = self.error_rate and self._rng.random() < self.error_rate
+            delay = self.latency + (self._rng.random() * self.jitter if self.jitter else 0.0)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if delay:
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        if over_quota:
+            raise self._error(op, 429)
+        if scripted:
+            raise self._error(op, scripted_status)
+        if random_failure:
+            raise self._error(op, self.error_status)
+
+
+def _http_response(status: int, body) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps(body).encode('utf-8')
+    resp.headers['Content-Type'] = 'application/json'
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# Google Sheets
+# ---------------------------------------------------------------------------
+
+class _Cell:
+    def __init__(self, row, col, value):
+        self.row = row
+        self.col = col
+        self.value = value
+
+
+class _FakeSpreadsheet:
+    """The parent spreadsheet of a FakeWorksheet: Drive metadata and sibling tabs."""
+
+    def __init__(self, worksheet: 'FakeWorksheet'):
+        self.sheet = worksheet
+        self.id = worksheet.spreadsheet_id
+
+    def worksheet(self, title: str) -> 'FakeWorksheet':
+        if title == self.sheet.title:
+            return self.sheet
+        if title not in self.sheet.tabs:
+            raise WorksheetNotFound(title)
+        return self.sheet.tabs[title]
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> 'FakeWorksheet':
+        self.sheet._call('add_worksheet', title)
+        tab = FakeWorksheet(title=title, spreadsheet_id=self.id, sheet_id=len(self.sheet.tabs) + 1)
+        self.sheet.tabs[title] = tab
+        return tab
+
+    def get_lastUpdateTime(self) -> str:
+        """Drive modifiedTime; advances one second per written cell."""
+        from datetime import datetime, timedelta
+        self.sheet._call('drive_modified_time')
+        modified = datetime(2024, 1, 1) + timedelta(seconds=self.sheet.revision)
+        return modified.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+_ROW_FORMULA = re.compile(r'^=ROW\(\)\s*-\s*(\d+)$', re.I)
+
+
+class FakeWorksheet(FakeBackend):
+    """gspread.Worksheet stand-in backed by an in-memory grid.
+
+    Values are stored as displayed (FORMATTED_VALUE), so USER_ENTERED
+    =ROW()-N pick formulas are evaluated on write. `display` optionally maps
+    other USER_ENTERED values to what the sheet would show (see sheets_display).
+    """
+
+    name = 'sheets'
+
+    def __init__(self, rows=None, title='Sheet1', spreadsheet_id='fake-spreadsheet', sheet_id=0,
+                 display=None, **kwargs):
+        super().__init__(**kwargs)
+        self.display = display
+        self.rows: List[List[str]] = [[str(c) for c in row] for row in (rows or [])]
+        self.title = title
+        self.spreadsheet_id = spreadsheet_id
+        self.id = sheet_id
+        self.cells_read = 0
+        self.revision = 0  # bumped on every cell write; drives the fake Drive modifiedTime
+        self.tabs: Dict[str, 'FakeWorksheet'] = {}  # other tabs of the spreadsheet, by title
+
+    @property
+    def spreadsheet(self) -> _FakeSpreadsheet:
+        return _FakeSpreadsheet(self)
+
+    def reset_counts(self) -> None:
+        super().reset_counts()
+        self.cells_read = 0
+
+    def clone(self) -> 'FakeWorksheet':
+        """Independent copy of the grid with fresh counters and the same fault config."""
+        copy = FakeWorksheet.__new__(FakeWorksheet)
+        FakeBackend.__init__(copy, latency=self.latency, jitter=self.jitter, error_rate=self.error_rate,
+                             error_status=self.error_status, quota=self.quota, quota_window=self.quota_window)
+        copy.rows = [row[:] for row in self.rows]
+        copy.title, copy.spreadsheet_id, copy.id = self.title, self.spreadsheet_id, self.id
+        copy.cells_read = 0
+        copy.display = self.display
+        copy.revision = self.revision
+        copy.tabs = self.tabs
+        return copy
+
+    def _read(self, values):
+        """Account for the cells a read returns (rows of cells or a flat row/column)."""
+        self.cells_read += sum(len(v) if isinstance(v, list) else 1 for v in values)
+        return values
+
+    def _error(self, op, status):
+        if status is None:
+            return requests.exceptions.ConnectionError(f'fake sheets: {op} connection failed')
+        return APIError(_http_response(status, {
+            'error': {'code': status, 'message': f'fake sheets: {op} failed', 'status': 'FAKE'},
+        }))
+
+    # -- helpers ------------------------------------------------------------
+
+    def _width(self) -> int:
+        return max((len(r) for r in self.rows), default=0)
+
+    def _last_data_row(self) -> int:
+        for idx in range(len(self.rows), 0, -1):
+            if any(str(c).strip() for c in self.rows[idx - 1]):
+                return idx
+        return 0
+
+    def _set(self, row: int, col: int, value, user_entered: bool = False) -> None:
+        self.revision += 1
+        while len(self.rows) < row:
+            self.rows.append([])
+        target = self.rows[row - 1]
+        while len(target) < col:
+            target.append('')
+        value = str(value)
+        match = _ROW_FORMULA.match(value)
+        if match:
+            value = str(row - int(match.group(1)))
+        elif user_entered and self.display:
+            value = self.display(value)
+        target[col - 1] = value
+
+    def _range(self, a1: str) -> List[List[str]]:
+        grid = a1_range_to_grid_range(a1.split('!')[-1])
+        r0 = grid.get('startRowIndex', 0)
+        r1 = grid.get('endRowIndex', len(self.rows))
+        c0 = grid.get('startColumnIndex', 0)
+        c1 = grid.get('endColumnIndex', None)
+        out = []
+        for row in self.rows[r0:r1]:
+            cells = row[c0:c1]
+            while cells and cells[-1] == '':
+                cells.pop()
+            out.append(cells)
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    # -- read API -----------------------------------------------------------
+
+    def find(self, query, in_row=None, in_column=None, case_sensitive=True):
+        self._call('find', query)
+        for r, row in enumerate(self.rows, start=1):
+            if in_row is not None and r != in_row:
+                continue
+            for c, value in enumerate(row, start=1):
+                if in_column is not None and c != in_column:
+                    continue
+                hit = query.search(value) if hasattr(query, 'search') else value == query
+                if hit:
+                    return _Cell(r, c, value)
+        return None
+
+    def row_values(self, row, **kwargs):
+        self._call('row_values', row)
+        values = list(self.rows[row - 1]) if row <= len(self.rows) else []
+        while values and values[-1] == '':
+            values.pop()
+        return self._read(values)
+
+    def col_values(self, col, **kwargs):
+        self._call('col_values', col)
+        values = [row[col - 1] if col - 1 < len(row) else '' for row in self.rows]
+        while values and values[-1] == '':
+            values.pop()
+        return self._read(values)
+
+    def get_all_values(self, **kwargs):
+        self._call('get_all_values')
+        width = self._width()
+        return self._read([list(row) + [''] * (width - len(row)) for row in self.rows[:self._last_data_row()]])
+
+    def get(self, range_name=None, **kwargs):
+        self._call('get', range_name)
+        if not range_name:
+            return self.get_all_values()
+        return self._read(self._range(range_name))
+
+    def batch_get(self, ranges, **kwargs):
+        ranges = list(ranges)
+        self._call('batch_get', tuple(ranges))
+        return [self._read(self._range(r)) for r in ranges]
+
+    # -- write API ----------------------------------------------------------
+
+    def append_row(self, values, value_input_option='RAW', **kwargs):
+        self._call('append_row', len(values))
+        return self._append([values], value_input_option == 'USER_ENTERED')
+
+    def append_rows(self, values, value_input_option='RAW', **kwargs):
+        self._call('append_rows', len(values))
+        return self._append(values, value_input_option == 'USER_ENTERED')
+
+    def _append(self, rows, user_entered: bool = False) -> dict:
+        start = self._last_data_row() + 1
+        for offset, row in enumerate(rows):
+            for col, value in enumerate(row, start=1):
+                self._set(start + offset, col, value, user_entered)
+            if not row:
+                self._set(start + offset, 1, '')
+        end = start + len(rows) - 1
+        width = max((len(r) for r in rows), default=1)
+        return {'updates': {
+            'updatedRange': f"{self.title}!A{start}:{rowcol_to_a1(end, width)}",
+            'updatedRows': len(rows),
+        }}
+
+    def batch_update(self, data, value_input_option='RAW', **kwargs):
+        self._call('batch_update', len(data))
+        user_entered = value_input_option == 'USER_ENTERED'
+        for update in data:
+            grid = a1_range_to_grid_range(update['range'].split('!')[-1])
+            r0 = grid.get('startRowIndex', 0) + 1
+            c0 = grid.get('startColumnIndex', 0) + 1
+            for dr, row in enumerate(update['values']):
+                for dc, value in enumerate(row):
+                    self._set(r0 + dr, c0 + dc, value, user_entered)
+        return {'totalUpdatedCells': sum(len(r) for u in data for r in u['values'])}
+
+
+_US_DATE = re.compile(r'^(\d{1,2})/(\d{1,2})/(\d{4})$')
+_NUMBER = re.compile(r'^-?\d+(\.\d+)?$')
+
+
+def sheets_display(value: str) -> str:
+    """How a sheet with ISO-formatted date cells and 2-dp number cells shows a USER_ENTERED value."""
+    match = _US_DATE.match(value)
+    if match:
+        month, day, year = (int(g) for g in match.groups())
+        return f'{year:04d}-{month:02d}-{day:02d}'
+    if _NUMBER.match(value):
+        return f'{float(value):,.2f}'
+    return value
+
+
+def make_album_sheet(n_rows: int, header=None, start_year: int = 2019, **kwargs) -> FakeWorksheet:
+    """Build a FakeWorksheet with a header row and n_rows synthetic weekly picks."""
+    from datetime import date, timedelta
+
+    header = header or [
+        'Pick', 'Date', 'Artist', 'Album', 'Year', 'spotify_album_id', 'spotify_album_url',
+        'artwork_url', 'label', 'total_tracks', 'genres', 'apple_music_url', 'picker',
+    ]
+    index = {name.lower(): i for i, name in enumerate(header)}
+    first = date(start_year, 1, 6)
+    rows = [list(header)]
+    pickers = ['SS', 'DG', 'RB', 'JC']
+    for i in range(n_rows):
+        album_id = synthetic_album_id(i)
+        values = {
+            'pick': str(i + 1),
+            'date': (first + timedelta(days=7 * i)).strftime('%-m/%-d/%Y'),
+            'artist': f'Artist {i % 997}',
+            'album': f'Album {i}',
+            'year': str(1960 + i % 65),
+            'spotify_album_id': album_id,
+            'spotify_album_url': f'https://open.spotify.com/album/{album_id}',
+            'artwork_url': f'https://i.scdn.co/image/{album_id}',
+            'label': f'Label {i % 113}',
+            'total_tracks': str(8 + i % 12),
+            'genres': 'indie rock, art rock' if i % 3 else '',
+            'apple_music_url': f'https://music.apple.com/us/album/{i}',
+            'picker': pickers[i % len(pickers)],
+        }
+        row = [''] * len(header)
+        for name, value in values.items():
+            if name in index:
+                row[index[name]] = value
+        rows.append(row)
+    return FakeWorksheet(rows, **kwargs)
+
+
+_ID_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+
+def synthetic_album_id(n: int) -> str:
+    """Deterministic, valid-looking 22-char Spotify ID for the nth synthetic album."""
+    digest = hashlib.sha1(str(n).encode('ascii')).digest()
+    value = int.from_bytes(digest, 'big')
+    chars = []
+    for _ in range(22):
+        value, rem = divmod(value, 62)
+        chars.append(_ID_ALPHABET[rem])
+    return ''.join(chars)
+
+
+# ---------------------------------------------------------------------------
+# Spotify Web API
+# ---------------------------------------------------------------------------
+
+def _spotify_id(value: str) -> str:
+    if value.startswith('spotify:'):
+        return value.rsplit(':', 1)[-1]
+    return extract_spotify_album_id(value) or value.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+
+
+class FakeSpotify(FakeBackend):
+    """spotipy.Spotify stand-in. Unknown IDs are generated on the fly unless
+    auto_catalog=False, in which case they 404 like the real API."""
+
+    name = 'spotify'
+
+    def __init__(self, auto_catalog=True, **kwargs):
+        super().__init__(**kwargs)
+        self.auto_catalog = auto_catalog
+        self.albums_by_id: Dict[str, dict] = {}
+        self.artists_by_id: Dict[str, dict] = {}
+        self.playlists: Dict[str, List[str]] = {}
+
+    def _error(self, op, status):
+        if status is None:
+            return requests.exceptions.ConnectionError(f'fake spotify: {op} connection failed')
+        return SpotifyException(status, -1, f'fake spotify: {op} failed')
+
+    def add_album(self, album_id: str, artist='Fake Artist', name='Fake Album', release_date='2001-05-21',
+                  label='Fake Label', total_tracks=10, genres=(), artist_genres=('indie rock',)) -> dict:
+        artist_id = 'ar' + album_id[2:]
+        self.artists_by_id[artist_id] = {'id': artist_id, 'name': artist, 'genres': list(artist_genres)}
+        payload = {
+            'id': album_id,
+            'name': name,
+            'artists': [{'id': artist_id, 'name': artist}],
+            'release_date': release_date,
+            'release_date_precision': 'day' if len(release_date) == 10 else 'year',
+            'images': [
+                {'url': f'https://i.scdn.co/image/{album_id}-640', 'width': 640},
+                {'url': f'https://i.scdn.co/image/{album_id}-300', 'width': 300},
+                {'url': f'https://i.scdn.co/image/{album_id}-64', 'width': 64},
+            ],
+            'label': label,
+            'total_tracks': total_tracks,
+            'genres': list(genres),
+            'external_urls': {'spotify': f'https://open.spotify.com/album/{album_id}'},
+        }
+        self.albums_by_id[album_id] = payload
+        return payload
+
+    def add_playlist(self, playlist_id: str, album_ids: List[str]) -> None:
+        self.playlists[playlist_id] = list(album_ids)
+
+    def _album(self, album_id: str) -> Optional[dict]:
+        if album_id not in self.albums_by_id and self.auto_catalog and len(album_id) == 22:
+            self.add_album(album_id, artist=f'Artist {album_id[:4]}', name=f'Album {album_id[:6]}')
+        return self.albums_by_id.get(album_id)
+
+    def album(self, album_id, market=None):
+        self._call('album', album_id)
+        payload = self._album(_spotify_id(album_id))
+        if payload is None:
+            raise SpotifyException(400 if len(_spotify_id(album_id)) != 22 else 404, -1, 'invalid id')
+        return payload
+
+    def albums(self, albums, market=None):
+        albums = list(albums)
+        self._call('albums', len(albums))
+        if len(albums) > 20:
+            raise SpotifyException(400, -1, 'Too many ids requested')
+        return {'albums': [self._album(_spotify_id(a)) for a in albums]}
+
+    def artist(self, artist_id):
+        self._call('artist', artist_id)
+        payload = self.artists_by_id.get(_spotify_id(artist_id))
+        if payload is None:
+            raise SpotifyException(404, -1, 'non existing id')
+        return payload
+
+    def artists(self, artists):
+        artists = list(artists)
+        self._call('artists', len(artists))
+        if len(artists) > 50:
+            raise SpotifyException(400, -1, 'Too many ids requested')
+        return {'artists': [self.artists_by_id.get(_spotify_id(a)) for a in artists]}
+
+    def playlist_items(self, playlist_id, fields=None, limit=100, offset=0, market=None,
+                       additional_types=('track',)):
+        self._call('playlist_items', playlist_id, offset)
+        return self._playlist_page(_spotify_id(playlist_id), limit, offset)
+
+    def _playlist_page(self, playlist_id, limit, offset):
+        album_ids = self.playlists.get(playlist_id)
+        if album_ids is None:
+            raise SpotifyException(404, -1, 'playlist not found')
+        page = album_ids[offset:offset + limit]
+        items = []
+        for album_id in page:
+            album = self._album(album_id)
+            items.append({'track': {'type': 'track', 'album': {
+                'id': album_id, 'name': album['name'], 'artists': album['artists'],
+            }}})
+        next_offset = offset + limit
+        return {
+            'items': items,
+            'limit': limit,
+            'offset': offset,
+            'total': len(album_ids),
+            'next': f'fake://{playlist_id}/{next_offset}/{limit}' if next_offset < len(album_ids) else None,
+        }
+
+    def next(self, result):
+        if not result or not result.get('next'):
+            return None
+        self._call('next', result['next'])
+        playlist_id, offset, limit = result['next'][len('fake://'):].split('/')
+        return self._playlist_page(playlist_id, int(limit), int(offset))
+
+
+# ---------------------------------------------------------------------------
+# HTTP services reached through `requests`: Odesli and the GitHub Contents API
+# ---------------------------------------------------------------------------
+
+class _HTTPBackend(FakeBackend):
+    def _error(self, op, status):
+        if status is None:
+            return requests.exceptions.ConnectionError(f'fake {self.name}: {op} connection failed')
+        return _StatusError(status)
+
+
+class _StatusError(Exception):
+    """Internal signal: turn this call into an HTTP error response."""
+
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class FakeOdesli(_HTTPBackend):
+    """GET https://api.song.link/v1-alpha.1/links?url=<spotify url>."""
+
+    name = 'odesli'
+
+    def __init__(self, missing_ids=(), **kwargs):
+        super().__init__(**kwargs)
+        self.missing_ids = set(missing_ids)
+
+    def handle(self, method, path, params=None, **kwargs):
+        self._call(f'{method} links')
+        album_id = extract_spotify_album_id((params or {}).get('url', ''))
+        if not album_id or album_id in self.missing_ids:
+            return _http_response(404, {'statusCode': 404, 'code': 'could_not_resolve_entity'})
+        return _http_response(200, {'linksByPlatform': {
+            'appleMusic': {'url': f'https://music.apple.com/us/album/{album_id}'},
+            'spotify': {'url': f'https://open.spotify.com/album/{album_id}'},
+        }})
+
+
+def git_blob_sha(content: bytes) -> str:
+    """The SHA GitHub reports for file content (git's blob hash)."""
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+class FakeGitHub(_HTTPBackend):
+    """GitHub Contents API: GET/PUT /repos/:owner/:repo/contents/:path.
+
+    Enforces the real API's optimistic concurrency: a PUT to an existing file
+    must carry its current blob SHA (422 if missing, 409 if stale).
+    """
+
+    name = 'github'
+
+    def __init__(self, token='fake-token', **kwargs):
+        super().__init__(**kwargs)
+        self.token = token
+        self.files: Dict[str, bytes] = {}
+        self.commits: List[dict] = []
+
+    @property
+    def data_commits(self) -> List[dict]:
+        """Commits to data.json files, leaving out the search index pushed after each."""
+        return [c for c in self.commits if c['path'].endswith('/data.json')]
+
+    def handle(self, method, path, headers=None, json=None, params=None, **kwargs):
+        match = re.match(r'^/repos/([^/]+)/([^/]+)/contents/(.+)$', path)
+        self._call(f'{method} contents', path)
+        if not match:
+            return _http_response(404, {'message': 'Not Found'})
+        if (headers or {}).get('Authorization') != f'token {self.token}':
+            return _http_response(401, {'message': 'Bad credentials'})
+        key = '/'.join(match.groups())
+
+        if method == 'GET':
+            if key not in self.files:
+                return _http_response(404, {'message': 'Not Found'})
+            content = self.files[key]
+            return _http_response(200, {
+                'sha': git_blob_sha(content),
+                'size': len(content),
+                'encoding': 'base64',
+                'content': base64.b64encode(content).decode('ascii'),
+            })
+
+        body = json or {}
+        existing = self.files.get(key)
+        if existing is not None:
+            if 'sha' not in body:
+                return _http_response(422, {'message': '"sha" wasn\'t supplied.'})
+            if body['sha'] != git_blob_sha(existing):
+                return _http_response(409, {'message': f'{key} does not match {body["sha"]}'})
+        content = base64.b64decode(body.get('content', ''))
+        self.files[key] = content
+        commit_sha = hashlib.sha1(f'{len(self.commits)}:{body.get("message")}'.encode()).hexdigest()
+        self.commits.append({'sha': commit_sha, 'message': body.get('message'), 'path': key})
+        return _http_response(200 if existing is not None else 201, {
+            'content': {'sha': git_blob_sha(content), 'path': match.group(3)},
+            'commit': {'sha': commit_sha, 'message': body.get('message')},
+        })
+
+
+class FakeRequests:
+    """Drop-in replacement for the `requests` module, routing by host.
+
+    Unknown hosts raise ConnectionError so an accidental real network call
+    fails loudly instead of silently escaping the sandbox.
+    """
+
+    exceptions = requests.exceptions
+    Response = requests.Response
+
+    def __init__(self, odesli: Optional[FakeOdesli] = None, github: Optional[FakeGitHub] = None):
+        self.routes = {}
+        if odesli is not None:
+            self.routes['api.song.link'] = (odesli, '/v1-alpha.1')
+        if github is not None:
+            self.routes['api.github.com'] = (github, '')
+
+    def request(self, method, url, **kwargs):
+        match = re.match(r'^https?://([^/]+)(/[^?]*)', url)
+        host, path = (match.group(1), match.group(2)) if match else ('', url)
+        if host not in self.routes:
+            raise requests.exceptions.ConnectionError(f'FakeRequests: no route to {host}')
+        backend, prefix = self.routes[host]
+        try:
+            return backend.handle(method.upper(), path[len(prefix):], **kwargs)
+        except _StatusError as e:
+            return _http_response(e.status, {'message': f'fake {backend.name}: injected {e.status}'})
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# One-stop patching
+# ---------------------------------------------------------------------------
+
+class OfflineBackends:
+    """The set of fakes installed by offline_backends()."""
+
+    def __init__(self, sheet: FakeWorksheet, spotify: FakeSpotify, odesli: FakeOdesli, github: FakeGitHub):
+        self.sheet = sheet
+        self.spotify = spotify
+        self.odesli = odesli
+        self.github = github
+        self.http = FakeRequests(odesli=odesli, github=github)
+
+    @property
+    def backends(self) -> List[FakeBackend]:
+        return [self.sheet, self.spotify, self.odesli, self.github]
+
+    def request_counts(self) -> Dict[str, Dict[str, int]]:
+        return {b.name: b.counts() for b in self.backends}
+
+    def reset_counts(self) -> None:
+        for b in self.backends:
+            b.reset_counts()
+
+
+@contextlib.contextmanager
+def offline_backends(sheet=None, spotify=None, odesli=None, github=None, extra_modules=()):
+    """Patch every upstream client used by the pipeline with in-process fakes.
+
+    extra_modules lists already-imported modules (e.g. the enrichment scripts)
+    that bound get_google_sheet / get_spotify_api / requests by name and
+    should see the fakes too.
+
+    Yields an OfflineBackends holding the fakes for inspection.
+    """
+    import add_album
+    import export_json
+    import github_push
+    import pipeline
+
+    env = OfflineBackends(
+        sheet if sheet is not None else make_album_sheet(0),
+        spotify if spotify is not None else FakeSpotify(),
+        odesli if odesli is not None else FakeOdesli(),
+        github if github is not None else FakeGitHub(),
+    )
+
+    def get_sheet(*args, **kwargs):
+        return env.sheet
+
+    def get_spotify():
+        return env.spotify
+
+    modules = [add_album, export_json, pipeline, github_push, *extra_modules]
+    patches = [
+        patch.object(github_push, 'GITHUB_TOKEN', env.github.token),
+        patch.object(github_push, 'GITHUB_REPO_OWNER', 'fake-owner'),
+        patch.object(github_push, 'GITHUB_REPO_NAME', 'fake-site'),
+    ]
+    for module in modules:
+        if hasattr(module, 'get_google_sheet'):
+            patches.append(patch.object(module, 'get_google_sheet', get_sheet))
+        if hasattr(module, 'get_spotify_api'):
+            patches.append(patch.object(module, 'get_spotify_api', get_spotify))
+        if hasattr(module, 'requests'):
+            patches.append(patch.object(module, 'requests', env.http))
+
+    with contextlib.ExitStack() as stack:
+        for p in patches:
+            stack.enter_context(p)
+        yield env
@@ -0,0 +1,67 @@
+import dataclasses
+import os
+import sys
+from datetime import date
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from add_album import build_row_from_header, get_header_row_and_map, parse_album_info
+from album_record import AlbumRecord, JSON_FIELDS, parse_sheet_date
+from export_json import normalize_album_rows
+from fakes import FakeSpotify, make_album_sheet
+
+
+def test_is_slotted():
+    record = AlbumRecord(artist='A')
+    assert not hasattr(record, '__dict__')
+    with pytest.raises(AttributeError):
+        record.Artist = 'A'
+
+
+def test_spotify_payload_to_sheet_row_and_back():
+    sp = FakeSpotify()
+    raw = sp.add_album('4LH4d3cOWNNsVw41Gqt2kv', artist='Band', name='Record', release_date='1997',
+                       total_tracks=12, genres=(), artist_genres=('shoegaze', 'dream pop'))
+    record = AlbumRecord.from_spotify(raw, 'https://open.spotify.com/album/4LH4d3cOWNNsVw41Gqt2kv',
+                                      artist_genres=('shoegaze', 'dream pop'))
+    assert (record.year, record.total_tracks, record.genres) == ('1997', '12', 'shoegaze, dream pop')
+    assert record.artwork_url.endswith('-300')
+
+    sheet = make_album_sheet(0)
+    header_row, header_map = get_header_row_and_map(sheet)
+    record.picked_at, record.picker = date(2025, 1, 5), 'DG'
+    row = record.to_sheet_row(header_map, header_row)
+    assert row[:4] == ['=ROW()-1', '1/5/2025', 'Band', 'Record']
+
+    back = AlbumRecord.from_sheet_row(['7'] + row[1:], header_map)
+    assert back == dataclasses.replace(record, pick_number=7)
+
+
+def test_json_round_trip_keeps_the_data_json_schema():
+    sheet = make_album_sheet(5)
+    header_row, header_map = get_header_row_and_map(sheet)
+    entries = normalize_album_rows(sheet.get_all_values()[header_row:], header_map)
+    assert list(entries[0]) == list(JSON_FIELDS)
+    assert entries[0]['picked_at'] == '2019-01-06' and entries[0]['pick_number'] == 1
+    assert [AlbumRecord.from_json(e).to_json() for e in entries] == entries
+
+
+def test_legacy_dict_paths_are_unchanged():
+    info = parse_album_info(FakeSpotify()._album('4LH4d3cOWNNsVw41Gqt2kv'), 'url')
+    assert set(info) == {'spotify_album_id', 'Artist', 'Album', 'Year', 'spotify_album_url',
+                         'artwork_url', 'Label', 'Total Tracks', 'Genres'}
+    header_map = {'pick': 0, 'date': 1, 'artist': 2, 'picker': 4}
+    info['picker'] = 'SS'
+    assert build_row_from_header(header_map, 3, date(2024, 2, 9), info) == ['3', '2/9/2024', info['Artist'], '', 'SS']
+    record = AlbumRecord.from_album_info(info)
+    assert build_row_from_header(header_map, '', None, record, 1) == ['=ROW()-1', '', info['Artist'], '', 'SS']
+    assert record.pick_number == 0  # the record passed in is not modified
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1/5/2025', date(2025, 1, 5)), ('01/05/2025', date(2025, 1, 5)), ('2025-1-5', date(2025, 1, 5)),
+    ('2024-12-28T00:00:00', date(2024, 12, 28)), ('2/30/2024', None), ('1/5/25', None), ('TBD', None),
+])
+def test_parse_sheet_date(value, expected):
+    assert parse_sheet_date(value) == expected
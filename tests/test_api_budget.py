@@ -0,0 +1,175 @@
+"""Google Sheets API-call budgets per operation.
+
+Every operation runs against a counting FakeWorksheet (tests/fakes.py) at
+several synthetic sheet sizes. Two things are checked:
+
+  calls         — how many times each Worksheet method was hit. These must not
+                  grow: every extra call is a network round-trip.
+  column_reads  — cells downloaded, expressed as whole-column equivalents
+                  (cells_read <= column_reads * rows + HEADER_SLACK). This
+                  catches changes that start reading more of the sheet.
+
+If you make an operation cheaper, tighten its budget here so the gain is kept.
+If a change legitimately needs another call, raise the budget in the same
+commit and say why.
+"""
+import asyncio
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+import backfill_pickers
+import export_json
+import warmup
+from fakes import make_album_sheet, offline_backends, synthetic_album_id
+from pipeline import process_album
+
+# 100k rows re-checks the same linear bounds as 10k at ~5-10s per case: --run-slow.
+SIZES = [100, 10_000, pytest.param(100_000, marks=pytest.mark.slow)]
+HEADER_SLACK = 200  # header-row reads and similar fixed-size overhead, in cells
+
+BUDGETS = {
+    'process_album': {
+        'calls': {'find': 8, 'row_values': 3, 'col_values': 3, 'batch_get': 1, 'get_all_values': 1, 'append_row': 1},
+        'column_reads': 18,
+    },
+    'add_album': {
+        'calls': {'find': 6, 'row_values': 2, 'col_values': 3, 'batch_get': 1, 'append_row': 1},
+        'column_reads': 5,
+    },
+    'export_sheet_to_json': {
+        'calls': {'find': 2, 'row_values': 1, 'get_all_values': 1},
+        'column_reads': 13,
+    },
+    'backfill_pickers': {
+        'calls': {'find': 2, 'row_values': 1, 'get_all_values': 1, 'batch_update': 1},
+        'column_reads': 13,
+    },
+    # Bot mode after startup warm-up: header layout cached (add_album.enable_client_cache).
+    'process_album_warm_header': {
+        'calls': {'col_values': 3, 'batch_get': 1, 'get_all_values': 1, 'append_row': 1},
+        'column_reads': 18,
+    },
+    # ...and the tail pointer (add_album._tail_pointer) primed too: the next slot
+    # costs one TAIL_WINDOW-row read instead of two full columns.
+    'process_album_warm_tail': {
+        'calls': {'col_values': 3, 'batch_get': 1, 'get_all_values': 1, 'append_row': 1},
+        'column_reads': 16,
+    },
+    # With a warm SQLite replica (SHEET_CACHE_DB) the whole add is a single write.
+    'process_album_warm_replica': {
+        'calls': {'append_row': 1},
+        'column_reads': 0,
+    },
+}
+
+NEW_URL = f'https://open.spotify.com/album/{synthetic_album_id(10_000_000)}'
+
+
+def assert_within_budget(name, sheet, rows):
+    budget = BUDGETS[name]
+    counts = sheet.counts()
+    over = {
+        op: (n, budget['calls'].get(op, 0))
+        for op, n in counts.items()
+        if n > budget['calls'].get(op, 0)
+    }
+    assert not over, (
+        f'{name} exceeded its Sheets call budget at {rows} rows: '
+        + ', '.join(f'{op}={n} (budget {b})' for op, (n, b) in sorted(over.items()))
+        + '. Update BUDGETS in tests/test_api_budget.py only if the extra round-trip is intended.'
+    )
+    cell_budget = budget['column_reads'] * (rows + 1) + HEADER_SLACK
+    assert sheet.cells_read <= cell_budget, (
+        f'{name} read {sheet.cells_read} cells at {rows} rows '
+        f'(budget {cell_budget} = {budget["column_reads"]} columns + header slack).'
+    )
+
+
+@pytest.fixture(scope='module', params=SIZES, ids=lambda n: f'{n}_rows')
+def base_sheet(request):
+    return request.param, make_album_sheet(request.param)
+
+
+@pytest.fixture
+def sheet(base_sheet):
+    rows, base = base_sheet
+    return rows, base.clone()
+
+
+@pytest.fixture(autouse=True)
+def isolate(monkeypatch, tmp_path):
+    monkeypatch.setattr('retry_utils.time.sleep', lambda s: None)
+    monkeypatch.setattr('sheet_cache.SHEET_CACHE_DB', None)
+    monkeypatch.setattr('sheet_cache._replicas', {})
+    monkeypatch.chdir(tmp_path)  # export_sheet_to_json writes data.json to cwd
+
+
+def test_process_album_budget(sheet):
+    rows, ws = sheet
+    with offline_backends(sheet=ws):
+        result = asyncio.run(process_album(NEW_URL, picker='DG'))
+    assert result['success'] is True
+    assert_within_budget('process_album', ws, rows)
+
+
+def test_add_album_budget(sheet):
+    rows, ws = sheet
+    with offline_backends(sheet=ws):
+        assert add_album.add_album(url=NEW_URL) is True
+    assert_within_budget('add_album', ws, rows)
+
+
+def test_export_sheet_to_json_budget(sheet):
+    rows, ws = sheet
+    with offline_backends(sheet=ws):
+        albums = export_json.export_sheet_to_json()
+    assert len(albums) == rows
+    assert_within_budget('export_sheet_to_json', ws, rows)
+
+
+def test_backfill_pickers_budget(sheet):
+    rows, ws = sheet
+    with offline_backends(sheet=ws, extra_modules=[backfill_pickers]):
+        backfill_pickers.backfill_pickers(force=True)
+    assert ws.count('batch_update') == 1
+    assert_within_budget('backfill_pickers', ws, rows)
+
+
+def test_process_album_warm_replica_budget(sheet, monkeypatch, tmp_path):
+    import sheet_cache
+    rows, ws = sheet
+    monkeypatch.setattr('sheet_cache.SHEET_CACHE_DB', str(tmp_path / 'replica.sqlite3'))
+    sheet_cache.get_sheet_replica(ws).sync(ws)  # warm-up, not part of the budget
+    ws.reset_counts()
+    with offline_backends(sheet=ws):
+        result = asyncio.run(process_album(NEW_URL, picker='DG'))
+    assert result['success'] is True
+    assert_within_budget('process_album_warm_replica', ws, rows)
+
+
+def test_process_album_warm_header_budget(sheet, monkeypatch):
+    rows, ws = sheet
+    monkeypatch.setattr('add_album._client_cache', {'enabled': True, 'header_ttl': 300.0})
+    monkeypatch.setattr('add_album._header_cache', add_album.weakref.WeakKeyDictionary())
+    add_album.get_header_row_and_map(ws)  # what warmup.warm_up() primes
+    ws.reset_counts()
+    with offline_backends(sheet=ws):
+        result = asyncio.run(process_album(NEW_URL, picker='DG'))
+    assert result['success'] is True
+    assert_within_budget('process_album_warm_header', ws, rows)
+
+
+def test_process_album_warm_tail_budget(sheet, monkeypatch):
+    rows, ws = sheet
+    monkeypatch.setattr('add_album._client_cache', {'enabled': True, 'header_ttl': 300.0})
+    monkeypatch.setattr('add_album._header_cache', add_album.weakref.WeakKeyDictionary())
+    monkeypatch.setattr('add_album._tail_cache', add_album.weakref.WeakKeyDictionary())
+    with offline_backends(sheet=ws):
+        warmup._warm_sheets(None, None, None)  # primes header + tail, not part of the budget
+        ws.reset_counts()
+        result = asyncio.run(process_album(NEW_URL, picker='DG'))
+    assert result['success'] is True
+    assert_within_budget('process_album_warm_tail', ws, rows)
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from append_coordinator import AppendCoordinator
+from fakes import FakeSpotify, make_album_sheet, offline_backends
+
+URL_A = 'https://open.spotify.com/album/4LH4d3cOWNNsVw41Gqt2kv'
+URL_B = 'https://open.spotify.com/album/1ATL5GLyefJaxhQzSPVrLX'
+
+
+@pytest.mark.asyncio
+async def test_single_flight_runs_factory_once():
+    coordinator = AppendCoordinator()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'result'
+
+    results = await asyncio.gather(*(coordinator.single_flight('k', work) for _ in range(3)))
+    assert results == ['result'] * 3
+    assert len(calls) == 1
+    assert await coordinator.single_flight('k', work) == 'result'
+    assert len(calls) == 2  # finished runs are not cached
+
+
+@pytest.mark.asyncio
+async def test_append_lock_serializes_per_sheet():
+    coordinator = AppendCoordinator()
+    active, peak = 0, 0
+
+    async def critical(key):
+        nonlocal active, peak
+        async with coordinator.append_lock(key):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(critical('sheet') for _ in range(4)))
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_albums_overlap_lookups_but_get_distinct_dates():
+    from pipeline import process_album
+    spotify = FakeSpotify(latency=0.05)
+    with offline_backends(sheet=make_album_sheet(5), spotify=spotify) as env:
+        a, b = await asyncio.gather(process_album(URL_A), process_album(URL_B))
+
+    assert a['success'] and b['success']
+    assert spotify.max_in_flight == 2
+    assert env.sheet.count('append_row') == 2
+    dates = [row[1] for row in env.sheet.rows[-2:]]
+    assert len(set(dates)) == 2
+    assert [row[0] for row in env.sheet.rows[-2:]] == ['6', '7']
+
+
+@pytest.mark.asyncio
+async def test_concurrent_posts_of_same_album_append_once():
+    from pipeline import process_album
+    with offline_backends(sheet=make_album_sheet(5)) as env:
+        results = await asyncio.gather(process_album(URL_A), process_album(URL_A))
+
+    assert [r['success'] for r in results] == [True, True]
+    assert env.sheet.count('append_row') == 1
+    assert env.spotify.count('album') == 1
+    assert len(env.github.data_commits) == 1
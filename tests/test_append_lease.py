@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+import append_lease
+import pipeline
+from append_lease import LEASE_ACQUISITIONS, LeaseLost, LeaseTimeout, SheetLeaseLock, SqliteLeaseLock
+from fakes import make_album_sheet, offline_backends
+
+NEW_URL = 'https://open.spotify.com/album/4LH4d3cOWNNsVw41Gqt2kv'
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / 'lease.db')
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr('append_lease.POLL_INTERVAL', 0.0)
+
+
+def test_sqlite_lease_excludes_other_processes_and_reports_foreign_holders(db):
+    bot, cli = SqliteLeaseLock(db, owner='bot'), SqliteLeaseLock(db, owner='cli')
+    lease = bot.try_acquire('sheet')
+    assert lease is not None and not lease.foreign
+    assert cli.try_acquire('sheet') is None
+    assert bot.release(lease)
+
+    cli_lease = cli.try_acquire('sheet')
+    assert cli_lease.foreign is True  # the bot held it last
+    cli.release(cli_lease)
+    assert bot.try_acquire('sheet').foreign is True
+    assert bot.try_acquire('other-sheet').foreign is False
+
+
+def test_expired_lease_is_taken_over(db):
+    crashed, survivor = SqliteLeaseLock(db, owner='crashed', ttl=1), SqliteLeaseLock(db, owner='survivor')
+    stale = crashed.try_acquire('sheet', now=100)
+    assert survivor.try_acquire('sheet', now=100.5) is None
+    before = LEASE_ACQUISITIONS.value(backend='sqlite', outcome='expired')
+    assert survivor.try_acquire('sheet', now=102) is not None
+    assert LEASE_ACQUISITIONS.value(backend='sqlite', outcome='expired') == before + 1
+    assert crashed.release(stale) is False
+
+
+def test_acquire_times_out_while_held(db):
+    holder = SqliteLeaseLock(db, owner='holder')
+    holder.try_acquire('sheet')
+    before = LEASE_ACQUISITIONS.value(backend='sqlite', outcome='timeout')
+    with pytest.raises(LeaseTimeout):
+        append_lease.acquire(SqliteLeaseLock(db, owner='waiter'), 'sheet', timeout=0)
+    assert LEASE_ACQUISITIONS.value(backend='sqlite', outcome='timeout') == before + 1
+
+
+def test_sheet_lease_uses_a_lock_tab_and_last_claim_wins(monkeypatch):
+    ws = make_album_sheet(3)
+    a = SheetLeaseLock(ws, owner='a', settle=0)
+    b = SheetLeaseLock(ws, owner='b', settle=0)
+    lease = a.try_acquire('sheet')
+    assert ws.tabs['_aotw_lock'].rows[0][:2] == ['sheet', 'a']
+    assert b.try_acquire('sheet') is None
+    a.release(lease)
+    assert b.try_acquire('sheet').foreign is True
+    assert ws.rows[0][0] != 'a'  # the album tab is untouched
+
+    # Two claims racing for a free row: the one written last keeps it
+    b.release(b.try_acquire('sheet'))
+    racer = SheetLeaseLock(ws, owner='racer', settle=0.01)
+    monkeypatch.setattr('append_lease.time.sleep', lambda s: b._write('sheet', 'b', 4e9, 'b'))
+    assert racer.try_acquire('sheet') is None
+
+
+def test_sheet_lease_has_a_row_per_album_tab():
+    ws = make_album_sheet(3)
+    a = SheetLeaseLock(ws, owner='a', settle=0)
+    b = SheetLeaseLock(ws, owner='b', settle=0)
+    assert a.try_acquire('spreadsheet:0') is not None
+    assert b.try_acquire('spreadsheet:0') is None
+    assert b.try_acquire('spreadsheet:1') is not None  # another tab is not blocked
+    assert [row[:2] for row in ws.tabs['_aotw_lock'].rows] == [['spreadsheet:0', 'a'], ['spreadsheet:1', 'b']]
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'sheet'])
+def test_renew_extends_the_lease_until_taken_over(db, backend):
+    if backend == 'sqlite':
+        holder, other = SqliteLeaseLock(db, owner='holder', ttl=10), SqliteLeaseLock(db, owner='other', ttl=10)
+    else:
+        ws = make_album_sheet(1)
+        holder, other = SheetLeaseLock(ws, owner='holder', ttl=10, settle=0), SheetLeaseLock(ws, owner='other', settle=0)
+    lease = holder.try_acquire('sheet', now=100)
+    assert holder.renew(lease, now=105) and lease.expires_at == 115
+    assert other.try_acquire('sheet', now=112) is None  # would have expired at 110 without the renewal
+    assert other.try_acquire('sheet', now=116) is not None
+    assert holder.renew(lease, now=117) is False
+
+
+def test_heartbeat_keeps_a_slow_append_exclusive(db, monkeypatch):
+    monkeypatch.setattr('append_lease.APPEND_LOCK_BACKEND', 'sqlite')
+    monkeypatch.setattr('append_lease.APPEND_LOCK_DB', db)
+    monkeypatch.setattr('append_lease._sqlite_locks', {db: SqliteLeaseLock(db, owner='bot', ttl=0.3)})
+    ws = make_album_sheet(3)
+    append_row = ws.append_row
+    taken_meanwhile = []
+
+    def slow_append(*args, **kwargs):
+        time.sleep(0.8)  # well past the 0.3s TTL
+        taken_meanwhile.append(SqliteLeaseLock(db, owner='cli').try_acquire('fake-spreadsheet:0'))
+        return append_row(*args, **kwargs)
+
+    monkeypatch.setattr(ws, 'append_row', slow_append)
+    with offline_backends(sheet=ws):
+        assert add_album.add_album(NEW_URL) is True
+    assert taken_meanwhile == [None]
+
+
+def test_ensure_held_refuses_to_write_on_a_lost_or_lapsing_lease(db):
+    lease = SqliteLeaseLock(db, owner='holder', ttl=30).try_acquire('sheet', now=100)
+    append_lease.ensure_held(lease, now=105)
+    append_lease.ensure_held(None)
+    with pytest.raises(LeaseLost):
+        append_lease.ensure_held(lease, now=125)  # under ttl / 3 left
+    lease.lost = True
+    with pytest.raises(LeaseLost):
+        append_lease.ensure_held(lease, now=105)
+
+
+def test_heartbeat_flags_a_lease_taken_over_while_held(db):
+    holder = SqliteLeaseLock(db, owner='holder', ttl=0.15)
+    lease = append_lease.acquire(holder, 'sheet')
+    SqliteLeaseLock(db, owner='other').try_acquire('sheet', now=time.time() + 1)  # e.g. after a long pause
+    deadline = time.monotonic() + 2
+    while not lease.lost and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert lease.lost
+    with pytest.raises(LeaseLost):
+        append_lease.ensure_held(lease)
+    append_lease.release(holder, lease)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_rechecks_duplicates_after_another_process_appended(db, monkeypatch):
+    monkeypatch.setattr('append_lease.APPEND_LOCK_BACKEND', 'sqlite')
+    monkeypatch.setattr('append_lease.APPEND_LOCK_DB', db)
+    monkeypatch.setattr('append_lease._sqlite_locks', {})
+    fetch = pipeline._fetch_album_info
+
+    def backfill_adds_it_first(url):
+        # A CLI back-fill in another process adds the same album while the bot looks it up
+        with patch.dict('append_lease._sqlite_locks', {db: SqliteLeaseLock(db, owner='cli')}):
+            assert add_album.add_album(url)
+        return fetch(url)
+
+    monkeypatch.setattr('pipeline._fetch_album_info', backfill_adds_it_first)
+    with offline_backends(sheet=make_album_sheet(3)) as env:
+        result = await pipeline.process_album(NEW_URL, apple_music_url='https://music.apple.com/x')
+    assert result['success'] is False
+    assert 'Already added — Pick #4' in result['message']
+    assert len(env.sheet.rows) == 5  # header + 3 + the back-fill's row, no duplicate
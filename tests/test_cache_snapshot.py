@@ -0,0 +1,124 @@
+import gzip
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+import cache_snapshot
+import github_push
+import warmup
+from fakes import make_album_sheet, offline_backends
+from spotipy.cache_handler import MemoryCacheHandler
+
+
+@pytest.fixture(autouse=True)
+def warm_caches(monkeypatch):
+    monkeypatch.setattr('add_album._client_cache', {'enabled': True, 'header_ttl': 300.0})
+    monkeypatch.setattr('github_push._publish_cache', {'enabled': True, 'targets': {}})
+    monkeypatch.setattr('warmup._state', {'status': 'pending', 'timings_ms': {}, 'errors': {}, 'restored': [], 'snapshot': None})
+    yield
+    add_album.clear_client_cache()
+
+
+def restart():
+    """Forget everything a new process wouldn't have."""
+    add_album.clear_client_cache()
+    github_push.restore_publish_state(None, None)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'snap' / 'cache.json.gz')
+    snapshot = {'version': cache_snapshot.SNAPSHOT_VERSION, 'headers': {}, 'github': {'sha': 'abc'}}
+    assert cache_snapshot.save(path, snapshot)
+    assert cache_snapshot.load(path) == snapshot
+    assert os.listdir(tmp_path / 'snap') == ['cache.json.gz']  # no temp files left behind
+
+
+def test_failed_save_removes_its_temp_file(tmp_path, monkeypatch):
+    def full_disk(src, dst):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr('cache_snapshot.os.replace', full_disk)
+    snapshot = {'version': cache_snapshot.SNAPSHOT_VERSION, 'headers': {}, 'spotify_token': {'access_token': 'secret'}}
+    assert cache_snapshot.save(str(tmp_path / 'cache.json.gz'), snapshot) is False
+    assert os.listdir(tmp_path) == []
+
+
+def test_corrupt_or_foreign_snapshot_is_ignored(tmp_path):
+    path = tmp_path / 'cache.json.gz'
+    path.write_bytes(b'not gzip')
+    assert cache_snapshot.load(str(path)) is None
+    with gzip.open(path, 'wb') as f:
+        f.write(b'{"version": 999}')
+    assert cache_snapshot.load(str(path)) is None
+    assert cache_snapshot.load(str(tmp_path / 'missing.gz')) is None
+
+
+@pytest.mark.asyncio
+async def test_restart_from_snapshot_skips_header_discovery_and_sha_lookup(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.json.gz')
+    monkeypatch.setattr('cache_snapshot.CACHE_SNAPSHOT_PATH', path)
+    ws = make_album_sheet(5)
+    with offline_backends(sheet=ws) as env:
+        await warmup.warm_up()
+        github_push.push_data_to_github('{"albums": []}', 'first')
+        assert cache_snapshot.save()
+
+        restart()
+        state = await warmup.warm_up()
+        assert state['status'] == 'warm', state['errors']
+        assert state['restored'] == ['github', 'sheets']
+        assert ws.count('find') == 2  # only the first, cold warm-up searched for headers
+
+        env.reset_counts()
+        add_album.get_header_row_and_map(ws)
+        github_push.push_data_to_github('{"albums": [1]}', 'second')
+    assert ws.count() == 0
+    assert env.github.counts() == {'PUT contents': 1}
+
+
+@pytest.mark.asyncio
+async def test_stale_header_layout_is_rediscovered(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cache.json.gz')
+    monkeypatch.setattr('cache_snapshot.CACHE_SNAPSHOT_PATH', path)
+    ws = make_album_sheet(5)
+    with offline_backends(sheet=ws):
+        await warmup.warm_up()
+        cache_snapshot.save()
+        restart()
+        ws.rows[0].insert(2, 'Mood')  # someone added a column
+        state = await warmup.warm_up()
+        header_row, header_map = add_album.get_header_row_and_map(ws)
+    assert 'sheets' not in state['restored']
+    assert header_map['mood'] == 2
+
+
+def test_unchanged_export_is_not_pushed_and_stale_sha_is_refetched():
+    with offline_backends() as env:
+        github_push.push_data_to_github('{"a": 1}', 'one')
+        github_push.push_data_to_github('{"a": 1}', 'same again')
+        assert len(env.github.commits) == 1
+
+        # Someone else pushes; our remembered SHA is now stale
+        key = next(iter(env.github.files))
+        env.github.files[key] = b'{"edited": true}'
+        env.reset_counts()
+        github_push.push_data_to_github('{"a": 2}', 'two')
+    assert env.github.counts() == {'PUT contents': 2, 'GET contents': 1}
+    assert env.github.files[key] == b'{"a": 2}'
+
+
+def test_spotify_token_restored_only_while_valid(monkeypatch):
+    handler = MemoryCacheHandler()
+    client = SimpleNamespace(auth_manager=SimpleNamespace(cache_handler=handler))
+    monkeypatch.setattr('add_album.get_spotify_api', lambda: client)
+
+    expired = {'access_token': 'old', 'expires_at': 0}
+    assert not cache_snapshot.restore_spotify({'spotify_token': expired})
+    assert handler.get_cached_token() is None
+
+    valid = {'access_token': 'tok', 'expires_at': 4_000_000_000}
+    assert cache_snapshot.restore_spotify({'spotify_token': valid})
+    assert handler.get_cached_token() == valid
@@ -0,0 +1,53 @@
+import json
+import os
+import sys
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from export_formats import decode_columnar, encode_columnar, load_export, parse_formats, write_exports
+from export_json import export_sheet_to_json
+from fakes import make_album_sheet, offline_backends
+
+
+@pytest.fixture
+def albums(tmp_path):
+    sheet = make_album_sheet(40)
+    sheet.rows[3][1] = ''                                   # a pick without a date
+    sheet.rows[4][6] = 'https://bandcamp.com/x'              # a non-Spotify album
+    sheet.rows[5][10] = 'shoegaze, , dream pop'              # odd genre spacing survives
+    with offline_backends(sheet=sheet):
+        return export_sheet_to_json(output_path=str(tmp_path / 'data.json'), formats=())
+
+
+def test_columnar_round_trips_exactly(albums):
+    payload = encode_columnar(albums)
+    assert payload['count'] == len(albums)
+    assert decode_columnar(json.loads(json.dumps(payload))) == albums
+    columns = payload['columns']
+    assert columns['picker']['table'] == ['SS', 'DG', 'RB', 'JC']
+    assert columns['picked_at']['values'][:2] == [17902, 17909]  # days since 1970-01-01
+    assert columns['artwork_url']['prefix'] == 'https://i.scdn.co/image/'
+    assert decode_columnar(encode_columnar([])) == []
+
+
+def test_export_writes_requested_formats_next_to_data_json(tmp_path):
+    output = tmp_path / 'data.json'
+    with offline_backends(sheet=make_album_sheet(25)):
+        albums = export_sheet_to_json(output_path=str(output), formats='columnar,ndjson')
+    columnar, ndjson = tmp_path / 'data.columnar.json', tmp_path / 'data.ndjson'
+    assert load_export(str(columnar)) == albums == load_export(str(ndjson)) == load_export(str(output))
+    assert len(ndjson.read_text().splitlines()) == 25
+    assert columnar.stat().st_size < output.stat().st_size / 2
+
+
+def test_msgpack_round_trip(albums, tmp_path):
+    pytest.importorskip('msgpack')
+    written = write_exports(albums, str(tmp_path / 'data.json'), ['msgpack'])
+    assert load_export(written['msgpack']) == albums
+
+
+def test_unknown_format_is_rejected():
+    assert parse_formats(' Columnar , ndjson') == ['columnar', 'ndjson']
+    with pytest.raises(ValueError, match='parquet'):
+        parse_formats('parquet')
@@ -250,5 +250,5 @@ def test_export_and_push_uses_generic_commit_message_when_no_album_info(monkeypa
         mock_open.return_value.__enter__.return_value.read.return_value = SAMPLE_JSON
         github_push.export_and_push(album_info=None)
 
-    commit_msg = mock_push.call_args[0][1]
+    commit_msg = mock_push.call_args_list[0][0][1]
     assert commit_msg == 'Update album data'
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from idempotency import REPLAYS, IdempotencyStore, update_keys
+
+VALID_URL = "https://open.spotify.com/album/0SeRWS3scHWplJhMppd6rJ"
+VALID_APPLE_URL = "https://music.apple.com/us/album/test/123456789"
+ALLOWED_ID = "12345678"
+
+
+def test_either_key_identifies_a_redelivery():
+    store = IdempotencyStore()
+    entry, is_new = store.claim([('update', 1), ('message', 'chat', 10)])
+    assert is_new and not entry.finished
+    entry.done({'success': True})
+    again, is_new = store.claim([('update', 2), ('message', 'chat', 10)])
+    assert not is_new and again.result == {'success': True}
+
+
+def test_entries_expire_and_are_bounded():
+    store = IdempotencyStore(max_entries=3, ttl=60)
+    store.claim([('update', 1)], now=0)
+    assert store.claim([('update', 1)], now=30)[1] is False
+    assert store.claim([('update', 1)], now=61)[1] is True  # expired, processed again
+    for update_id in range(2, 6):
+        store.claim([('update', update_id)], now=62)
+    assert len(store) == 3
+    assert store.claim([('update', 2)], now=62)[1] is True  # evicted as the oldest
+
+
+def test_release_lets_a_redelivery_retry():
+    store = IdempotencyStore()
+    store.claim([('update', 7)])
+    store.release([('update', 7)])
+    assert store.claim([('update', 7)])[1] is True
+
+
+def make_update(update_id=1, message_id=100):
+    update = MagicMock()
+    update.update_id = update_id
+    update.effective_chat.id = int(ALLOWED_ID)
+    update.effective_user.username = "testuser"
+    update.message.message_id = message_id
+    update.message.text = f"@aotw {VALID_URL} {VALID_APPLE_URL}"
+    status = MagicMock()
+    status.edit_text = AsyncMock()
+    update.message.reply_text = AsyncMock(return_value=status)
+    return update
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.setenv('TELEGRAM_ALLOWED_CHAT_ID', ALLOWED_ID)
+    monkeypatch.setattr('tenants._registry', None)
+    monkeypatch.setattr('idempotency._store', IdempotencyStore())
+    import telegram_bot
+    monkeypatch.setattr('telegram_bot.EDIT_MIN_INTERVAL', 0.0)
+    return telegram_bot
+
+
+@pytest.mark.asyncio
+async def test_redelivered_update_does_not_rerun_the_pipeline(bot):
+    release = asyncio.Event()
+    result = {'success': True, 'message': 'Added!', 'data': {'Album': 'Test'}}
+
+    async def slow_pipeline(*args, **kwargs):
+        await release.wait()
+        return result
+
+    process = AsyncMock(side_effect=slow_pipeline)
+    before = REPLAYS.value(state='in_flight')
+    with patch.dict('sys.modules', {'pipeline': MagicMock(process_album=process)}):
+        first = asyncio.create_task(bot.handle_message(make_update(), MagicMock()))
+        await asyncio.sleep(0)
+        while_running = make_update()
+        assert await bot.handle_message(while_running, MagicMock()) is None
+        release.set()
+        assert await first == result
+
+        after = make_update()
+        assert await bot.handle_message(after, MagicMock()) == result
+
+    assert process.await_count == 1
+    assert REPLAYS.value(state='in_flight') == before + 1
+    while_running.message.reply_text.assert_not_called()
+    after.message.reply_text.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_distinct_messages_are_processed(bot):
+    process = AsyncMock(return_value={'success': True, 'message': 'Added!', 'data': {}})
+    with patch.dict('sys.modules', {'pipeline': MagicMock(process_album=process)}):
+        await bot.handle_message(make_update(1, 100), MagicMock())
+        await bot.handle_message(make_update(2, 101), MagicMock())
+    assert process.await_count == 2
+
+
+def test_update_keys_cover_update_and_message():
+    assert update_keys(make_update(5, 50)) == [('update', 5), ('message', ALLOWED_ID, 50)]
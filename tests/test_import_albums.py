@@ -0,0 +1,81 @@
+import math
+import os
+import sys
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import import_albums
+from add_album import get_albums_info, get_album_info
+from fakes import FakeSpotify, make_album_sheet, offline_backends, synthetic_album_id
+from import_albums import import_albums as run_import, playlist_entries, read_csv
+
+
+def album_url(album_id):
+    return f'https://open.spotify.com/album/{album_id}'
+
+
+NEW_IDS = [synthetic_album_id(i) for i in range(1000, 1045)]
+
+
+pytestmark = pytest.mark.usefixtures('no_retry_sleep')
+
+
+def test_bulk_lookup_matches_single_lookups():
+    sp = FakeSpotify()
+    ids = NEW_IDS[:25]
+    bulk = get_albums_info(ids, sp)
+    assert sp.count('albums') == 2  # 20 + 5
+    assert sp.count('artists') == 1
+    for album_id in ids:
+        assert bulk[album_id] == get_album_info(album_url(album_id), sp)
+    assert get_albums_info(['0' * 22], FakeSpotify(auto_catalog=False)) == {}
+
+
+def test_playlist_is_paged_and_reduced_to_unique_albums():
+    sp = FakeSpotify()
+    tracks = [NEW_IDS[i // 3] for i in range(3 * 40)]  # three tracks per album
+    sp.add_playlist('p' * 22, tracks)
+    entries = playlist_entries(sp, 'p' * 22)
+    assert [e['url'] for e in entries] == [album_url(i) for i in NEW_IDS[:40]]
+    assert sp.count('playlist_items') == 1 and sp.count('next') == 1  # 120 tracks, 100 per page
+
+
+def test_csv_import_dedups_and_appends_in_chunks(tmp_path):
+    sheet = make_album_sheet(10)
+    existing = synthetic_album_id(3)
+    path = tmp_path / 'picks.csv'
+    lines = ['URL,Date,Picker,Apple_Music_URL',
+             f'{album_url(existing)},,SS,',           # already in the sheet
+             f'{album_url(NEW_IDS[0])},,DG,https://music.apple.com/x',
+             f'{album_url(NEW_IDS[0])},,DG,',           # listed twice
+             'https://example.com/not-an-album,,,']
+    lines += [f'{album_url(album_id)},,RB,' for album_id in NEW_IDS[1:30]]
+    lines.append(f'{album_url(NEW_IDS[30])},2030-01-01,JC,')
+    path.write_text('\n'.join(lines) + '\n')
+
+    with offline_backends(sheet=sheet, extra_modules=[import_albums]) as env:
+        summary = run_import(read_csv(str(path)), chunk_size=12)
+
+    assert summary['added'] == 31
+    assert len(summary['duplicates']) == 2 and len(summary['invalid']) == 1
+    assert len(sheet.rows) == 1 + 10 + 31
+    assert sheet.count('append_rows') == math.ceil(31 / 12)
+    assert env.spotify.count('albums') == math.ceil(31 / 20)
+    assert env.spotify.count('album') == 0 and env.spotify.count('artist') == 0
+    assert summary['api_calls']['spotify'] == env.spotify.count()
+
+    first = sheet.rows[11]
+    assert first[1] == '3/17/2019'  # a week after the sheet's last pick (3/10/2019)
+    assert first[11] == 'https://music.apple.com/x' and first[12] == 'DG'
+    assert sheet.rows[-2][1] == '10/6/2019'  # consecutive weeks across chunks
+    assert sheet.rows[-1][1] == '1/1/2030'
+
+
+def test_dry_run_writes_nothing():
+    sheet = make_album_sheet(5)
+    entries = [{'url': album_url(i), 'date': '', 'picker': '', 'apple_music_url': ''} for i in NEW_IDS[:5]]
+    with offline_backends(sheet=sheet, extra_modules=[import_albums]):
+        summary = run_import(entries, dry_run=True)
+    assert summary['would_add'] == 5 and summary['added'] == 0
+    assert len(sheet.rows) == 6 and sheet.count('append_rows') == 0
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+import types
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from lazy_imports import lazy_globals
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+
+
+def _modules_after_import(module):
+    proc = subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print("\\n".join(sys.modules))'],
+        cwd=SRC_DIR, env=dict(os.environ, PYTHONPATH=SRC_DIR),
+        capture_output=True, text=True, check=True,
+    )
+    return set(proc.stdout.split())
+
+
+def test_pipeline_import_defers_heavy_clients():
+    loaded = _modules_after_import('pipeline')
+    for heavy in ('spotipy', 'gspread', 'requests', 'github_push'):
+        assert heavy not in loaded, heavy
+
+
+def test_lazy_name_loads_on_first_use_and_caches():
+    module = types.ModuleType('lazy_demo')
+    _lazy, module.__getattr__ = lazy_globals(vars(module), {'dumps': ('json', 'dumps')})
+    assert 'dumps' not in vars(module)
+    import json
+    assert module.dumps is json.dumps
+    assert vars(module)['dumps'] is json.dumps
+
+
+def test_patched_global_wins_over_import():
+    from unittest.mock import patch
+    import add_album
+    with patch('add_album.SpotifyClientCredentials') as creds, \
+         patch('add_album.spotipy.Spotify') as spotify, \
+         patch.dict(os.environ, {'SPOTIFY_CLIENT_ID': 'id', 'SPOTIFY_CLIENT_SECRET': 'secret'}):
+        add_album.get_spotify_api()
+    creds.assert_called_once_with(client_id='id', client_secret='secret')
+    spotify.assert_called_once()
@@ -0,0 +1,96 @@
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import metrics
+from metrics import Counter, Gauge, Histogram, Registry, stage_timer
+
+
+def test_counter_renders_with_labels():
+    registry = Registry()
+    c = registry.register(Counter('x_total', 'Things.', ('kind',)))
+    c.inc(kind='a')
+    c.inc(2, kind='b')
+    text = registry.render()
+    assert '# TYPE x_total counter' in text
+    assert 'x_total{kind="a"} 1' in text
+    assert 'x_total{kind="b"} 2' in text
+
+
+def test_counter_rejects_wrong_labels():
+    c = Counter('y_total', 'Things.', ('kind',))
+    with pytest.raises(ValueError):
+        c.inc(other='a')
+
+
+def test_gauge_set_and_dec():
+    g = Gauge('depth', 'Depth.')
+    g.set(5)
+    g.dec()
+    assert g.value() == 4
+    assert 'depth 4' in '\n'.join(g.render())
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram('lat_seconds', 'Latency.', ('stage',), buckets=(0.1, 1.0))
+    h.observe(0.05, stage='s')
+    h.observe(0.5, stage='s')
+    h.observe(5, stage='s')
+    lines = h.render()
+    assert 'lat_seconds_bucket{stage="s",le="0.1"} 1' in lines
+    assert 'lat_seconds_bucket{stage="s",le="1"} 2' in lines
+    assert 'lat_seconds_bucket{stage="s",le="+Inf"} 3' in lines
+    assert 'lat_seconds_count{stage="s"} 3' in lines
+    assert h.sum(stage='s') == pytest.approx(5.55)
+
+
+def test_label_values_are_escaped():
+    c = Counter('z_total', 'Z.', ('v',))
+    c.inc(v='a"b\\c')
+    assert 'z_total{v="a\\"b\\\\c"} 1' in c.render()
+
+
+def test_stage_timer_records_even_on_error():
+    before = metrics.STAGE_LATENCY.count(stage='test_failing_stage')
+    with pytest.raises(RuntimeError):
+        with stage_timer('test_failing_stage'):
+            raise RuntimeError('boom')
+    assert metrics.STAGE_LATENCY.count(stage='test_failing_stage') == before + 1
+
+
+@pytest.mark.asyncio
+async def test_process_album_records_every_stage(monkeypatch):
+    from fakes import make_album_sheet, offline_backends
+    from pipeline import process_album
+
+    monkeypatch.setattr('retry_utils.time.sleep', lambda s: None)
+    stages = ['validation', 'sheet_open', 'dedup', 'spotify_album', 'spotify_artist',
+              'odesli', 'append', 'export', 'github_get', 'github_put']
+    before = {s: metrics.STAGE_LATENCY.count(stage=s) for s in stages}
+
+    with offline_backends(sheet=make_album_sheet(3)):
+        result = await process_album('https://open.spotify.com/album/4LH4d3cOWNNsVw41Gqt2kv')
+
+    assert result['success'] is True
+    for stage in stages:
+        pushes = 2 if stage.startswith('github_') else 1  # data.json, then data.search.json
+        assert metrics.STAGE_LATENCY.count(stage=stage) == before[stage] + pushes, stage
+
+
+@pytest.mark.asyncio
+async def test_upstream_errors_and_retries_are_counted(monkeypatch):
+    from fakes import FakeGitHub, make_album_sheet, offline_backends
+    from pipeline import process_album
+
+    monkeypatch.setattr('retry_utils.time.sleep', lambda s: None)
+    errors_before = metrics.UPSTREAM_ERRORS.value(upstream='github')
+    retries_before = metrics.RETRIES.value(function='push_data_to_github')
+
+    with offline_backends(sheet=make_album_sheet(3), github=FakeGitHub(error_rate=1.0)):
+        result = await process_album('https://open.spotify.com/album/4LH4d3cOWNNsVw41Gqt2kv',
+                                     apple_music_url='https://music.apple.com/x')
+
+    assert result['partial_failure'] is True
+    assert metrics.UPSTREAM_ERRORS.value(upstream='github') == errors_before + 3
+    assert metrics.RETRIES.value(function='push_data_to_github') == retries_before + 2
@@ -0,0 +1,160 @@
+"""End-to-end pipeline runs against the in-process fakes in tests/fakes.py.
+
+These exercise real request sequences (no MagicMock patching of pipeline
+internals) so they also cover the fakes that benchmarks/bench_e2e.py uses.
+"""
+import os
+import sys
+import json
+import base64
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from fakes import FakeGitHub, FakeSpotify, make_album_sheet, offline_backends, synthetic_album_id
+from github_push import export_and_push
+from pipeline import process_album
+
+NEW_ID = '4LH4d3cOWNNsVw41Gqt2kv'
+NEW_URL = f'https://open.spotify.com/album/{NEW_ID}'
+
+
+pytestmark = pytest.mark.usefixtures('no_retry_sleep')
+
+
+def _published(env):
+    content = env.github.files['fake-owner/fake-site/public/data.json']
+    return json.loads(content.decode('utf-8'))
+
+
+@pytest.mark.asyncio
+async def test_process_album_runs_end_to_end_offline():
+    with offline_backends(sheet=make_album_sheet(5)) as env:
+        result = await process_album(NEW_URL, picker='DG')
+
+    assert result['success'] is True
+    assert 'partial_failure' not in result
+    assert env.sheet.rows[-1][0] == '6'  # =ROW()-1 evaluated by the fake sheet
+    published = _published(env)
+    assert [a['pick_number'] for a in published] == [1, 2, 3, 4, 5, 6]
+    assert published[-1]['spotify_album_id'] == NEW_ID
+    assert published[-1]['apple_music_url'].endswith(NEW_ID)
+    assert env.spotify.count('album') == 1
+    assert env.odesli.count() == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_is_rejected_without_spotify_call():
+    existing = f'https://open.spotify.com/album/{synthetic_album_id(2)}'
+    with offline_backends(sheet=make_album_sheet(5)) as env:
+        result = await process_album(existing)
+    assert result['success'] is False
+    assert 'Already added' in result['message']
+    assert env.spotify.count() == 0
+    assert env.github.count() == 0
+
+
+@pytest.mark.asyncio
+async def test_github_outage_is_partial_failure():
+    github = FakeGitHub(error_rate=1.0, error_status=503)
+    with offline_backends(sheet=make_album_sheet(3), github=github) as env:
+        result = await process_album(NEW_URL, apple_music_url='https://music.apple.com/x')
+    assert result['success'] is True
+    assert result['partial_failure'] is True
+    assert env.github.count('GET contents') == 3  # retried by retry_with_backoff
+    assert env.odesli.count() == 0  # caller supplied the Apple Music URL
+
+
+@pytest.mark.asyncio
+async def test_spotify_quota_exhaustion_is_reported():
+    spotify = FakeSpotify(quota=0)
+    with offline_backends(sheet=make_album_sheet(3), spotify=spotify) as env:
+        result = await process_album(NEW_URL)
+    assert result['success'] is False
+    assert len(env.sheet.rows) == 4  # nothing appended
+
+
+def test_fake_github_rejects_stale_sha():
+    with offline_backends(sheet=make_album_sheet(2)) as env:
+        assert export_and_push()[0] is True
+        resp = env.http.put(
+            'https://api.github.com/repos/fake-owner/fake-site/contents/public/data.json',
+            headers={'Authorization': f'token {env.github.token}'},
+            json={'message': 'x', 'content': base64.b64encode(b'[]').decode(), 'sha': 'stale'},
+        )
+    assert resp.status_code == 409
+    assert len(env.github.data_commits) == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_appends_once_and_pushes_once():
+    from pipeline import process_albums_batch
+    second_id = '1ATL5GLyefJaxhQzSPVrLX'
+    duplicate = f'https://open.spotify.com/album/{synthetic_album_id(2)}'
+    entries = [
+        {'url': NEW_URL, 'apple_music_url': '', 'picker': 'DG'},
+        {'url': duplicate, 'apple_music_url': '', 'picker': 'SS'},
+        {'url': f'https://open.spotify.com/album/{second_id}', 'apple_music_url': 'https://music.apple.com/x', 'picker': 'RB'},
+        {'url': NEW_URL, 'apple_music_url': '', 'picker': 'DG'},
+    ]
+    with offline_backends(sheet=make_album_sheet(5)) as env:
+        result = await process_albums_batch(entries)
+
+    assert result['success'] is True
+    assert [r['success'] for r in result['results']] == [True, False, True, False]
+    assert 'Already added' in result['results'][1]['message']
+    assert 'twice' in result['results'][3]['message']
+    assert env.sheet.count('append_rows') == 1
+    assert env.sheet.count('append_row') == 0
+    assert len(env.github.data_commits) == 1
+    assert [row[0] for row in env.sheet.rows[-2:]] == ['6', '7']
+    published = _published(env)
+    assert [a['spotify_album_id'] for a in published[-2:]] == [NEW_ID, second_id]
+    assert published[-1]['picked_at'] > published[-2]['picked_at']
+    assert env.odesli.count() == 1  # second album came with its Apple Music link
+
+
+@pytest.mark.asyncio
+async def test_progress_callback_reports_stages():
+    stages = []
+
+    async def progress(text):
+        stages.append(text)
+
+    with offline_backends(sheet=make_album_sheet(5)):
+        result = await process_album(NEW_URL, progress=progress)
+
+    assert result['success'] is True
+    assert [s.split()[0] for s in stages] == ['🔎', '📝']
+
+
+def test_add_albums_batch_reports_each_url_and_appends_once():
+    from add_album import add_albums
+    duplicate = f'https://open.spotify.com/album/{synthetic_album_id(1)}'
+    urls = [NEW_URL, 'not a url', duplicate, 'https://open.spotify.com/album/1ATL5GLyefJaxhQzSPVrLX', NEW_URL]
+    updates = []
+    with offline_backends(sheet=make_album_sheet(5)) as env:
+        results = add_albums(urls, progress=lambda i, status: updates.append(i))
+
+    assert [r['success'] for r in results] == [True, False, False, True, False]
+    assert [r['message'].split()[0] for r in results] == ['Added', 'Invalid', 'Already', 'Added', 'Listed']
+    assert all(r['seconds'] >= 0 for r in results)
+    assert sorted(set(updates)) == [0, 1, 2, 3, 4]
+    assert env.sheet.count('append_rows') == 1
+    assert [row[:2] for row in env.sheet.rows[-2:]] == [['6', '2/10/2019'], ['7', '2/17/2019']]
+
+
+@pytest.mark.asyncio
+async def test_profiled_process_album_includes_worker_threads(tmp_path):
+    import pstats
+    import profiling
+    saved = dict(profiling._config)
+    profiling.enable_profiling(str(tmp_path), mem=False)
+    try:
+        with offline_backends(sheet=make_album_sheet(5)):
+            assert (await process_album(NEW_URL, picker='DG'))['success'] is True
+    finally:
+        profiling._config.update(saved)
+    [prof] = tmp_path.glob('*-process_album-*.prof')
+    functions = {func for _, _, func in pstats.Stats(str(prof)).stats}
+    # Sheets, Spotify and export/push all run in asyncio worker threads
+    assert {'check_duplicate', '_append_album_row', 'export_and_push'} <= functions
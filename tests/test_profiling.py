@@ -0,0 +1,131 @@
+import asyncio
+import os
+import pstats
+import sys
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import profiling
+from profiling import profile_from_argv, profile_run, profiled
+
+
+@pytest.fixture(autouse=True)
+def restore_profiling_config():
+    saved = dict(profiling._config)
+    yield
+    profiling._config.update(saved)
+
+
+def test_disabled_profiling_writes_nothing(tmp_path):
+    profiling.disable_profiling()
+    profiling._config['dir'] = str(tmp_path)
+    with profile_run('noop') as run_id:
+        sum(range(100))
+    assert run_id is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_run_writes_cpu_and_memory_reports(tmp_path):
+    profiling.enable_profiling(str(tmp_path))
+    with profile_run('export') as run_id:
+        data = [str(i) * 10 for i in range(5000)]
+    assert data
+    assert '-export-' in run_id
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == sorted([f'{run_id}.prof', f'{run_id}.cpu.txt', f'{run_id}.mem.txt'])
+    assert 'peak traced memory' in (tmp_path / f'{run_id}.mem.txt').read_text()
+
+
+def test_cpu_only_mode_skips_tracemalloc(tmp_path):
+    profiling.enable_profiling(str(tmp_path), mem=False)
+    with profile_run('cpu') as run_id:
+        pass
+    assert not (tmp_path / f'{run_id}.mem.txt').exists()
+    assert (tmp_path / f'{run_id}.prof').exists()
+
+
+def test_nested_runs_fold_into_outer(tmp_path):
+    profiling.enable_profiling(str(tmp_path))
+
+    @profiled('inner')
+    def inner():
+        return 42
+
+    with profile_run('outer'):
+        assert inner() == 42
+    assert all('outer' in p.name for p in tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_profiled_async_function(tmp_path):
+    profiling.enable_profiling(str(tmp_path))
+
+    @profiled()
+    async def work():
+        return 'done'
+
+    assert await work() == 'done'
+    assert any('-work-' in p.name and p.suffix == '.prof' for p in tmp_path.iterdir())
+
+
+def _profiled_functions(path):
+    return {func for _, _, func in pstats.Stats(str(path)).stats}
+
+
+def _sheet_work():
+    return sum(i * i for i in range(20000))
+
+
+def _spotify_work():
+    return sorted(str(i) for i in range(5000))
+
+
+@pytest.mark.asyncio
+async def test_worker_thread_work_is_in_the_profile(tmp_path):
+    profiling.enable_profiling(str(tmp_path), mem=False)
+
+    @profiled('pipeline')
+    async def pipeline():
+        return await profiling.to_thread(_sheet_work)
+
+    assert await pipeline() == _sheet_work()
+    [prof] = tmp_path.glob('*-pipeline-*.prof')
+    assert '_sheet_work' in _profiled_functions(prof)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_runs_are_profiled_separately(tmp_path):
+    profiling.enable_profiling(str(tmp_path), mem=False)
+
+    @profiled('sheets')
+    async def sheets():
+        await asyncio.sleep(0.01)
+        return await profiling.to_thread(_sheet_work)
+
+    @profiled('spotify')
+    async def spotify():
+        await asyncio.sleep(0.01)
+        return await profiling.to_thread(_spotify_work)
+
+    await asyncio.gather(sheets(), spotify())
+    [sheets_prof] = tmp_path.glob('*-sheets-*.prof')
+    [spotify_prof] = tmp_path.glob('*-spotify-*.prof')
+    assert '_sheet_work' in _profiled_functions(sheets_prof)
+    assert '_spotify_work' not in _profiled_functions(sheets_prof)
+    assert '_spotify_work' in _profiled_functions(spotify_prof)
+    assert '_sheet_work' not in _profiled_functions(spotify_prof)
+
+
+@pytest.mark.asyncio
+async def test_to_thread_without_a_run_is_plain_to_thread():
+    profiling.enable_profiling()
+    assert await profiling.to_thread(_sheet_work) == _sheet_work()
+
+
+def test_profile_from_argv_strips_flags():
+    profiling.disable_profiling()
+    argv = ['script.py', 'data.json', '--profile', '--profile-dir=/tmp/prof']
+    profile_from_argv(argv)
+    assert argv == ['script.py', 'data.json']
+    assert profiling.is_enabled()
+    assert profiling._config['dir'] == '/tmp/prof'
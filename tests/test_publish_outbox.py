@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import publish_outbox
+from fakes import FakeGitHub, make_album_sheet, offline_backends
+from pipeline import process_album
+from publish_outbox import OUTBOX_DEPTH, OUTBOX_OLDEST_AGE, PublishOutbox, reconcile_once
+
+NEW_URL = 'https://open.spotify.com/album/4LH4d3cOWNNsVw41Gqt2kv'
+LATER = time.time() + 3600
+
+
+pytestmark = pytest.mark.usefixtures('no_retry_sleep')
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    box = PublishOutbox(':memory:')
+    monkeypatch.setattr('publish_outbox._outbox', box)
+    return box
+
+
+def _published_ids(env):
+    content = env.github.files['fake-owner/fake-site/public/data.json']
+    return [a['spotify_album_id'] for a in json.loads(content.decode('utf-8'))]
+
+
+def test_backoff_doubles_up_to_the_cap():
+    assert [publish_outbox.backoff_delay(n, base=30, maximum=600) for n in (1, 2, 3, 5, 9)] == [30, 60, 120, 480, 600]
+
+
+def test_entries_survive_reopening_the_database(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    PublishOutbox(path).enqueue('sheet', 'Sheet1', 'Add A - B')
+    reopened = PublishOutbox(path)
+    assert reopened.depth() == 1
+    assert list(reopened.due(LATER)) == [('sheet', 'Sheet1')]
+
+
+def test_defer_pushes_the_next_attempt_back(outbox):
+    entry_id = outbox.enqueue(commit_message='x', delay=0)
+    now = time.time()
+    outbox.defer([entry_id], 'boom', now=now)
+    assert outbox.due(now) == {}
+    assert outbox.due(now + publish_outbox.backoff_delay(1) + 1)
+    assert OUTBOX_DEPTH.value() == 1
+    assert OUTBOX_OLDEST_AGE.value() >= 0
+
+
+@pytest.mark.asyncio
+async def test_failed_push_is_queued_and_reconciled(outbox):
+    github = FakeGitHub()
+    with offline_backends(sheet=make_album_sheet(3), github=github) as env:
+        github.error_rate = 1.0
+        result = await process_album(NEW_URL, apple_music_url='https://music.apple.com/x')
+        assert result['partial_failure'] is True
+        assert 'queued' in result['message']
+        assert outbox.depth() == 1
+
+        # Still failing: the entry is kept and backed off
+        assert await reconcile_once(outbox, now=LATER) == 0
+        assert outbox.depth() == 1
+
+        github.error_rate = 0.0
+        assert await reconcile_once(outbox, now=LATER + 3600) == 1
+        assert outbox.depth() == 0
+        assert _published_ids(env)[-1] == '4LH4d3cOWNNsVw41Gqt2kv'
+    assert OUTBOX_DEPTH.value() == 0
+
+
+@pytest.mark.asyncio
+async def test_pending_entries_are_coalesced_into_one_push(outbox):
+    outbox.enqueue(commit_message='Add A - One', delay=0)
+    outbox.enqueue(commit_message='Add B - Two')  # not due yet, but covered by the same push
+    with offline_backends(sheet=make_album_sheet(3)) as env:
+        assert await reconcile_once(outbox) == 2
+    assert [c['message'] for c in env.github.data_commits] == ['Sync album data (2 pending updates)']
+    assert outbox.depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_successful_pipeline_push_clears_earlier_entries(outbox):
+    outbox.enqueue(commit_message='Add A - One')
+    with offline_backends(sheet=make_album_sheet(3)) as env:
+        result = await process_album(NEW_URL, apple_music_url='https://music.apple.com/x')
+    assert 'partial_failure' not in result
+    assert outbox.depth() == 0
+    assert len(env.github.data_commits) == 1
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+import import_albums
+import rebuild
+from fakes import FakeSpotify, make_album_sheet, offline_backends, synthetic_album_id
+from rebuild import coalesce_updates, diff_rows
+
+
+@pytest.fixture
+def imported():
+    """A sheet of 30 albums added by the importer, and the Spotify catalog they came from."""
+    sheet, sp = make_album_sheet(0), FakeSpotify()
+    entries = [{'url': f'https://open.spotify.com/album/{synthetic_album_id(i)}', 'date': '',
+                'picker': 'SS', 'apple_music_url': ''} for i in range(30)]
+    with offline_backends(sheet=sheet, spotify=sp, extra_modules=[import_albums]):
+        import_albums.import_albums(entries)
+    sp.reset_counts()
+    return sheet, sp
+
+
+def run(sheet, sp, **kwargs):
+    with offline_backends(sheet=sheet, spotify=sp, extra_modules=[rebuild]):
+        return rebuild.rebuild(**kwargs)
+
+
+def test_unchanged_sheet_has_no_diff(imported):
+    sheet, sp = imported
+    summary = run(sheet, sp)
+    assert summary['albums'] == 30 and summary['changes'] == []
+    assert sp.count('albums') == 2 and sp.count('album') == 0
+
+
+def test_mapping_change_is_diffed_and_written_in_coalesced_ranges(imported, monkeypatch, tmp_path):
+    sheet, sp = imported
+    sheet.rows[5][3] = 'Hand-typed title'  # a manual edit the rebuild restores
+    parse = add_album.parse_album_info
+
+    def largest_artwork(raw, url, artist_genres=()):
+        info = parse(raw, url, artist_genres)
+        info['artwork_url'] = raw['images'][0]['url']
+        return info
+
+    monkeypatch.setattr('add_album.parse_album_info', largest_artwork)
+    output = tmp_path / 'data.json'
+    summary = run(sheet, sp, write=True, output_path=str(output))
+
+    fields = [c['field'] for c in summary['changes']]
+    assert fields.count('artwork_url') == 30 and fields.count('album') == 1
+    assert summary['ranges'] == 2  # one artwork_url column range + one album cell
+    assert sheet.count('batch_update') == 1
+    assert all(row[7].endswith('-640') for row in sheet.rows[1:])
+    assert sheet.rows[5][3] != 'Hand-typed title'
+    assert json.loads(output.read_text())[0]['artwork_url'].endswith('-640')
+    assert run(sheet, sp)['changes'] == []
+
+
+def test_fields_limit_the_rebuild(imported):
+    sheet, sp = imported
+    sheet.rows[2][2] = 'Renamed Artist'
+    sheet.rows[3][8] = 'Other Label'
+    summary = run(sheet, sp, fields=['label'], write=True)
+    assert [(c['row'], c['field']) for c in summary['changes']] == [(4, 'label')]
+    assert sheet.rows[2][2] == 'Renamed Artist'
+
+
+def test_spotify_cache_serves_reruns(imported, monkeypatch, tmp_path):
+    sheet, sp = imported
+    monkeypatch.setattr('spotify_cache.SPOTIFY_CACHE_DB', str(tmp_path / 'spotify.db'))
+    monkeypatch.setattr('spotify_cache._caches', {})
+    run(sheet, sp)
+    first = sp.count()
+    summary = run(sheet, sp)
+    assert sp.count() == first and summary['api_calls']['spotify'] == 0
+    run(sheet, sp, refresh=True)
+    assert sp.count() == 2 * first
+
+
+def test_coalesce_merges_consecutive_rows_per_column():
+    header_map = {'artist': 2, 'genres': 10}
+    changes = [{'row': r, 'field': 'genres', 'new': f'g{r}'} for r in (2, 3, 4, 7)]
+    changes.append({'row': 3, 'field': 'artist', 'new': 'A'})
+    assert coalesce_updates(changes, header_map) == [
+        {'range': 'C3:C3', 'values': [['A']]},
+        {'range': 'K2:K4', 'values': [['g2'], ['g3'], ['g4']]},
+        {'range': 'K7:K7', 'values': [['g7']]},
+    ]
+
+
+def test_rows_without_spotify_ids_are_ignored():
+    rows = [['1', 'x', 'Artist', 'Album', '', '', 'https://bandcamp.com/x']]
+    header_map = {'artist': 2, 'album': 3, 'spotify_album_id': 5, 'spotify_album_url': 6}
+    assert diff_rows(rows, 1, header_map, {}) == []
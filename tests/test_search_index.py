@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from export_json import export_sheet_to_json
+from fakes import make_album_sheet, offline_backends
+from github_push import export_and_push
+from search_index import SORT_KEYS, build_search_index, search, source_sha256
+
+WEBSITE_SEARCH_INDEX = os.path.abspath(os.path.join(os.path.dirname(__file__), "../website/src/utils/searchIndex.js"))
+
+
+def _album(pick, artist, album, year='2001'):
+    return {'pick_number': pick, 'artist': artist, 'album': album, 'year': year}
+
+
+ALBUMS = [
+    _album(1, 'Björk', 'Homogenic', '1997'),
+    _album(2, 'Sigur Rós', 'Ágætis byrjun', '1999'),
+    _album(3, 'Beyoncé', 'Lemonade', '2016'),
+    _album(4, 'björk', 'Vespertine', '2001'),
+    _album(5, 'The  Beatles', 'Abbey Road', '1969'),
+    _album(0, 'Unpicked', 'Draft', ''),
+    _album(6, 'ΣΟΦΟΣ', 'Straße', '2020'),
+    _album(7, 'İstanbul Trio', 'Émilie', 'n/a'),
+    _album(8, '🎸 Band', 'Rock 🎸 Rock', '2010'),
+]
+
+
+def _scan(albums, query):
+    """The website's filterAndSort search: lower-cased substring of artist or album."""
+    if not query.strip():
+        return list(range(len(albums)))
+    term = query.lower()
+    return [p for p, a in enumerate(albums) if term in a['artist'].lower() or term in a['album'].lower()]
+
+
+def test_search_matches_the_sites_scan():
+    index = build_search_index(ALBUMS)
+    for query in ('björk', 'BJÖRK', 'bjork', 'rós', 'ros', 'ágætis', 'the  beatles', 'the beatles',
+                  'σοφος', 'straße', 'strasse', 'émilie', 'emilie', '🎸', '🎸 rock', 'e', 'ab', 'on', 'zzz', '', '  '):
+        assert search(index, query) == _scan(ALBUMS, query), query
+
+
+def test_nothing_is_folded():
+    index = build_search_index(ALBUMS)
+    assert search(index, 'bjork') == []
+    assert search(index, 'BJÖRK') == [0, 3]
+    assert search(index, 'the beatles') == []
+
+
+def test_trigrams_do_not_span_fields():
+    index = build_search_index([_album(1, 'Air', 'Moon Safari')])
+    assert search(index, 'airmoon') == []
+    assert 'r\nm' not in index['grams']
+
+
+def test_sort_orders_are_ascending_with_ties_in_data_order():
+    index = build_search_index(ALBUMS)
+    assert set(index['sort']) == set(SORT_KEYS)
+    assert index['sort']['pick_number'] == [5, 0, 1, 2, 3, 4, 6, 7, 8]
+    assert index['sort']['year'] == [5, 7, 4, 0, 1, 3, 8, 2, 6]  # '' and 'n/a' sort as 0
+    assert index['picks'] == [1, 2, 3, 4, 5, 0, 6, 7, 8]
+
+
+def test_export_writes_search_index_for_the_data_json_bytes(tmp_path):
+    output = tmp_path / 'data.json'
+    with offline_backends(sheet=make_album_sheet(30)):
+        albums = export_sheet_to_json(output_path=str(output), formats='search')
+    index = json.loads((tmp_path / 'data.search.json').read_text())
+    assert index['source_sha256'] == hashlib.sha256(output.read_bytes()).hexdigest()
+    assert index == json.loads(json.dumps(build_search_index(albums, source_sha256(output.read_bytes()))))
+    assert index['count'] == len(albums) == 30
+    term = albums[7]['album'].lower()
+    assert search(index, term) == _scan(albums, term)
+
+
+def test_export_and_push_publishes_the_index_next_to_data_json():
+    with offline_backends(sheet=make_album_sheet(5)) as env:
+        assert export_and_push()[0] is True
+    data = env.github.files['fake-owner/fake-site/public/data.json']
+    index = json.loads(env.github.files['fake-owner/fake-site/public/data.search.json'])
+    assert index['source_sha256'] == hashlib.sha256(data).hexdigest()
+    assert index['count'] == len(json.loads(data)) == 5
+
+
+def test_failed_index_push_does_not_fail_the_publish(monkeypatch):
+    import github_push
+    real_push = github_push.push_data_to_github
+
+    def push(content, commit_msg, target=None):
+        if target and target['path'].endswith('.search.json'):
+            raise RuntimeError('boom')
+        return real_push(content, commit_msg, target=target)
+
+    monkeypatch.setattr(github_push, 'push_data_to_github', push)
+    with offline_backends(sheet=make_album_sheet(3)) as env:
+        assert export_and_push()[0] is True
+    assert 'fake-owner/fake-site/public/data.json' in env.github.files
+    assert 'fake-owner/fake-site/public/data.search.json' not in env.github.files
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+def test_browser_built_index_matches_the_exported_one():
+    script = (
+        f"import {{ buildSearchIndex }} from {json.dumps('file://' + WEBSITE_SEARCH_INDEX)};"
+        "const albums = JSON.parse(require('fs').readFileSync(0, 'utf8'));"
+        "process.stdout.write(JSON.stringify(buildSearchIndex(albums, 'sha')));"
+    ).replace("require('fs')", "(await import('node:fs'))")
+    result = subprocess.run(
+        ['node', '--input-type=module', '-e', script],
+        input=json.dumps(ALBUMS), capture_output=True, text=True, check=True,
+    )
+    assert json.loads(result.stdout) == json.loads(json.dumps(build_search_index(ALBUMS, 'sha')))
@@ -0,0 +1,171 @@
+"""Tests for the SQLite sheet replica in sheet_cache.py."""
+import os
+import sys
+import pytest
+from datetime import date
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+from fakes import FakeWorksheet, make_album_sheet, sheets_display
+from sheet_cache import SheetReplica, get_sheet_replica
+
+
+ALBUM_ID_A = "0SeRWS3scHWplJhMppd6rJ"
+ALBUM_ID_B = "1BZnpfFBovJnGHhFrQjbWB"
+ALBUM_ID_C = "4LH4d3cOWNNsVw41Gqt2kv"
+URL_A = f"https://open.spotify.com/album/{ALBUM_ID_A}"
+URL_B = f"https://open.spotify.com/album/{ALBUM_ID_B}"
+URL_C = f"https://open.spotify.com/album/{ALBUM_ID_C}"
+
+HEADER = ['Pick', 'Date', 'Artist', 'Album', 'spotify_album_url', 'picker']
+
+
+def make_rows():
+    return [
+        HEADER,
+        ['1', '1/5/2025', 'Artist A', 'Album A', URL_A, 'SS'],
+        ['2', '1/12/2025', 'Artist B', 'Album B', URL_B, 'DG'],
+    ]
+
+
+@pytest.fixture
+def replica(tmp_path):
+    return SheetReplica(str(tmp_path / 'cache.sqlite3'), 'sheet:0', max_age=0)
+
+
+class TestSync:
+
+    def test_first_sync_is_full_load(self, replica):
+        ws = FakeWorksheet(make_rows())
+        assert replica.sync(ws) == 'full'
+        assert replica.header() == add_album.get_header_row_and_map(ws)
+        assert len(replica.data_rows()) == 2
+
+    def test_fresh_replica_makes_no_api_calls(self, tmp_path):
+        replica = SheetReplica(str(tmp_path / 'c.sqlite3'), 'k', max_age=3600)
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        ws.reset_counts()
+        assert replica.sync(ws) == 'fresh'
+        assert ws.counts() == {}
+
+    def test_unchanged_sheet_costs_one_batch_get(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        ws.reset_counts()
+        assert replica.sync(ws) == 'probe'
+        assert ws.counts() == {'batch_get': 1}
+
+    def test_new_rows_are_picked_up_incrementally(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        ws.rows.append(['3', '1/19/2025', 'Artist C', 'Album C', URL_C, 'RB'])
+        assert replica.sync(ws) == 'incremental'
+        assert replica.lookup_album(ALBUM_ID_C) == ('3', '1/19/2025')
+
+    def test_edited_tail_row_triggers_full_resync(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        ws.rows[-1][5] = 'JC'
+        assert replica.sync(ws) == 'full'
+
+    def test_header_change_triggers_full_resync(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        ws.rows[0].append('label')
+        assert replica.sync(ws) == 'full'
+        assert 'label' in replica.header()[1]
+
+    def test_invalidate_forces_full_resync(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        replica.invalidate()
+        assert replica.sync(ws) == 'full'
+
+
+class TestReadPaths:
+
+    def test_existing_album_ids_match_live_read(self, replica):
+        ws = FakeWorksheet(make_rows())
+        assert add_album.get_existing_album_ids(ws, replica=replica) == add_album.get_existing_album_ids(ws)
+
+    def test_check_duplicate_uses_replica(self, replica):
+        ws = FakeWorksheet(make_rows())
+        is_dup, msg = add_album.check_duplicate(URL_B, ws, replica=replica)
+        assert is_dup is True
+        assert 'Pick #2 on 1/12/2025' in msg
+        assert ws.count('col_values') == 0
+
+    def test_next_pick_and_date_match_live_read(self, replica):
+        ws = FakeWorksheet(make_rows())
+        live = add_album.get_next_pick_number_and_date(ws, 1, 1, 2)
+        cached = add_album.get_next_pick_number_and_date(ws, 1, None, None, replica=replica)
+        assert cached == live == (3, date(2025, 1, 19))
+
+
+class TestWriteThrough:
+
+    def test_record_append_resolves_pick_formula(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        row = ['=ROW()-1', '1/19/2025', 'Artist C', 'Album C', URL_C, 'RB']
+        replica.record_append(row, ws.append_row(row))
+        assert replica.lookup_album(ALBUM_ID_C) == ('3', '1/19/2025')
+        assert replica.last_pick_and_date() == (3, date(2025, 1, 19))
+
+    def test_record_append_without_response_uses_next_row(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        replica.record_append(['=ROW()-1', '1/19/2025', 'Artist C', 'Album C', URL_C, ''])
+        assert replica.lookup_album(ALBUM_ID_C) == ('3', '1/19/2025')
+
+    def test_record_appends_numbers_consecutive_rows(self, replica):
+        ws = FakeWorksheet(make_rows()[:2])
+        replica.sync(ws)
+        replica.record_appends([
+            ['=ROW()-1', '1/12/2025', 'Artist B', 'Album B', URL_B, 'DG'],
+            ['=ROW()-1', '1/19/2025', 'Artist C', 'Album C', URL_C, 'RB'],
+        ], {'updates': {'updatedRange': 'Sheet1!A3:F4'}})
+        assert replica.lookup_album(ALBUM_ID_B) == ('2', '1/12/2025')
+        assert replica.lookup_album(ALBUM_ID_C) == ('3', '1/19/2025')
+        assert replica.last_pick_and_date() == (3, date(2025, 1, 19))
+
+    def test_appended_row_does_not_trigger_resync(self, replica):
+        ws = FakeWorksheet(make_rows())
+        replica.sync(ws)
+        row = ['=ROW()-1', '1/19/2025', 'Artist C', 'Album C', URL_C, 'RB']
+        replica.record_append(row, ws.append_row(row))
+        assert replica.sync(ws) == 'probe'
+
+    def test_formatted_append_does_not_trigger_resync(self, replica):
+        ws = make_album_sheet(3, display=sheets_display)  # dates shown as ISO, numbers as 1,997.00
+        replica.sync(ws)
+        header_row, header_map = add_album.get_header_row_and_map(ws)
+        info = {'Artist': 'Artist C', 'Album': 'Album C', 'Year': 1997, 'Total Tracks': 11,
+                'spotify_album_id': ALBUM_ID_C, 'spotify_album_url': URL_C}
+        row = add_album.build_row_from_header(header_map, '', date(2019, 1, 27), info, header_row)
+        replica.record_append(row, ws.append_row(row, value_input_option='USER_ENTERED'))
+        assert ws.rows[-1][1:5] == ['2019-01-27', 'Artist C', 'Album C', '1,997.00']
+
+        assert replica.sync(ws) == 'probe'
+        displayed = list(ws.rows[-1])
+        while displayed and not displayed[-1]:
+            displayed.pop()
+        assert replica.data_rows()[-1] == displayed
+        assert replica.lookup_album(ALBUM_ID_C) == ('4', '2019-01-27')
+        ws.reset_counts()
+        assert replica.sync(ws) == 'probe'  # the adopted row now hashes as displayed
+        assert ws.counts() == {'batch_get': 1}
+
+    def test_edited_appended_row_triggers_full_resync(self, replica):
+        ws = make_album_sheet(3, display=sheets_display)
+        replica.sync(ws)
+        row = ['=ROW()-1', '1/27/2019', 'Artist C', 'Album C', '1997', '', URL_C]
+        replica.record_append(row, ws.append_row(row, value_input_option='USER_ENTERED'))
+        ws.rows[-1][2] = 'Someone Else'
+        assert replica.sync(ws) == 'full'
+
+
+def test_get_sheet_replica_disabled_without_db_path():
+    ws = FakeWorksheet(make_rows())
+    assert get_sheet_replica(ws) is None
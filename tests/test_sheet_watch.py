@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+import sheet_cache
+import sheet_watch
+from fakes import FakeGitHub, make_album_sheet, offline_backends
+from sheet_watch import SheetWatcher
+
+
+pytestmark = pytest.mark.usefixtures('no_retry_sleep')
+
+
+@pytest.fixture(autouse=True)
+def watch_state(tmp_path, monkeypatch):
+    path = tmp_path / 'watch_state.json'
+    monkeypatch.setattr('sheet_watch.SHEET_WATCH_STATE', str(path))
+    return path
+
+
+def _published(env):
+    content = env.github.files['fake-owner/fake-site/public/data.json']
+    return json.loads(content.decode('utf-8'))
+
+
+def test_unchanged_sheet_costs_one_metadata_request():
+    with offline_backends(sheet=make_album_sheet(5), extra_modules=[sheet_watch]) as env:
+        watcher = SheetWatcher()
+        assert watcher.poll() == 'published'
+        env.reset_counts()
+        assert watcher.poll() == 'unchanged'
+        assert env.request_counts()['sheets'] == {'drive_modified_time': 1}
+        assert env.github.count() == 0
+
+
+def test_manual_edit_is_published():
+    with offline_backends(sheet=make_album_sheet(5), extra_modules=[sheet_watch]) as env:
+        watcher = SheetWatcher()
+        watcher.poll()
+        env.sheet.batch_update([{'range': 'M3', 'values': [['ZZ']]}])  # fix a picker
+        assert watcher.poll() == 'published'
+    assert _published(env)[1]['picker'] == 'ZZ'
+    assert [c['message'] for c in env.github.data_commits] == ['Sync sheet edits'] * 2
+
+
+def test_manual_edit_is_published_with_a_sheet_replica(tmp_path, monkeypatch):
+    monkeypatch.setattr('sheet_cache.SHEET_CACHE_DB', str(tmp_path / 'replica.sqlite3'))
+    monkeypatch.setattr('sheet_cache._replicas', {})
+    with offline_backends(sheet=make_album_sheet(5), extra_modules=[sheet_watch]) as env:
+        watcher = SheetWatcher()
+        watcher.poll()
+        assert sheet_cache.get_sheet_replica(env.sheet) is not None
+        env.sheet.batch_update([{'range': 'M3', 'values': [['ZZ']]}])  # mid-sheet, within SHEET_CACHE_MAX_AGE
+        assert watcher.poll() == 'published'
+        assert watcher.poll() == 'unchanged'
+    assert _published(env)[1]['picker'] == 'ZZ'
+
+
+def test_restart_with_no_edits_skips_the_export(watch_state):
+    with offline_backends(sheet=make_album_sheet(5), extra_modules=[sheet_watch]) as env:
+        assert SheetWatcher().poll() == 'published'
+        assert watch_state.exists()
+        env.reset_counts()
+        assert SheetWatcher().poll() == 'unchanged'  # e.g. the next cron --once run
+        assert env.request_counts()['sheets'] == {'drive_modified_time': 1}
+        assert env.github.count() == 0
+        env.sheet.batch_update([{'range': 'M3', 'values': [['ZZ']]}])
+        assert SheetWatcher().poll() == 'published'
+    assert _published(env)[1]['picker'] == 'ZZ'
+
+
+def test_fingerprints_are_kept_per_website(watch_state):
+    sheet_watch.save_fingerprint(str(watch_state), 'sheet other-site', 'drive:x')
+    with offline_backends(sheet=make_album_sheet(5), extra_modules=[sheet_watch]):
+        assert SheetWatcher().poll() == 'published'
+    assert len(json.loads(watch_state.read_text())) == 2
+
+
+def test_edit_that_leaves_the_export_unchanged_is_not_committed():
+    with offline_backends(sheet=make_album_sheet(5), extra_modules=[sheet_watch]) as env:
+        watcher = SheetWatcher()
+        watcher.poll()
+        env.sheet.batch_update([{'range': 'M3', 'values': [[env.sheet.rows[2][12]]]}])  # same value
+        assert watcher.poll() == 'published'
+    assert len(env.github.commits) == 2  # data.json and its search index, neither re-pushed
+
+
+def test_falls_back_to_range_hash_without_drive(monkeypatch):
+    def no_drive(self):
+        raise PermissionError('Drive API not enabled')
+    monkeypatch.setattr('fakes._FakeSpreadsheet.get_lastUpdateTime', no_drive)
+    monkeypatch.setattr('add_album._client_cache', {'enabled': True, 'header_ttl': 300.0})  # as in the bot/CLI
+    with offline_backends(sheet=make_album_sheet(5), extra_modules=[sheet_watch]) as env:
+        watcher = SheetWatcher()
+        assert watcher.poll() == 'published'
+        env.reset_counts()
+        assert watcher.poll() == 'unchanged'
+        assert env.sheet.counts() == {'batch_get': 1}
+        env.sheet.append_row(['=ROW()-1', '2/10/2019', 'New', 'Row'])
+        assert watcher.poll() == 'published'
+    add_album.clear_client_cache()
+
+
+def test_failed_publish_is_retried_on_next_poll():
+    github = FakeGitHub(error_rate=1.0, error_status=503)
+    with offline_backends(sheet=make_album_sheet(3), github=github, extra_modules=[sheet_watch]):
+        watcher = SheetWatcher()
+        assert watcher.poll() == 'failed'
+        github.error_rate = 0.0
+        assert watcher.poll() == 'published'
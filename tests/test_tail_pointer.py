@@ -0,0 +1,75 @@
+"""Tests for the cached next-slot tail pointer in add_album.py."""
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+from album_record import format_sheet_date
+from fakes import make_album_sheet
+
+
+@pytest.fixture(autouse=True)
+def client_cache(monkeypatch):
+    monkeypatch.setattr('add_album._client_cache', {'enabled': True, 'header_ttl': 300.0})
+    yield
+    add_album.clear_client_cache()
+
+
+FIRST = date(2019, 1, 6)  # make_album_sheet's first pick date
+WEEK = timedelta(days=7)
+
+
+def next_slot(ws):
+    return add_album.get_next_pick_number_and_date(ws, 1, 1, 2)
+
+
+def cold_next_slot(ws):
+    add_album.clear_client_cache()
+    return next_slot(ws)
+
+
+def test_warm_pointer_reads_only_the_tail_window():
+    ws = make_album_sheet(5_000)
+    cold = next_slot(ws)
+    ws.reset_counts()
+    assert next_slot(ws) == cold == (5_001, FIRST + WEEK * 5_000)
+    assert ws.counts() == {'batch_get': 1}
+    assert ws.cells_read <= 2 * (add_album.TAIL_WINDOW + 1)
+
+
+def test_rows_added_by_someone_else_are_folded_in():
+    ws = make_album_sheet(50)
+    next_slot(ws)
+    ws.append_rows([['=ROW()-1', '1/1/2030'], ['=ROW()-1', '1/8/2030']])
+    assert next_slot(ws) == (53, date(2030, 1, 15))
+    assert ws.count('batch_get') == 2
+
+
+def test_more_new_rows_than_the_window_triggers_a_rescan():
+    ws = make_album_sheet(50)
+    next_slot(ws)
+    ws.append_rows([['=ROW()-1', '3/3/2031']] * (add_album.TAIL_WINDOW + 5))
+    assert next_slot(ws) == cold_next_slot(ws) == (76, date(2031, 3, 10))
+
+
+def test_edited_tail_row_triggers_a_rescan():
+    ws = make_album_sheet(50)
+    next_slot(ws)
+    ws.batch_update([{'range': 'B51', 'values': [['6/6/2040']]}])
+    assert next_slot(ws) == (51, date(2040, 6, 13))
+    ws.batch_update([{'range': 'A51:B51', 'values': [['', '']]}])  # last row cleared
+    assert next_slot(ws) == cold_next_slot(ws) == (50, FIRST + WEEK * 49)
+
+
+def test_own_appends_advance_the_pointer():
+    ws = make_album_sheet(10)
+    header_row = 1
+    _, next_date = next_slot(ws)
+    response = ws.append_row(['=ROW()-1', format_sheet_date(next_date)])
+    add_album.record_tail_append(ws, header_row, [next_date], response)
+    ws.reset_counts()
+    assert next_slot(ws) == (12, next_date + WEEK)
+    assert ws.counts() == {'batch_get': 1}
@@ -16,14 +16,24 @@ def make_update(text, chat_id=ALLOWED_ID):
     update.effective_user.username = "testuser"
     update.effective_user.first_name = "Test"
     update.message.text = text
-    update.message.reply_text = AsyncMock()
+    status = MagicMock()
+    status.edit_text = AsyncMock()
+    update.message.reply_text = AsyncMock(return_value=status)
     return update
 
 
+def final_text(update):
+    """Text the user ends up seeing: the last edit of the status reply."""
+    status = update.message.reply_text.return_value
+    return status.edit_text.call_args
+
+
 @pytest.fixture(autouse=True)
 def set_env(monkeypatch):
     monkeypatch.setenv('TELEGRAM_ALLOWED_CHAT_ID', ALLOWED_ID)
     monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'fake-token')
+    monkeypatch.setattr('telegram_bot.EDIT_MIN_INTERVAL', 0.0)
+    monkeypatch.setattr('tenants._registry', None)  # rebuilt from the env above
 
 
 @pytest.mark.asyncio
@@ -61,7 +71,8 @@ async def test_calls_pipeline_for_valid_url():
     with patch.dict('sys.modules', {'pipeline': MagicMock(process_album=AsyncMock(return_value=mock_result))}):
         await telegram_bot.handle_message(update, MagicMock())
 
-    call_args = update.message.reply_text.call_args
+    assert update.message.reply_text.call_args[0][0].startswith('⏳')
+    call_args = final_text(update)
     assert call_args[0][0] == mock_result['message']
     assert call_args[1].get('parse_mode') == 'Markdown'
 
@@ -78,7 +89,7 @@ async def test_handles_pipeline_exception():
         await telegram_bot.handle_message(update, MagicMock())
 
     update.message.reply_text.assert_called_once()
-    assert "went wrong" in update.message.reply_text.call_args[0][0]
+    assert "went wrong" in final_text(update)[0][0]
 
 
 @pytest.mark.asyncio
@@ -150,3 +161,53 @@ async def test_apple_music_url_passed_to_pipeline():
         await telegram_bot.handle_message(update, MagicMock())
 
     assert mock_process.call_args[1].get('apple_music_url') == VALID_APPLE_URL
+
+
+@pytest.mark.asyncio
+async def test_multiple_entries_are_processed_as_one_batch():
+    import telegram_bot
+    other_url = "https://open.spotify.com/album/1ATL5GLyefJaxhQzSPVrLX"
+    update = make_update(
+        f"catching up:\n@aotw {VALID_URL} {VALID_APPLE_URL} DG\n@aotw {other_url} {VALID_APPLE_URL}"
+    )
+    mock_result = {'success': True, 'message': 'Added 2 of 2 albums:', 'results': [
+        {'success': True}, {'success': True}]}
+    mock_pipeline = MagicMock(process_albums_batch=AsyncMock(return_value=mock_result))
+
+    with patch.dict('sys.modules', {'pipeline': mock_pipeline}):
+        await telegram_bot.handle_message(update, MagicMock())
+
+    mock_pipeline.process_album.assert_not_called()
+    entries = mock_pipeline.process_albums_batch.call_args[0][0]
+    assert [e['url'] for e in entries] == [VALID_URL, other_url]
+    assert entries[0]['picker'] == 'DG'
+    update.message.reply_text.assert_called_once()
+    assert final_text(update)[0][0] == 'Added 2 of 2 albums:'
+
+
+
+@pytest.mark.asyncio
+async def test_progress_edits_are_throttled_but_final_is_delivered():
+    import telegram_bot
+    update = make_update('')
+    progress = telegram_bot.ProgressReply(update.message, min_interval=60)
+    await progress.start('⏳ Processing album…')
+    await progress.update('🔎 Found it')  # within the interval — dropped
+    status = update.message.reply_text.return_value
+    status.edit_text.assert_not_called()
+
+    progress.min_interval = 0
+    await progress.update('📝 Added')
+    await progress.finish('✅ Done')
+    assert [c[0][0] for c in status.edit_text.call_args_list] == ['📝 Added', '✅ Done']
+
+
+@pytest.mark.asyncio
+async def test_progress_falls_back_to_new_reply_when_edit_fails():
+    import telegram_bot
+    update = make_update('')
+    update.message.reply_text.return_value.edit_text.side_effect = Exception('message to edit not found')
+    progress = telegram_bot.ProgressReply(update.message, min_interval=0)
+    await progress.start('⏳ Processing album…')
+    await progress.finish('✅ Done')
+    assert update.message.reply_text.call_args_list[-1][0][0] == '✅ Done'
@@ -0,0 +1,157 @@
+import json
+import os
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import github_push
+import pipeline
+import tenants
+from fakes import make_album_sheet, offline_backends
+from tenants import RateLimiter, load_registry, parse_tenants
+
+CLUBS = [
+    {'name': 'aotw', 'chat_id': '111', 'sheet_id': 'sheet-a', 'sheet_tab': 'Sheet1'},
+    {
+        'name': 'jazz', 'chat_id': '222', 'sheet_id': 'sheet-b', 'sheet_tab': 'Picks',
+        'pickers': {'Miles': 'MD'},
+        'github': {'owner': 'jazz-club', 'repo': 'jazz-site', 'token_env': 'JAZZ_GITHUB_TOKEN'},
+        'limits': {'albums_per_hour': 2, 'max_batch': 3},
+    },
+]
+NEW_URL = 'https://open.spotify.com/album/4LH4d3cOWNNsVw41Gqt2kv'
+APPLE_URL = 'https://music.apple.com/us/album/test/123456789'
+
+
+pytestmark = pytest.mark.usefixtures('no_retry_sleep')
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setenv('JAZZ_GITHUB_TOKEN', 'fake-token')
+    return tenants.configure_registry(parse_tenants(CLUBS))
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    yield
+    tenants.configure_registry(None)
+
+
+def test_load_from_json_content_and_file(tmp_path):
+    path = tmp_path / 'tenants.json'
+    path.write_text(json.dumps(CLUBS))
+    for source in (json.dumps(CLUBS), str(path)):
+        registry = load_registry(source)
+        assert [t.name for t in registry] == ['aotw', 'jazz']
+        jazz = registry.for_chat(222)
+        assert jazz.resolve_picker(None, 'miles') == 'MD'
+        assert jazz.resolve_picker('xx', 'miles') == 'XX'
+        assert registry.for_chat('111').resolve_picker(None, 'd_blott') == 'DG'  # default picker map
+        assert registry.for_sheet('sheet-b', 'Picks') is jazz
+        assert registry.for_chat('999') is None
+
+
+def test_invalid_config_is_rejected():
+    with pytest.raises(ValueError, match='chat_id'):
+        parse_tenants([{'name': 'x'}])
+    with pytest.raises(ValueError, match='Duplicate'):
+        parse_tenants([{'chat_id': '1'}, {'chat_id': '1'}])
+
+
+def test_legacy_env_gives_one_tenant(monkeypatch):
+    monkeypatch.setenv('TELEGRAM_ALLOWED_CHAT_ID', '12345')
+    monkeypatch.setenv('GOOGLE_SHEET_ID', 'legacy-sheet')
+    registry = load_registry('')
+    assert len(registry) == 1
+    tenant = registry.for_chat('12345')
+    assert (tenant.name, tenant.sheet_id) == ('default', 'legacy-sheet')
+    monkeypatch.delenv('TELEGRAM_ALLOWED_CHAT_ID')
+    assert len(load_registry('')) == 0
+
+
+def test_rate_limiter_slides_over_an_hour():
+    limiter = RateLimiter(per_hour=3)
+    assert limiter.allow(2, now=0)
+    assert not limiter.allow(2, now=10)  # would make 4; nothing recorded
+    assert limiter.allow(1, now=20)
+    assert not limiter.allow(1, now=3599)
+    assert limiter.allow(2, now=3600)
+    assert RateLimiter(0).allow(1000)
+
+
+@pytest.mark.asyncio
+async def test_each_club_appends_to_its_sheet_and_publishes_to_its_site(registry, monkeypatch):
+    sheets = {'sheet-a': make_album_sheet(3), 'sheet-b': make_album_sheet(1)}
+
+    def get_sheet(sheet_id=None, sheet_tab=None, creds_path=None):
+        return sheets[sheet_id]
+
+    with offline_backends() as env:
+        monkeypatch.setattr('pipeline.get_google_sheet', get_sheet)
+        monkeypatch.setattr('export_json.get_google_sheet', get_sheet)
+        for tenant in registry:
+            result = await pipeline.process_album(
+                NEW_URL, sheet_id=tenant.sheet_id, sheet_tab=tenant.sheet_tab,
+                apple_music_url=APPLE_URL, github_target=tenant.github_target(),
+            )
+            assert result['success'], result['message']
+
+    # Same album in both clubs: not a duplicate across clubs
+    assert len(sheets['sheet-a'].rows) == 5 and len(sheets['sheet-b'].rows) == 3
+    assert sorted(env.github.files) == ['fake-owner/fake-site/public/data.json',
+                                        'fake-owner/fake-site/public/data.search.json',
+                                        'jazz-club/jazz-site/public/data.json',
+                                        'jazz-club/jazz-site/public/data.search.json']
+
+
+def test_publish_cache_is_kept_per_target(registry, monkeypatch):
+    monkeypatch.setattr('github_push._publish_cache', {'enabled': True, 'targets': {}})
+    with offline_backends() as env:
+        targets = [tenant.github_target() for tenant in registry]
+        for target in targets:
+            github_push.push_data_to_github('{"a": 1}', 'one', target=target)
+        env.reset_counts()
+        for target in targets:
+            github_push.push_data_to_github('{"a": 1}', 'same again', target=target)
+    assert env.github.count() == 0
+    assert len(github_push.publish_states()) == 2
+
+
+def _update(text, chat_id):
+    update = MagicMock()
+    update.effective_chat.id = int(chat_id)
+    update.effective_user.username = 'miles'
+    update.message.text = text
+    update.message.reply_text = AsyncMock(return_value=MagicMock(edit_text=AsyncMock()))
+    return update
+
+
+@pytest.mark.asyncio
+async def test_bot_routes_by_chat_and_applies_limits(registry, monkeypatch):
+    import telegram_bot
+    monkeypatch.setattr('telegram_bot.EDIT_MIN_INTERVAL', 0.0)
+    process = AsyncMock(return_value={'success': True, 'message': 'Added!', 'data': {}})
+    text = f'@aotw {NEW_URL} {APPLE_URL}'
+
+    with patch.dict('sys.modules', {'pipeline': MagicMock(process_album=process)}):
+        for _ in range(3):
+            await telegram_bot.handle_message(_update(text, '222'), MagicMock())
+        limited = _update(text, '222')
+        await telegram_bot.handle_message(limited, MagicMock())
+        await telegram_bot.handle_message(_update(text, '111'), MagicMock())
+
+    calls = [c.kwargs for c in process.call_args_list]
+    assert [c['sheet_id'] for c in calls] == ['sheet-b', 'sheet-b', 'sheet-a']
+    assert calls[0]['picker'] == 'MD'
+    assert calls[0]['github_target']['owner'] == 'jazz-club'
+    assert calls[2]['github_target']['owner'] == github_push.GITHUB_REPO_OWNER
+    assert 'try again later' in limited.message.reply_text.call_args[0][0]
+    assert tenants.TENANT_MESSAGES.value(tenant='jazz', outcome='rate_limited') >= 2
+
+    too_many = _update(' '.join([text] * 4), '111')
+    registry.for_chat('111').max_batch = 3
+    await telegram_bot.handle_message(too_many, MagicMock())
+    assert 'At most 3 albums' in too_many.message.reply_text.call_args[0][0]
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+import time
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import add_album
+import warmup
+from fakes import make_album_sheet, offline_backends
+
+
+@pytest.fixture(autouse=True)
+def client_cache(monkeypatch):
+    monkeypatch.setattr('add_album._client_cache', {'enabled': True, 'header_ttl': 300.0})
+    monkeypatch.setattr('warmup._state', {'status': 'pending', 'timings_ms': {}, 'errors': {}, 'restored': [], 'snapshot': None})
+    yield
+    add_album.clear_client_cache()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_primes_clients_and_header():
+    ws = make_album_sheet(5)
+    assert not warmup.is_ready()
+    with offline_backends(sheet=ws):
+        state = await warmup.warm_up()
+        assert state['status'] == 'warm', state['errors']
+        assert set(state['timings_ms']) == {'spotify', 'sheets', 'github'}
+        ws.reset_counts()
+        add_album.get_header_row_and_map(ws)
+        add_album.find_header_cells(ws)
+    assert warmup.is_ready()
+    assert ws.count() == 0  # header layout served from the cache
+
+
+@pytest.mark.asyncio
+async def test_failed_step_is_reported_not_raised(monkeypatch):
+    def broken(*args):
+        raise RuntimeError('spotify down')
+    monkeypatch.setattr('warmup.STEPS', (('spotify', broken),))
+    state = await warmup.warm_up()
+    assert state['status'] == 'degraded'
+    assert state['errors'] == {'spotify': 'spotify down'}
+    assert warmup.is_ready()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_is_bounded_by_timeout(monkeypatch):
+    monkeypatch.setattr('warmup.STEPS', (('sheets', lambda *a: time.sleep(0.5)),))
+    state = await warmup.warm_up(timeout=0.05)
+    assert state['status'] == 'degraded'
+    assert state['errors'] == {'sheets': 'timed out'}
+
+
+def test_header_cache_expires():
+    ws = make_album_sheet(3)
+    add_album._client_cache['header_ttl'] = 0.0
+    add_album.get_header_row_and_map(ws)
+    ws.reset_counts()
+    add_album.get_header_row_and_map(ws)
+    assert ws.count('row_values') == 1
@@ -0,0 +1,111 @@
+import contextlib
+import json
+import os
+import sys
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+from tornado.httpserver import HTTPServer
+from tornado.testing import bind_unused_port
+
+from web_server import make_web_app
+
+UPDATE = {
+    'update_id': 1001,
+    'message': {
+        'message_id': 7,
+        'date': 1700000000,
+        'chat': {'id': 12345678, 'type': 'group'},
+        'from': {'id': 1, 'is_bot': False, 'first_name': 'Test'},
+        'text': 'hello',
+    },
+}
+
+
+@contextlib.contextmanager
+def running_server(metrics_token='m3trics'):
+    """Serve make_web_app on an unused local port; yields (application mock, base url)."""
+    application = MagicMock()
+    application.bot = None  # Update.de_json accepts no bot
+    application.update_queue.put = AsyncMock()
+    sock, port = bind_unused_port()
+    http_server = HTTPServer(make_web_app(application, secret_token='s3cret', metrics_token=metrics_token))
+    http_server.add_sockets([sock])
+    try:
+        yield application, f'http://127.0.0.1:{port}'
+    finally:
+        http_server.stop()
+
+
+async def fetch(url, **kwargs):
+    client = AsyncHTTPClient(force_instance=True)
+    try:
+        return await client.fetch(url, **kwargs)
+    finally:
+        client.close()
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_serves_prometheus_text():
+    with running_server() as (_, base):
+        resp = await fetch(f'{base}/metrics', headers={'Authorization': 'Bearer m3trics'})
+    assert resp.code == 200
+    assert resp.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert b'# TYPE aotw_stage_duration_seconds histogram' in resp.body
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('headers', [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'm3trics'}])
+async def test_metrics_route_requires_the_bearer_token(headers):
+    with running_server() as (_, base):
+        with pytest.raises(HTTPClientError) as exc:
+            await fetch(f'{base}/metrics', headers=headers)
+    assert exc.value.code == 401
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_is_not_served_without_a_token():
+    with running_server(metrics_token=None) as (_, base):
+        with pytest.raises(HTTPClientError) as exc:
+            await fetch(f'{base}/metrics', headers={'Authorization': 'Bearer '})
+    assert exc.value.code == 404
+
+
+@pytest.mark.asyncio
+async def test_webhook_queues_update():
+    with running_server() as (application, base):
+        resp = await fetch(
+            f'{base}/telegram', method='POST', body=json.dumps(UPDATE),
+            headers={'X-Telegram-Bot-Api-Secret-Token': 's3cret'},
+        )
+    assert resp.code == 200
+    queued = application.update_queue.put.call_args[0][0]
+    assert queued.update_id == 1001
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_bad_secret():
+    with running_server() as (application, base):
+        with pytest.raises(HTTPClientError) as exc:
+            await fetch(
+                f'{base}/telegram', method='POST', body=json.dumps(UPDATE),
+                headers={'X-Telegram-Bot-Api-Secret-Token': 'wrong'},
+            )
+    assert exc.value.code == 403
+    application.update_queue.put.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ready_route_turns_green_after_warm_up(monkeypatch):
+    monkeypatch.setattr('warmup._state', {'status': 'warming', 'timings_ms': {}, 'errors': {}, 'restored': [], 'snapshot': None})
+    with running_server() as (_, base):
+        with pytest.raises(HTTPClientError) as exc:
+            await fetch(f'{base}/ready')
+        assert exc.value.code == 503
+
+        monkeypatch.setattr('warmup._state', {'status': 'warm', 'timings_ms': {'spotify': 120.0}, 'errors': {}, 'restored': [], 'snapshot': None})
+        resp = await fetch(f'{base}/ready')
+    assert resp.code == 200
+    assert json.loads(resp.body)['timings_ms'] == {'spotify': 120.0}
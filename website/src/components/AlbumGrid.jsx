@@ -3,13 +3,13 @@ import AlbumCard from './AlbumCard'
 import { processAlbums, groupByYear } from '../utils/filterSort'
 import './AlbumGrid.css'
 
-function AlbumGrid({ albums, searchTerm, filters, sortBy = 'date', direction = 'desc' }) {
+function AlbumGrid({ albums, index = null, searchTerm, filters, sortBy = 'date', direction = 'desc' }) {
   const [expandedYears, setExpandedYears] = useState(() => new Set([String(new Date().getFullYear())]))
 
   // Process albums (filter, search, sort)
   const processedAlbums = useMemo(() => {
-    return processAlbums(albums, { searchTerm, filters, sortBy, direction })
-  }, [albums, searchTerm, filters, sortBy, direction])
+    return processAlbums(albums, { searchTerm, filters, sortBy, direction, index })
+  }, [albums, index, searchTerm, filters, sortBy, direction])
 
   // Group by pick year
   const albumsByYear = useMemo(() => {
@@ -1,8 +1,10 @@
 import { useState, useEffect, useMemo } from 'react'
 import { uniqueDecades } from '../utils/filterSort'
+import { buildSearchIndex, isUsableIndex, sha256Hex } from '../utils/searchIndex'
 
 export function useAlbums() {
   const [albums, setAlbums] = useState([])
+  const [sourceSha256, setSourceSha256] = useState(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
 
@@ -10,10 +12,13 @@ export function useAlbums() {
     fetch('/data.json')
       .then(res => {
         if (!res.ok) throw new Error(`HTTP ${res.status}`)
-        return res.json()
+        return res.arrayBuffer()
       })
-      .then(data => {
-        setAlbums(data)
+      .then(async buffer => {
+        // The hash ties a published data.search.json to these exact bytes
+        const sha = await sha256Hex(buffer).catch(() => null)
+        setAlbums(JSON.parse(new TextDecoder().decode(buffer)))
+        setSourceSha256(sha)
         setLoading(false)
       })
       .catch(err => {
@@ -23,7 +28,27 @@ export function useAlbums() {
       })
   }, [])
 
-  return { albums, loading, error }
+  return { albums, sourceSha256, loading, error }
+}
+
+/**
+ * Search index for albums: data.search.json when export_and_push published
+ * one for these exact data.json bytes, otherwise built here once per list.
+ */
+export function useSearchIndex(albums, sourceSha256) {
+  const [prebuilt, setPrebuilt] = useState(null)
+
+  useEffect(() => {
+    fetch('/data.search.json')
+      .then(res => (res.ok ? res.json() : null))
+      .then(setPrebuilt)
+      .catch(() => setPrebuilt(null))
+  }, [])
+
+  return useMemo(() => {
+    if (albums.length === 0) return null
+    return isUsableIndex(prebuilt, albums, sourceSha256) ? prebuilt : buildSearchIndex(albums, sourceSha256)
+  }, [albums, sourceSha256, prebuilt])
 }
 
 /** Derives unique decades from album release years. */
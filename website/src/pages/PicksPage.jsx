@@ -2,10 +2,11 @@ import { useState } from 'react'
 import AlbumGrid from '../components/AlbumGrid'
 import SearchBar from '../components/SearchBar'
 import FilterBar from '../components/FilterBar'
-import { useAlbums } from '../hooks/useAlbums'
+import { useAlbums, useSearchIndex } from '../hooks/useAlbums'
 
 export default function PicksPage() {
-  const { albums, loading, error } = useAlbums()
+  const { albums, sourceSha256, loading, error } = useAlbums()
+  const searchIndex = useSearchIndex(albums, sourceSha256)
   const [searchTerm, setSearchTerm] = useState('')
   const [filters, setFilters] = useState({})
 
@@ -19,7 +20,7 @@ export default function PicksPage() {
         <FilterBar filters={filters} onChange={setFilters} albums={albums} />
       </div>
       <main>
-        <AlbumGrid albums={albums} searchTerm={searchTerm} filters={filters} />
+        <AlbumGrid albums={albums} index={searchIndex} searchTerm={searchTerm} filters={filters} />
       </main>
     </>
   )
@@ -1,3 +1,5 @@
+import { COMPARATORS, searchPositions, sortedPositions } from './searchIndex.js'
+
 /**
  * Filter and sort an array of album objects.
  *
@@ -28,14 +30,8 @@ export function filterAndSort(albums, searchTerm = '', filters = {}) {
   }
 
   // Sort
-  const sortBy = filters.sortBy || 'pick_number'
-  results.sort((a, b) => {
-    if (sortBy === 'pick_number') return a.pick_number - b.pick_number
-    if (sortBy === 'artist')     return a.artist.localeCompare(b.artist)
-    if (sortBy === 'album')      return a.album.localeCompare(b.album)
-    if (sortBy === 'year')       return Number(a.year) - Number(b.year)
-    return 0
-  })
+  const compare = COMPARATORS[filters.sortBy || 'pick_number']
+  if (compare) results.sort(compare)
 
   return results
 }
@@ -52,15 +48,46 @@ export function uniqueDecades(albums) {
   )].sort((a, b) => b - a)
 }
 
+/**
+ * filterAndSort using a search index (utils/searchIndex.js): the search is a
+ * postings lookup and the sort walks a presorted ordering, so nothing is
+ * lower-cased or re-sorted per keystroke. Results are identical to the scan.
+ */
+export function filterAndSortIndexed(albums, index, searchTerm = '', filters = {}) {
+  const matches = searchPositions(index, searchTerm)
+  let keep = null
+  if (matches) {
+    keep = new Uint8Array(albums.length)
+    for (const p of matches) keep[p] = 1
+  }
+  const decade = filters.decade ? Number(filters.decade) : null
+  const order = sortedPositions(index, albums, filters.sortBy || 'pick_number') || albums.keys()
+
+  const results = []
+  for (const p of order) {
+    if (keep && !keep[p]) continue
+    if (decade !== null) {
+      const y = Number(albums[p].year)
+      if (!(y >= decade && y < decade + 10)) continue
+    }
+    results.push(albums[p])
+  }
+  return results
+}
+
 /**
  * Wrapper around filterAndSort that accepts a unified options object.
  * sortBy in options is a fallback when filters.sortBy is not set.
  * direction: 'asc' | 'desc' — reverses the sorted result when 'desc'.
+ * index: optional search index for albums; without it every call scans and sorts.
  */
-export function processAlbums(albums, { searchTerm = '', filters = {}, sortBy = 'pick_number', direction = 'asc' } = {}) {
+export function processAlbums(albums, { searchTerm = '', filters = {}, sortBy = 'pick_number', direction = 'asc', index = null } = {}) {
   const effectiveSortBy = filters.sortBy || sortBy
   const effectiveDirection = filters.sortDir || direction
-  const results = filterAndSort(albums, searchTerm, { ...filters, sortBy: effectiveSortBy })
+  const effectiveFilters = { ...filters, sortBy: effectiveSortBy }
+  const results = index
+    ? filterAndSortIndexed(albums, index, searchTerm, effectiveFilters)
+    : filterAndSort(albums, searchTerm, effectiveFilters)
   return effectiveDirection === 'desc' ? results.reverse() : results
 }
 
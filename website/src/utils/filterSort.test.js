@@ -0,0 +1,69 @@
+import { test } from 'node:test'
+import assert from 'node:assert/strict'
+import { processAlbums } from './filterSort.js'
+import { buildSearchIndex, isUsableIndex, sha256Hex } from './searchIndex.js'
+
+const album = (pick_number, artist, name, year) => ({ pick_number, artist, album: name, year })
+
+const ALBUMS = [
+  album(1, 'Björk', 'Homogenic', '1997'),
+  album(2, 'Sigur Rós', 'Ágætis byrjun', '1999'),
+  album(3, 'zebra', 'Apple Venus', '1999'),
+  album(4, 'Apple', 'zebra stripes', '2004'),
+  album(5, 'Ørjan Nilsen', 'Straße der Sehnsucht', '2011'),
+  album(6, 'Émilie Simon', 'The Big Machine', '2009'),
+  album(7, 'ΣΟΦΟΣ', 'Ἀρχή', '2020'),
+  album(8, 'İstanbul Trio', 'İçerde', '2015'),
+  album(9, '🎸 Band', 'Rock 🎸 Rock', ''),
+  album(13, 'Unknown', 'Bootleg', 'n/a'),
+  album(10, 'Émilie Decomposed', 'Café del Mar', '2001'),
+  album(11, 'björk', 'Vespertine', '2001'),
+  album(12, 'The  Beatles', 'Abbey Road', '1969'),
+]
+
+const TERMS = [
+  '', '   ', 'b', 'bj', 'björk', 'BJÖRK', 'bjork', 'ros', 'rós', 'ágætis', 'straße', 'strasse',
+  'ørjan', 'émilie', 'émilie', 'emilie', 'σοφος', 'ΣΟΦΟΣ', 'ἀρχή', 'i̇stanbul', 'istanbul',
+  'İç', '🎸', '🎸 rock', 'the  beatles', 'the beatles', 'zebra', 'apple', ' apple', 'e', 'zzz',
+]
+const SORTS = ['pick_number', 'artist', 'album', 'year', 'date']
+const DECADES = [undefined, '1990', '2000']
+
+const roundTrip = index => JSON.parse(JSON.stringify(index))
+
+test('indexed search and sort match the scan, including non-ASCII names', () => {
+  const indexes = [buildSearchIndex(ALBUMS), roundTrip(buildSearchIndex(ALBUMS))]
+  for (const searchTerm of TERMS) {
+    for (const sortBy of SORTS) {
+      for (const decade of DECADES) {
+        for (const direction of ['asc', 'desc']) {
+          const options = { searchTerm, filters: { decade }, sortBy, direction }
+          const expected = processAlbums(ALBUMS, options).map(a => a.pick_number)
+          for (const index of indexes) {
+            const actual = processAlbums(ALBUMS, { ...options, index }).map(a => a.pick_number)
+            assert.deepEqual(actual, expected, JSON.stringify(options))
+          }
+        }
+      }
+    }
+  }
+})
+
+test('artist and album order follows the collator, not code points', () => {
+  const index = buildSearchIndex(ALBUMS)
+  const artists = processAlbums(ALBUMS, { sortBy: 'artist', index }).map(a => a.artist)
+  assert.ok(artists.indexOf('Apple') < artists.indexOf('Björk'))
+  assert.ok(artists.indexOf('Émilie Simon') < artists.indexOf('zebra'))
+})
+
+test('a published index is only used for the data.json bytes it was built from', async () => {
+  const bytes = new TextEncoder().encode(JSON.stringify(ALBUMS))
+  const sha = await sha256Hex(bytes)
+  assert.match(sha, /^[0-9a-f]{64}$/)
+
+  const published = roundTrip(buildSearchIndex(ALBUMS, sha))
+  assert.equal(isUsableIndex(published, ALBUMS, sha), true)
+  assert.equal(isUsableIndex(published, ALBUMS, '0'.repeat(64)), false)
+  assert.equal(isUsableIndex(published, ALBUMS, null), false)
+  assert.equal(isUsableIndex(roundTrip(buildSearchIndex(ALBUMS)), ALBUMS, sha), false)
+})
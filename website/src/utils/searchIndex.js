@@ -0,0 +1,116 @@
+/**
+ * Search/sort index over the album list — the same layout the exporter writes
+ * to data.search.json (src/search_index.py). Positions refer to data.json order.
+ *
+ * The index must give exactly the results of filterAndSort's scan: text is the
+ * lower-cased artist and album (nothing folded), and orderings use the scan's
+ * comparators. pick_number and year come presorted; artist and album need the
+ * browser's collator, so they are sorted here on first use.
+ */
+export const SEARCH_INDEX_VERSION = 1
+const NGRAM = 3
+const SEARCH_FIELDS = ['artist', 'album']
+
+const collator = new Intl.Collator()
+
+// Missing picks and non-numeric years sort as 0, as in search_index.py (NaN would leave the order undefined)
+const numberOf = v => Number(v) || 0
+
+/** The scan's sort comparators (filterAndSort), shared by the indexed path. */
+export const COMPARATORS = {
+  pick_number: (a, b) => numberOf(a.pick_number) - numberOf(b.pick_number),
+  artist:      (a, b) => collator.compare(a.artist, b.artist),
+  album:       (a, b) => collator.compare(a.album, b.album),
+  year:        (a, b) => numberOf(a.year) - numberOf(b.year),
+}
+
+/** Python str slicing counts code points, not UTF-16 units. */
+function grams(part) {
+  const chars = Array.from(part)
+  const out = []
+  for (let i = 0; i + NGRAM <= chars.length; i++) out.push(chars.slice(i, i + NGRAM).join(''))
+  return out
+}
+
+/** Positions of albums in ascending sortBy order; Array.prototype.sort is stable, so ties keep data.json order. */
+function sortPositions(albums, compare) {
+  return albums.map((_, i) => i).sort((a, b) => compare(albums[a], albums[b]))
+}
+
+/** Build the index in the browser when data.search.json is missing or stale. */
+export function buildSearchIndex(albums, sourceSha256 = null) {
+  const text = albums.map(a => SEARCH_FIELDS.map(f => String(a[f] ?? '').toLowerCase()).join('\n'))
+  const gramMap = {}
+  text.forEach((t, position) => {
+    const seen = new Set(t.split('\n').flatMap(grams))
+    for (const g of seen) (gramMap[g] ||= []).push(position)
+  })
+
+  return {
+    version: SEARCH_INDEX_VERSION,
+    count: albums.length,
+    source_sha256: sourceSha256,
+    fields: SEARCH_FIELDS,
+    picks: albums.map(a => a.pick_number || 0),
+    text,
+    grams: gramMap,
+    sort: {
+      pick_number: sortPositions(albums, COMPARATORS.pick_number),
+      year: sortPositions(albums, COMPARATORS.year),
+    },
+  }
+}
+
+/** SHA-256 hex of the fetched data.json bytes, or null where crypto.subtle is unavailable (plain http). */
+export async function sha256Hex(buffer) {
+  if (!globalThis.crypto?.subtle) return null
+  const digest = await globalThis.crypto.subtle.digest('SHA-256', buffer)
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('')
+}
+
+/** True when a fetched data.search.json was built from exactly the data.json bytes that were loaded. */
+export function isUsableIndex(index, albums, sourceSha256) {
+  return Boolean(index && sourceSha256) &&
+    index.version === SEARCH_INDEX_VERSION &&
+    index.count === albums.length &&
+    index.source_sha256 === sourceSha256
+}
+
+/**
+ * Positions matching searchTerm in data.json order, or null when there is nothing to filter.
+ * Three or more characters intersect trigram postings; shorter terms scan the text.
+ */
+export function searchPositions(index, searchTerm) {
+  if (!searchTerm.trim()) return null
+  const term = searchTerm.toLowerCase()
+  const termGrams = grams(term)
+  if (termGrams.length === 0) {
+    return index.text.flatMap((t, p) => (t.includes(term) ? [p] : []))
+  }
+
+  let candidates = null
+  for (const g of termGrams) {
+    const postings = index.grams[g]
+    if (!postings) return []
+    candidates = candidates === null ? postings : candidates.filter(intersectWith(postings))
+    if (candidates.length === 0) return []
+  }
+  return candidates.filter(p => index.text[p].includes(term))
+}
+
+function intersectWith(postings) {
+  const set = new Set(postings)
+  return p => set.has(p)
+}
+
+/**
+ * Ascending positions for sortBy, or null (keep data.json order) for keys the
+ * scan does not sort by. Orderings the index lacks are computed once and kept on it.
+ */
+export function sortedPositions(index, albums, sortBy) {
+  if (index.sort[sortBy]) return index.sort[sortBy]
+  const compare = COMPARATORS[sortBy]
+  if (!compare) return null
+  index.sort[sortBy] = sortPositions(albums, compare)
+  return index.sort[sortBy]
+}